@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+import os
+import io
+import time
+import argparse
+import tempfile
+import contextlib
+import subprocess
+import importlib.util
+
+from stub_cacti import load_config, make_memory
+
+from utils.class_process import Process
+from utils.generate_lib import generate_lib
+
+################################################################################
+# LIBERTY GENERATION BENCHMARK
+#
+# Times generate_lib on one macro (by default the 512x1024 1r1w macro from
+# example_cfgs/sky130.cfg, modeled with the stub cacti) and compares it with
+# generate_lib from another git revision (--against <rev>, eg. the revision
+# before a change to the liberty generator) so the change can be measured before
+# it goes in. The revision has to be given, once a change is committed HEAD is
+# the new generator and would only be compared with itself.
+################################################################################
+
+TOP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def get_args() -> argparse.Namespace:
+    """
+    Get command line arguments
+    """
+    parser = argparse.ArgumentParser(description="Benchmark Liberty generation")
+    parser.add_argument("--config", action="store", help="JSON configuration file", default=os.sep.join([TOP_DIR, 'example_cfgs', 'sky130.cfg']))
+    parser.add_argument("--sram", action="store", help="Name of the SRAM to benchmark", default='fakeram_512x1024_1r1w')
+    parser.add_argument("--against", action="store", help="Git revision whose generate_lib is used as the reference", required=True)
+    parser.add_argument("--iterations", action="store", type=int, help="Number of timed runs of each generator", default=20)
+    return parser.parse_args()
+
+def load_generate_lib( rev, tmp_dir ):
+  """
+  Import generate_lib from scripts/utils/generate_lib.py at a git revision
+  """
+  source = subprocess.run(['git', 'show', f'{rev}:scripts/utils/generate_lib.py'], cwd=TOP_DIR,
+                          check=True, stdout=subprocess.PIPE, text=True).stdout
+  path = os.sep.join([tmp_dir, 'generate_lib_reference.py'])
+  with open(path, 'w') as fid:
+    fid.write(source)
+  spec = importlib.util.spec_from_file_location('generate_lib_reference', path)
+  module = importlib.util.module_from_spec(spec)
+  spec.loader.exec_module(module)
+  return module.generate_lib
+
+def time_generator( generate, mem, iterations ):
+  times = []
+  for _ in range(iterations):
+    start = time.perf_counter()
+    generate(mem)
+    times.append(time.perf_counter() - start)
+  return min(times), sum(times) / len(times)
+
+def main( args : argparse.Namespace ):
+
+  json_data = load_config(args.config)
+  process = Process(json_data)
+  sram_data = [s for s in json_data['srams'] if s['name'] == args.sram][0]
+
+  with tempfile.TemporaryDirectory() as tmp_dir:
+    with contextlib.redirect_stdout(io.StringIO()):
+      mem = make_memory(process, sram_data, tmp_dir)
+    generate_lib(mem)
+    size = os.path.getsize(os.sep.join([mem.results_dir, mem.name + '.lib']))
+
+    reference, reference_name = load_generate_lib(args.against, tmp_dir), f'generate_lib @ {args.against}'
+
+    new_best, new_mean = time_generator(generate_lib, mem, args.iterations)
+    ref_best, ref_mean = time_generator(reference, mem, args.iterations)
+
+  print(f'{mem.name}: {size} bytes of liberty, {args.iterations} runs each')
+  print(f'  {"generate_lib":32s} best {new_best*1e3:8.3f} ms  mean {new_mean*1e3:8.3f} ms')
+  print(f'  {reference_name:32s} best {ref_best*1e3:8.3f} ms  mean {ref_mean*1e3:8.3f} ms')
+  print(f'  speedup (best): {ref_best/new_best:.2f}x')
+
+### Entry point
+if __name__ == '__main__':
+  args = get_args()
+  main( args )
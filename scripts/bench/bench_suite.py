@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import gc
+import platform
+import tempfile
+import itertools
+import contextlib
+import tracemalloc
+
+from stub_cacti import load_config, make_memory
+
+from utils.class_process import Process
+from utils.generate_lib import generate_lib
+from utils.generate_lef import generate_lef
+from utils.generate_verilog import generate_verilog, generate_verilog_bb, TEMPLATE_MAPPING, TIMING_CHECK_MODES
+
+################################################################################
+# VIEW GENERATOR BENCHMARK SUITE
+#
+# Sweeps the view generators over word width, depth, port configuration (every
+# verilog template) and timing check mode, with memories modeled by the
+# stub cacti. Every case records the best wall time, the peak python memory
+# allocated while generating the view and the size of the view. The results
+# can be saved as a json baseline and later runs compared against it, failing
+# (exit status 1) if any case got worse by more than the threshold.
+################################################################################
+
+TOP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WIDTHS       = [8, 64, 256, 1024]
+DEPTHS       = [16, 1024, 65536]
+QUICK_WIDTHS = [8, 1024]
+QUICK_DEPTHS = [16, 65536]
+
+# Clocks used for each port configuration (a single clock shared by all ports)
+PORT_CLKS = {
+  '1rw'   : '[1], [], []',
+  '1rw1r' : '[1], [1], []',
+  '1r1w'  : '[], [1], [1]',
+  '2r1w'  : '[], [1], [1]',
+}
+
+# View generators and the extension of the file each one writes. Only the
+# verilog model depends on the timing check mode.
+GENERATORS = {
+  'lib'        : ('.lib',  lambda mem, tmChkExpand: generate_lib(mem)),
+  'lef'        : ('.lef',  lambda mem, tmChkExpand: generate_lef(mem)),
+  'verilog'    : ('.v',    lambda mem, tmChkExpand: generate_verilog(mem, tmChkExpand=tmChkExpand)),
+  'verilog_bb' : ('.bb.v', lambda mem, tmChkExpand: generate_verilog_bb(mem)),
+}
+TMCHK_GENERATORS = ['verilog']
+
+# Suffix of the case name of each timing check mode ('bit' is the expansion
+# that older baselines call tmchk)
+TMCHK_SUFFIX = {'signal': '', 'bit': '/tmchk', 'generate': '/tmchk_generate'}
+
+# Metrics compared against the baseline
+METRICS = ['time_s', 'peak_bytes', 'output_bytes']
+
+def get_args() -> argparse.Namespace:
+    """
+    Get command line arguments
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the view generators over a sweep of memories")
+    parser.add_argument("--config", action="store", help="JSON configuration file that supplies the process", default=os.sep.join([TOP_DIR, 'example_cfgs', 'freepdk45.cfg']))
+    parser.add_argument("--generators", action="store", nargs='+', choices=list(GENERATORS), help="Generators to benchmark (default: all)", default=list(GENERATORS))
+    parser.add_argument("--quick", action="store_true", help="Only sweep the smallest and largest width and depth")
+    parser.add_argument("--repeat", action="store", type=int, help="Timed runs per case, the best one is kept", default=3)
+    parser.add_argument("--save", action="store", help="Write the results to this json baseline file", default=None)
+    parser.add_argument("--compare", action="store", help="Compare the results against this json baseline file", default=None)
+    parser.add_argument("--threshold", action="store", type=float, help="Allowed relative increase of any metric over the baseline", default=0.25)
+    parser.add_argument("--retries", action="store", type=int, help="Times a case that is slower than the baseline is timed again", default=2)
+    parser.add_argument("--time_floor", action="store", type=float, help="Ignore time increases smaller than this many seconds (timer noise)", default=0.002)
+    return parser.parse_args()
+
+# get_cases: every (ports, width, depth) combination of the sweep
+def get_cases( quick ):
+  widths = QUICK_WIDTHS if quick else WIDTHS
+  depths = QUICK_DEPTHS if quick else DEPTHS
+  return list(itertools.product(TEMPLATE_MAPPING, widths, depths))
+
+# run_case: time one generator on one memory, then measure its peak memory in
+# a separate run (tracemalloc slows everything down so it stays out of the
+# timed runs).
+def run_case( generate, mem, tmChkExpand, ext, repeat ):
+  times = []
+  with contextlib.redirect_stdout(io.StringIO()):
+    gc.disable()
+    try:
+      for _ in range(repeat):
+        start = time.perf_counter()
+        generate(mem, tmChkExpand)
+        times.append(time.perf_counter() - start)
+    finally:
+      gc.enable()
+
+    tracemalloc.start()
+    generate(mem, tmChkExpand)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+  return {
+    'time_s'       : min(times),
+    'peak_bytes'   : peak,
+    'output_bytes' : os.path.getsize(os.sep.join([mem.results_dir, mem.name + ext])),
+  }
+
+def run_suite( args, baseline ):
+  process = Process(load_config(args.config))
+  results = {}
+  with tempfile.TemporaryDirectory(prefix='fakeram_bench_') as tmp_dir:
+    for ports, width, depth in get_cases(args.quick):
+      sram_data = {
+        'name'      : f'bench_{width}x{depth}_{ports}',
+        'width'     : width,
+        'depth'     : depth,
+        'banks'     : 1,
+        'ports'     : ports,
+        'port_clks' : PORT_CLKS[ports],
+      }
+      with contextlib.redirect_stdout(io.StringIO()):
+        mem = make_memory(process, sram_data, tmp_dir)
+      for gen in args.generators:
+        ext, generate = GENERATORS[gen]
+        for tmChkExpand in (TIMING_CHECK_MODES if gen in TMCHK_GENERATORS else ['signal']):
+          key = f'{gen}/{ports}/{width}x{depth}' + TMCHK_SUFFIX[tmChkExpand]
+          r = run_case(generate, mem, tmChkExpand, ext, args.repeat)
+          # A slow run on a busy machine looks like a regression, so cases
+          # that are slower than the baseline get timed again before they
+          # are reported.
+          for _ in range(args.retries):
+            if key not in baseline or not is_regression('time_s', baseline[key]['time_s'], r['time_s'], args):
+              break
+            r['time_s'] = min(r['time_s'], run_case(generate, mem, tmChkExpand, ext, args.repeat)['time_s'])
+          results[key] = r
+          print(f'{key:36s} {r["time_s"]*1e3:10.3f} ms {r["peak_bytes"]/2**20:9.2f} MiB {r["output_bytes"]:>10d} B')
+  return results
+
+# is_regression: true if a metric got worse than the baseline by more than the
+# threshold (time increases under the time floor are timer noise)
+def is_regression( metric, old, new, args ):
+  if new <= old * (1.0 + args.threshold):
+    return False
+  return not (metric == 'time_s' and new - old < args.time_floor)
+
+# compare: list of regressions of the results against a baseline
+def compare( results, baseline, args ):
+  regressions = []
+  for key, r in results.items():
+    if key not in baseline:
+      print(f'NOTE: {key} is not in the baseline')
+      continue
+    for metric in METRICS:
+      old, new = baseline[key][metric], r[metric]
+      if is_regression(metric, old, new, args):
+        regressions.append(f'{key} {metric}: {old:g} -> {new:g} (+{(new/old - 1.0)*100.0 if old else float("inf"):.1f}%)')
+  return regressions
+
+def main( args : argparse.Namespace ):
+
+  baseline = {}
+  if args.compare:
+    with open(args.compare, 'r') as fid:
+      baseline = json.load(fid)['results']
+
+  results = run_suite(args, baseline)
+
+  if args.save:
+    with open(args.save, 'w') as fid:
+      json.dump({
+        'python'  : platform.python_version(),
+        'machine' : platform.machine(),
+        'repeat'  : args.repeat,
+        'results' : results,
+      }, fid, indent=2, sort_keys=True)
+    print(f'Saved {len(results)} cases to {args.save}')
+
+  if args.compare:
+    regressions = compare(results, baseline, args)
+    for line in regressions:
+      print(f'REGRESSION: {line}')
+    if regressions:
+      print(f'{len(regressions)} regression(s) over {args.threshold*100.0:g}% against {args.compare}')
+      return 1
+    print(f'No regressions over {args.threshold*100.0:g}% against {args.compare}')
+  return 0
+
+### Entry point
+if __name__ == '__main__':
+  args = get_args()
+  sys.exit(main( args ))
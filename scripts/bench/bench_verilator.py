@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+
+import os
+import io
+import re
+import sys
+import shutil
+import argparse
+import tempfile
+import contextlib
+import subprocess
+
+from stub_cacti import load_config, make_memory
+
+from utils.class_process import Process
+from utils.generate_verilog import generate_verilog, TEMPLATE_MAPPING
+
+################################################################################
+# VERILATOR SIMULATION BENCHMARK
+#
+# Builds the verilog model of every port configuration with verilator, once as
+# the current dense model and once as the two_state model with SRAM_TWO_STATE
+# defined, and drives each one from a small C++ testbench with random reads
+# and writes on every port. Reports the simulated cycles per second of each
+# model and the speedup of the two_state model. Needs verilator on the PATH
+# (or --verilator), the build time is not part of the measurement.
+################################################################################
+
+TOP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Clocks used for each port configuration (a single clock shared by all ports)
+PORT_CLKS = {
+  '1rw'   : '[1], [], []',
+  '1rw1r' : '[1], [1], []',
+  '1r1w'  : '[], [1], [1]',
+  '2r1w'  : '[], [1], [1]',
+}
+
+# Clocks, inputs and outputs of the model of each port configuration. The width
+# of an input is 1, 'addr' (address width) or 'data' (word width).
+PORT_SIGNALS = {
+  '1rw'   : (['clk'],
+             [('ce_rw1', 1), ('we_in_rw1', 1), ('addr_rw1', 'addr'), ('wd_in_rw1', 'data'), ('w_mask_rw1', 'data')],
+             ['rd_out_rw1']),
+  '1rw1r' : (['clk0', 'clk1'],
+             [('ce_rw1', 1), ('we_in_rw1', 1), ('addr_rw1', 'addr'), ('wd_in_rw1', 'data'), ('w_mask_rw1', 'data'),
+              ('ce_r1', 1), ('addr_r1', 'addr')],
+             ['rd_out_rw1', 'rd_out_r1']),
+  '1r1w'  : (['clk'],
+             [('ce_r1', 1), ('addr_r1', 'addr'), ('ce_w1', 1), ('we_in_w1', 1), ('addr_w1', 'addr'),
+              ('wd_in_w1', 'data'), ('w_mask_w1', 'data')],
+             ['rd_out_r1']),
+  '2r1w'  : (['clk'],
+             [('ce_r1', 1), ('addr_r1', 'addr'), ('ce_r2', 1), ('addr_r2', 'addr'), ('ce_w1', 1), ('we_in_w1', 1),
+              ('addr_w1', 'addr'), ('wd_in_w1', 'data'), ('w_mask_w1', 'data')],
+             ['rd_out_r1', 'rd_out_r2']),
+}
+
+# Models compared: the verilog model and the defines it is built with
+MODELS = {
+  'dense'     : ('dense',     []),
+  'two_state' : ('two_state', ['+define+SRAM_TWO_STATE']),
+}
+
+# C++ testbench, every cycle drives new random inputs and folds the read data
+# into a checksum (so verilator can not optimize the reads away)
+TESTBENCH = '''\
+#include <chrono>
+#include <cstdio>
+#include <cstdlib>
+#include <cstdint>
+#include "V{name}.h"
+#include "verilated.h"
+
+static uint64_t rng = 0x9e3779b97f4a7c15ull;
+static inline uint64_t next_rand() {{
+  rng ^= rng << 13; rng ^= rng >> 7; rng ^= rng << 17;
+  return rng;
+}}
+
+int main(int argc, char** argv) {{
+  Verilated::commandArgs(argc, argv);
+  const uint64_t cycles = strtoull(argv[1], nullptr, 10);
+  V{name}* top = new V{name};
+  uint64_t checksum = 0;
+  auto start = std::chrono::steady_clock::now();
+  for (uint64_t c = 0; c < cycles; c++) {{
+{drive}
+{clk_low}
+    top->eval();
+{clk_high}
+    top->eval();
+{check}
+  }}
+  auto stop = std::chrono::steady_clock::now();
+  printf("cycles %llu seconds %.6f checksum %llx\\n", (unsigned long long)cycles,
+         std::chrono::duration<double>(stop - start).count(), (unsigned long long)checksum);
+  top->final();
+  delete top;
+  return 0;
+}}
+'''
+
+def get_args() -> argparse.Namespace:
+    """
+    Get command line arguments
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the simulation speed of the verilog models with verilator")
+    parser.add_argument("--config", action="store", help="JSON configuration file that supplies the process", default=os.sep.join([TOP_DIR, 'example_cfgs', 'freepdk45.cfg']))
+    parser.add_argument("--ports", action="store", nargs='+', choices=list(TEMPLATE_MAPPING), help="Port configurations to benchmark (default: all)", default=list(TEMPLATE_MAPPING))
+    parser.add_argument("--width", action="store", type=int, help="Word width in bits (at most 64)", default=32)
+    parser.add_argument("--depth", action="store", type=int, help="Depth in words", default=1024)
+    parser.add_argument("--cycles", action="store", type=int, help="Simulated clock cycles per model", default=2000000)
+    parser.add_argument("--verilator", action="store", help="Verilator executable", default='verilator')
+    parser.add_argument("--keep", action="store", help="Build in this directory and keep it (default: a temporary directory)", default=None)
+    return parser.parse_args()
+
+# write_testbench: write the C++ testbench of a memory, returns its path
+def write_testbench( mem, build_dir ):
+  clks, inputs, outputs = PORT_SIGNALS[mem.port_config]
+  widths = {1: 1, 'addr': max(1, (int(mem.depth) - 1).bit_length()), 'data': int(mem.width_in_bits)}
+  drive = []
+  for sig, width in inputs:
+    # Chip enables are mostly on so the ports do real work
+    value = '(next_rand() & 7) != 0' if sig.startswith('ce_') else f'next_rand() & 0x{(1 << widths[width]) - 1:x}ull'
+    drive.append(f'    top->{sig} = {value};')
+  path = os.sep.join([build_dir, f'tb_{mem.name}.cpp'])
+  with open(path, 'w') as fid:
+    fid.write(TESTBENCH.format(
+      name      = mem.name,
+      drive     = '\n'.join(drive),
+      clk_low   = '\n'.join(f'    top->{clk} = 0;' for clk in clks),
+      clk_high  = '\n'.join(f'    top->{clk} = 1;' for clk in clks),
+      check     = '\n'.join(f'    checksum = checksum * 31 + top->{sig};' for sig in outputs)))
+  return path
+
+# build: verilate and compile a model with its testbench, returns the executable
+def build( verilator, mem, defines, build_dir ):
+  testbench = write_testbench(mem, build_dir)
+  exe = f'sim_{mem.name}'
+  cmd = [verilator, '--cc', '--exe', '--build', '-O3', '--x-assign', 'fast', '--x-initial', 'fast',
+         '-Wno-fatal', '-Wno-lint', '-Wno-style', '--top-module', mem.name, '--Mdir', os.sep.join([build_dir, 'obj_' + mem.name]),
+         '-o', exe, '-CFLAGS', '-O2'] + defines + [os.sep.join([mem.results_dir, mem.name + '.v']), testbench]
+  result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+  if result.returncode != 0:
+    print(result.stdout)
+    raise RuntimeError(f'verilator failed to build {mem.name}')
+  return os.sep.join([build_dir, 'obj_' + mem.name, exe])
+
+# simulate: run a built model, returns the simulated cycles per second
+def simulate( exe, cycles ):
+  out = subprocess.run([exe, str(cycles)], check=True, stdout=subprocess.PIPE, text=True).stdout
+  m = re.search(r'cycles (\d+) seconds (\S+)', out)
+  return int(m.group(1)) / max(float(m.group(2)), 1e-9)
+
+def run_bench( args, build_dir ):
+  process = Process(load_config(args.config))
+  print(f'{"ports":8s} {"model":10s} {"cycles/s":>14s}')
+  for ports in args.ports:
+    rates = {}
+    for model, (vlog_model, defines) in MODELS.items():
+      sram_data = {
+        'name'       : f'bench_{args.width}x{args.depth}_{ports}_{model}',
+        'width'      : args.width,
+        'depth'      : args.depth,
+        'banks'      : 1,
+        'ports'      : ports,
+        'port_clks'  : PORT_CLKS[ports],
+        'vlog_model' : vlog_model,
+      }
+      with contextlib.redirect_stdout(io.StringIO()):
+        mem = make_memory(process, sram_data, build_dir)
+      generate_verilog(mem)
+      rates[model] = simulate(build(args.verilator, mem, defines, build_dir), args.cycles)
+      print(f'{ports:8s} {model:10s} {rates[model]:14.0f}')
+    print(f'{ports:8s} {"speedup":10s} {rates["two_state"]/rates["dense"]:13.2f}x')
+
+def main( args : argparse.Namespace ):
+
+  if shutil.which(args.verilator) is None:
+    print(f'ERROR: {args.verilator} not found, install verilator or point --verilator at it')
+    return 1
+  if not 1 <= args.width <= 64:
+    print(f'ERROR: --width {args.width} is not between 1 and 64 (the testbench drives the ports as 64 bit integers)')
+    return 1
+
+  if args.keep:
+    os.makedirs(args.keep, exist_ok=True)
+    run_bench(args, args.keep)
+  else:
+    with tempfile.TemporaryDirectory(prefix='fakeram_verilator_') as build_dir:
+      run_bench(args, build_dir)
+  return 0
+
+### Entry point
+if __name__ == '__main__':
+  args = get_args()
+  sys.exit(main( args ))
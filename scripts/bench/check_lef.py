@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+import os
+import io
+import sys
+import argparse
+import tempfile
+import itertools
+import contextlib
+import subprocess
+import importlib.util
+
+from stub_cacti import load_config, make_memory
+
+from utils.class_process import Process
+from utils.generate_lef import generate_lef
+
+################################################################################
+# LEF REGRESSION CHECK
+#
+# Generates the LEF of a sweep of memories (pin pitches, word widths, depths,
+# port configurations and flipPins), modeled with the stub cacti, with the
+# current generate_lef and with generate_lef from another git revision
+# (--against <rev>), and reports every memory whose LEF is not byte-identical.
+# The pin coordinates are sums of the pin pitch, so a change to the pin
+# placement can round a coordinate differently on some pitches only (0.19 um
+# for one). Exits with 1 if any LEF differs.
+################################################################################
+
+TOP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PIN_PITCHES_NM = [36, 48, 80, 100, 140, 190, 200, 280, 460]
+WIDTHS         = [1, 8, 39, 64, 128]
+DEPTHS         = [16, 100, 1024, 4096]
+
+# Clocks used for each port configuration (a single clock shared by all ports)
+PORT_CLKS = {
+  '1rw'   : '[1], [], []',
+  '1rw1r' : '[1], [1], []',
+  '1r1w'  : '[], [1], [1]',
+  '2r1w'  : '[], [1], [1]',
+}
+
+def get_args() -> argparse.Namespace:
+    """
+    Get command line arguments
+    """
+    parser = argparse.ArgumentParser(description="Check that the LEF views match generate_lef at another git revision")
+    parser.add_argument("--config", action="store", help="JSON configuration file that supplies the process", default=os.sep.join([TOP_DIR, 'example_cfgs', 'sky130.cfg']))
+    parser.add_argument("--against", action="store", help="Git revision whose generate_lef is used as the reference", required=True)
+    return parser.parse_args()
+
+def load_generate_lef( rev, tmp_dir ):
+  """
+  Import generate_lef from scripts/utils/generate_lef.py at a git revision
+  """
+  source = subprocess.run(['git', 'show', f'{rev}:scripts/utils/generate_lef.py'], cwd=TOP_DIR,
+                          check=True, stdout=subprocess.PIPE, text=True).stdout
+  path = os.sep.join([tmp_dir, 'generate_lef_reference.py'])
+  with open(path, 'w') as fid:
+    fid.write(source)
+  spec = importlib.util.spec_from_file_location('generate_lef_reference', path)
+  module = importlib.util.module_from_spec(spec)
+  spec.loader.exec_module(module)
+  return module.generate_lef
+
+# render: text of the LEF a generator writes for a memory, None if the memory
+# can not be generated (too many pins for its edge)
+def render( generate, mem ):
+  try:
+    with contextlib.redirect_stdout(io.StringIO()):
+      generate(mem)
+  except SystemExit: # Generators call sys.exit() on errors
+    return None
+  with open(os.sep.join([mem.results_dir, mem.name + '.lef']), 'r') as fid:
+    return fid.read()
+
+def main( args : argparse.Namespace ):
+
+  json_data = load_config(args.config)
+  checked = 0
+  differ = []
+  with tempfile.TemporaryDirectory(prefix='fakeram_check_lef_') as tmp_dir:
+    reference = load_generate_lef(args.against, tmp_dir)
+    for pitch, flip in itertools.product(PIN_PITCHES_NM, [False, True]):
+      process = Process(dict(json_data, pinPitch_nm=pitch, pinWidth_nm=pitch // 2, flipPins=flip))
+      for ports, width, depth in itertools.product(PORT_CLKS, WIDTHS, DEPTHS):
+        sram_data = {
+          'name'      : f'check_{width}x{depth}_{ports}_{pitch}nm' + ('_flip' if flip else ''),
+          'width'     : width,
+          'depth'     : depth,
+          'banks'     : 1,
+          'ports'     : ports,
+          'port_clks' : PORT_CLKS[ports],
+        }
+        with contextlib.redirect_stdout(io.StringIO()):
+          mem = make_memory(process, sram_data, tmp_dir)
+        expected = render(reference, mem)
+        if expected is None:
+          continue
+        checked += 1
+        if render(generate_lef, mem) != expected:
+          differ.append(mem.name)
+
+  for name in differ:
+    print(f'DIFFERS: {name}')
+  print(f'{len(differ)} of {checked} LEF views differ from generate_lef @ {args.against}')
+  return 1 if differ else 0
+
+### Entry point
+if __name__ == '__main__':
+  args = get_args()
+  sys.exit(main( args ))
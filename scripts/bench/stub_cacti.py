@@ -0,0 +1,61 @@
+import os
+import re
+import sys
+import json
+import math
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.class_memory import Memory
+from utils.class_cacti_runner import CactiResult
+
+################################################################################
+# STUB CACTI
+#
+# Stand-in for the cacti runner used by the benchmarks. Rather than running
+# cacti it returns a canned csv row with plausible numbers for the rendered
+# configuration. The macro is roughly square but always tall enough to fit
+# every signal pin so that any width/depth/port combination makes it through
+# generate_lef.
+################################################################################
+
+CSV_HEADER = 'Tech node (nm), Capacity (bytes), Associativity, Output width (bits), Access time (ns), Random cycle time (ns), Multisubbank interleave cycle time (ns), Delay request network (ns), Dynamic read energy (nJ), Standby leakage per bank(mW), Area (mm2), FO4 (ps), Width (um), Height (um)\n'
+
+class StubCactiRunner:
+
+  identity = 'stub-cacti'
+
+  def __init__( self, process ):
+    self.process = process
+
+  def run( self, cfg_text ):
+    def field( key ):
+      return float(re.search(re.escape(key) + r'\s+(\S+)', cfg_text).group(1))
+    size     = int(field('-size (bytes)'))
+    bits     = int(field('-output/input bus width'))
+    tech_um  = field('-technology (u)')
+    rw_ports = int(field('-read-write port'))
+    r_ports  = int(field('-exclusive read port'))
+    w_ports  = int(field('-exclusive write port'))
+    depth    = max(2, size // max(1, bits // 8))
+
+    num_pins = (rw_ports*3 + r_ports*2 + w_ports*2)*bits + (rw_ports + r_ports + w_ports)*(math.ceil(math.log2(depth)) + 3)
+    area     = size * 8 * 150.0 * tech_um * tech_um * (1 + 0.3*(rw_ports + r_ports + w_ports - 1))
+    height   = max((num_pins + 24) * self.process.pinPitch_um, math.sqrt(area))
+    width    = max(area / height, 40 * self.process.pinPitch_um)
+    access   = 0.1 + 0.02 * math.log2(size) * tech_um / 0.045
+
+    row = '%d, %d, 1, %d, %.4f, %.4f, 0, 0, %.5f, %.5f, 0, %.3f, %.3f, %.3f, \n' % (
+      round(tech_um*1000), size, bits, access, access*0.8, 0.001*size**0.3, 0.01*size**0.5,
+      15.0*tech_um/0.045, width, height)
+    return CactiResult(row.split(','), CSV_HEADER + row, 'stub cacti\n')
+
+# load_config: read a json configuration file the same way run.py does
+def load_config( path ):
+  with open(path, 'r') as fid:
+    raw = [line.strip() for line in fid if not line.strip().startswith('#')]
+  return json.loads('\n'.join(raw))
+
+# make_memory: model a memory with the stub cacti runner
+def make_memory( process, sram_data, output_dir ):
+  return Memory(process, sram_data, output_dir, cacti_runner=StubCactiRunner(process))
@@ -1,16 +1,35 @@
 #!/usr/bin/env python3
 
+import io
+import os
 import sys
 import json
+import math
+import time
 import argparse
+import traceback
+import contextlib
+import concurrent.futures
 
 from utils.class_process import Process
-from utils.class_memory import Memory
+from utils.class_memory import Memory, get_results_dir
+from utils.class_corner import get_corner_memories, get_corner_ppa, get_view_suffixes
+from utils.class_cacti_cache import CactiCache, cacti_identity
+from utils.class_cacti_runner import CactiRunner
+from utils.class_ppa_surface import PpaSurface, PPA_METRICS
 
-from utils.generate_lib import generate_lib
-from utils.generate_lef import generate_lef
+from utils.generate_lib import generate_lib, generate_merged_lib
+from utils.generate_lef import generate_lef, generate_merged_lef
 from utils.generate_verilog import generate_verilog
 from utils.generate_verilog import generate_verilog_bb
+from utils.class_profiler import phase
+from utils.validate import validate_config
+from utils.view_file import check_compression, view_suffix
+from utils.atomic_file import check_locking, macro_lock
+from utils.log import logger, set_level
+from utils.progress import EventStream, EventLogHandler, Progress
+import utils.class_profiler as profiler
+from utils.manifest import get_manifest, is_up_to_date, read_manifest, write_manifest, remove_manifest
 
 ################################################################################
 # RUN GENERATOR
@@ -43,29 +62,417 @@ def get_args() -> argparse.Namespace:
         "--cacti_dir", action="store", help="CACTI installation directory ", required=False, default=None
     )
 
+    parser.add_argument(
+        "--cacti_timeout", action="store", type=float, help="Wall-clock limit in seconds for a single CACTI run, 0 for no limit (default: 1800)", required=False, default=1800
+    )
+
+    parser.add_argument(
+        "--cacti_retries", action="store", type=int, help="Number of times a failed or timed out CACTI run is retried (default: 1)", required=False, default=1
+    )
+
+    parser.add_argument(
+        "--cacti_cache", action="store", help="Directory of a persistent cache of CACTI results (disabled if not given)", required=False, default=None
+    )
+
+    parser.add_argument(
+        "--cacti_cache_size", action="store", type=int, help="Maximum number of entries kept in the CACTI cache (default: 4096)", required=False, default=4096
+    )
+
+    parser.add_argument(
+        "-j", "--jobs", action="store", type=int, help="Number of SRAMs to generate in parallel, 0 uses every core (default: 1)", required=False, default=1
+    )
+
+    parser.add_argument(
+        "--estimate", action="store_true", help="Estimate PPA by interpolating a pre-computed grid of CACTI results instead of running CACTI per SRAM", required=False, default=False
+    )
+
+    parser.add_argument(
+        "--ppa_dir", action="store", help="Directory of the PPA surfaces used by --estimate (default: <output_dir>/ppa_surfaces)", required=False, default=None
+    )
+
+    parser.add_argument(
+        "--force", action="store_true", help="Regenerate every SRAM, even those whose manifest shows they are up to date", required=False, default=False
+    )
+
+    parser.add_argument(
+        "--merged", action="store", help="Also write every SRAM into a single <output_dir>/<MERGED>.lib library and <output_dir>/<MERGED>.lef", required=False, default=None
+    )
+
+    parser.add_argument(
+        "--compress", action="store", choices=['gzip', 'zstd'], help="Stream every view through gzip or zstd as it is written (.lib.gz, .lef.gz, ... or .zst), no uncompressed copy is written", required=False, default=None
+    )
+
+    parser.add_argument(
+        "--profile", action="store", help="Write a report of the wall and CPU time of every phase of every SRAM to this file (CSV if it ends with .csv, JSON otherwise)", required=False, default=None
+    )
+
+    parser.add_argument(
+        "--profile_cprofile", action="store", help="With --profile, also run every phase under cProfile and write the stats to this directory", required=False, default=None
+    )
+
+    parser.add_argument(
+        "--lock", action="store_true", help="Lock every SRAM while it is generated, so several runs can share an output directory (SRAMs another run generated while waiting are skipped)", required=False, default=False
+    )
+
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="Only print warnings and errors", required=False, default=False
+    )
+
+    parser.add_argument(
+        "-v", "--verbose", action="store_true", help="Also print the details of every SRAM (sizes, pin counts, ...)", required=False, default=False
+    )
+
+    parser.add_argument(
+        "--events", action="store", help="Write the progress of the run to this file as JSON lines (one event per line, flushed as it happens)", required=False, default=None
+    )
+
     return parser.parse_args()
 
 
+def get_cacti_dir( args ):
+  return args.cacti_dir if args.cacti_dir else os.environ['CACTI_BUILD_DIR']
+
+
+def get_ppa_estimates( process, srams, args ):
+  """
+  Estimate the PPA numbers of every SRAM from the interpolated PPA surface for
+  its port configuration, cache type and number of banks. Surfaces are built with CACTI the
+  first time they are needed (or when CACTI changes) and saved to the PPA
+  directory. Returns one dict of Memory attributes per SRAM, or None for SRAMs
+  the surface cannot cover (those fall back to running CACTI).
+  """
+  cacti_cache = CactiCache(args.cacti_cache, args.cacti_cache_size) if args.cacti_cache else None
+  cacti_runner = CactiRunner(get_cacti_dir(args), args.cacti_timeout, args.cacti_retries)
+  ppa_dir = args.ppa_dir if args.ppa_dir else get_results_dir('ppa_surfaces', args.output_dir)
+
+  groups = {}
+  for i, sram_data in enumerate(srams):
+    groups.setdefault((str(sram_data.get('ports', '1rw')), str(sram_data.get('type', 'cache')), int(sram_data['banks'])), []).append(i)
+
+  ppas = [None] * len(srams)
+  for (port_config, cache_type, num_banks), indices in groups.items():
+    banks = f'_{num_banks}b' if num_banks != 1 else ''
+    path = os.sep.join([ppa_dir, f'ppa_{process.tech_nm}nm_{port_config}_{cache_type}{banks}.json'])
+    surface = PpaSurface.load(path) if os.path.exists(path) else None
+    if surface is None or surface.cacti_id != cacti_runner.identity:
+      logger.info(f'Building PPA surface {path}')
+      surface = PpaSurface.build(process, port_config, cache_type, cacti_runner, cacti_cache, jobs=max(1, args.jobs if args.jobs > 0 else os.cpu_count()), num_banks=num_banks)
+      surface.save(path)
+    logger.info(f'PPA surface {process.tech_nm}nm {port_config} {cache_type}{banks} interpolation error (max / mean %):')
+    for m, e in surface.error.items():
+      logger.info(f'  {m:28s}: ' + (f'{e["max"]:.2f} / {e["mean"]:.2f}' if e['max'] is not None else 'unknown'))
+
+    estimates = surface.estimate([srams[i]['width'] for i in indices], [srams[i]['depth'] for i in indices])
+    for k, i in enumerate(indices):
+      name = srams[i]['name']
+      if not all(math.isfinite(estimates[m][k]) for m in PPA_METRICS):
+        logger.warning(f'{name} is not covered by the PPA surface, running CACTI instead')
+        continue
+      if estimates['extrapolated'][k]:
+        logger.warning(f'{name} is outside of the PPA surface grid, its numbers are extrapolated')
+      ppas[i] = {m: float(estimates[m][k]) for m in PPA_METRICS}
+      ppas[i]['tech_node_nm'] = surface.tech_node_nm
+      ppas[i]['fo4_ps'] = surface.fo4_ps
+  return ppas
+
+
+def generate_sram( process, sram_data, args, manifest = None, ppa = None ):
+  """
+  Model a single SRAM and write out its lib, lef, v and bb.v views. The
+  manifest (if given) is written once every view has been generated. PPA
+  numbers estimated up front can be given to skip CACTI. With --lock the SRAM
+  is generated while holding its lock. Returns the measured wall time of the
+  whole SRAM, of CACTI (the model) and of the views in seconds.
+  """
+  name = str(sram_data['name'])
+  results_dir = get_results_dir(name, args.output_dir)
+  start = time.perf_counter()
+  with macro_lock(results_dir, name, args.lock):
+    # Another run sharing the results directory may have generated the sram
+    # while this one waited for the lock
+    if args.lock and manifest and not args.force and is_up_to_date(results_dir, manifest):
+      logger.info(f'Up to date: {name} (generated by another run)')
+      return None
+    remove_manifest(results_dir, name)
+
+    cacti_cache = CactiCache(args.cacti_cache, args.cacti_cache_size) if args.cacti_cache else None
+    cacti_runner = None
+    if process.tech_nm != 7: # asap7 is modeled without cacti
+      cacti_runner = CactiRunner(get_cacti_dir(args), args.cacti_timeout, args.cacti_retries)
+    memory = Memory(process, sram_data, args.output_dir, args.cacti_dir, cacti_cache, cacti_runner, ppa)
+    modeled = time.perf_counter()
+    with phase(memory.name, 'lib'):
+      generate_lib(memory, args.compress)
+    with phase(memory.name, 'lef'):
+      generate_lef(memory, args.compress)
+    with phase(memory.name, 'v'):
+      generate_verilog(memory, tmChkExpand=process.vlogTimingChecks, compress=args.compress)
+    with phase(memory.name, 'bb.v'):
+      generate_verilog_bb(memory, args.compress)
+    corners = []
+    if process.corners:
+      corners = generate_corner_libs(process, sram_data, args, memory, cacti_cache, cacti_runner if ppa is None else None)
+
+    if manifest:
+      # The corner numbers are kept as well for --merged
+      if corners:
+        manifest = dict(manifest, corner_ppa=get_corner_ppa(corners))
+      write_manifest(memory.results_dir, dict(manifest, ppa=memory.ppa))
+  end = time.perf_counter()
+  return {'wall_s': end - start, 'cacti_s': modeled - start, 'views_s': end - modeled}
+
+
+def generate_corner_libs( process, sram_data, args, nominal, cacti_cache, cacti_runner ):
+  """
+  Write the liberty file of every operating corner of the process (see
+  get_corner_memories). The CACTI runs and the liberty file of each corner are
+  profiled as phases of their own (cacti_<T>K, lib_<corner>). Returns the
+  (corner, memory) pairs.
+  """
+  corners = get_corner_memories(process, sram_data, nominal, args.output_dir, args.cacti_dir, cacti_cache, cacti_runner)
+  for corner, memory in corners:
+    with phase(nominal.name, f'lib_{corner.name}'):
+      generate_lib(memory, args.compress)
+  return corners
+
+
+def generate_merged_views( process, srams, args ):
+  """
+  Write one liberty library (sharing the lookup table templates) and one LEF
+  with every SRAM in them. The SRAMs are rebuilt from the PPA numbers recorded
+  in their manifests, so SRAMs that were skipped as up to date are not modeled
+  again. Every operating corner of the process gets a merged library of its
+  own (<MERGED>_<corner>.lib).
+  """
+  mems = []
+  corner_mems = {}  ;# memories of each corner, keyed on the corner name
+  for sram_data in srams:
+    name = str(sram_data['name'])
+    manifest = read_manifest(get_results_dir(name, args.output_dir), name)
+    if manifest is None or 'ppa' not in manifest:
+      logger.error(f'{name} has no manifest with PPA numbers, it can not be merged')
+      return 1
+    if process.corners and 'corner_ppa' not in manifest:
+      logger.error(f'{name} has no manifest with the PPA numbers of its corners, it can not be merged (regenerate it with --force)')
+      return 1
+    with contextlib.redirect_stdout(io.StringIO()):
+      mems.append(Memory(process, sram_data, args.output_dir, ppa=manifest['ppa']))
+      if process.corners:
+        for corner, memory in get_corner_memories(process, sram_data, mems[-1], args.output_dir, corner_ppa=manifest['corner_ppa']):
+          corner_mems.setdefault(corner.name, []).append(memory)
+
+  path = get_results_dir(args.merged, args.output_dir)
+  suffix = view_suffix(args.compress)
+  generate_merged_lib(args.merged, mems, path + '.lib', args.compress)
+  generate_merged_lef(mems, path + '.lef', args.compress)
+  for corner_name, cmems in corner_mems.items():
+    generate_merged_lib(f'{args.merged}_{corner_name}', cmems, f'{path}_{corner_name}.lib', args.compress)
+    logger.info(f'Merged {len(cmems)} SRAMs into {path}_{corner_name}.lib{suffix}')
+  logger.info(f'Merged {len(mems)} SRAMs into {path}.lib{suffix} and {path}.lef{suffix}')
+  return 0
+
+
+@contextlib.contextmanager
+def redirect_output( log_path, mode = 'w' ):
+  """
+  Send everything written to stdout/stderr (including the output of child
+  processes such as cacti) to the given log file
+  """
+  sys.stdout.flush()
+  sys.stderr.flush()
+  saved_fds = [os.dup(1), os.dup(2)]
+  with open(log_path, mode) as log:
+    os.dup2(log.fileno(), 1)
+    os.dup2(log.fileno(), 2)
+    try:
+      yield
+    finally:
+      sys.stdout.flush()
+      sys.stderr.flush()
+      os.dup2(saved_fds[0], 1)
+      os.dup2(saved_fds[1], 2)
+      for fd in saved_fds:
+        os.close(fd)
+
+
+def generate_sram_worker( process, sram_data, args, manifest = None, ppa = None ):
+  """
+  Process pool entry point for --jobs. Runs generate_sram with its output sent
+  to <results_dir>/<name>.log (with the debug messages) and returns (log path,
+  success, profile records, times) rather than raising so that one bad SRAM does
+  not take down the rest of the pool.
+  """
+  results_dir = get_results_dir(str(sram_data['name']), args.output_dir)
+  os.makedirs(results_dir, exist_ok=True)
+  log_path = os.sep.join([results_dir, str(sram_data['name']) + '.log'])
+  if args.profile:
+    profiler.start(args.profile_cprofile)
+  set_level('debug')
+  # Warnings of the worker stay in its log, only the parent writes the events
+  for handler in [h for h in logger.handlers if isinstance(h, EventLogHandler)]:
+    logger.removeHandler(handler)
+  ok, times = True, None
+  # Other runs may be logging the same SRAM while they wait for its lock
+  with redirect_output(log_path, 'a' if args.lock else 'w'):
+    try:
+      times = generate_sram(process, sram_data, args, manifest, ppa)
+    except BaseException: # Generators call sys.exit() on errors
+      traceback.print_exc()
+      ok = False
+  worker_profiler = profiler.stop()
+  return log_path, ok, (worker_profiler.records if worker_profiler else []), times
+
+
+def write_profile( args, wall_s ):
+  """
+  Write the --profile report and print the time spent in each phase and the
+  slowest SRAMs
+  """
+  report = profiler.stop().write_report(args.profile, wall_s)
+  logger.info(f'Profile ({args.profile}): {report["wall_s"]:.3f}s wall')
+  for name, t in report['phases'].items():
+    logger.info(f'  {name:20s} {t["wall_s"]:10.3f}s wall {t["cpu_s"]:10.3f}s cpu  ({t["count"]} runs)')
+  logger.info('  Slowest SRAMs:')
+  for t in report['slowest'][:5]:
+    logger.info(f'    {t["macro"]:32s} {t["wall_s"]:10.3f}s wall {t["cpu_s"]:10.3f}s cpu')
+
+
 def main ( args : argparse.Namespace):
 
-  # Load the JSON configuration file
-  with open(args.config, 'r') as fid:
-    raw = [line.strip() for line in fid if not line.strip().startswith('#')]
-  json_data = json.loads('\n'.join(raw))
+  set_level(get_log_level(args))
+  events = EventStream(args.events) if args.events else None
+  if events:
+    logger.addHandler(EventLogHandler(events))
+    events.emit('run_start', config=args.config)
+  start = time.perf_counter()
+  status = 1
+  try:
+    if not args.profile:
+      status = run_generator(args, events)
+      return status
+
+    profiler.start(args.profile_cprofile)
+    try:
+      status = run_generator(args, events)
+      return status
+    finally:
+      write_profile(args, time.perf_counter() - start)
+  finally:
+    if events:
+      events.emit('run_end', ok=status == 0, wall_s=round(time.perf_counter() - start, 3))
+      events.close()
+
+
+def get_log_level( args ):
+  """
+  Level of the messages shown (--quiet or --verbose)
+  """
+  return 'warning' if args.quiet else 'debug' if args.verbose else 'info'
 
-  # Create a process object (shared by all srams)
-  process = Process(json_data)
+
+def run_generator( args, events = None ):
+
+  problem = check_compression(args.compress) or (check_locking() if args.lock else None)
+  if problem:
+    logger.error(problem)
+    return 1
+
+  with phase('', 'config'):
+    # Load the JSON configuration file
+    with open(args.config, 'r') as fid:
+      raw = [line.strip() for line in fid if not line.strip().startswith('#')]
+    json_data = json.loads('\n'.join(raw))
+
+    # Create a process object (shared by all srams)
+    process = Process(json_data)
+
+  # Check every sram before any of them is modeled
+  with phase('', 'validate'):
+    errors, warnings = validate_config(process, json_data['srams'])
+  for warning in warnings:
+    logger.warning(warning)
+  for error in errors:
+    logger.error(error)
+  if errors:
+    logger.error(f'{len(errors)} problem(s) in {args.config}, nothing was generated')
+    return 1
+
+  # Estimate the PPA of every sram up front (asap7 is modeled without cacti)
+  if args.estimate and process.tech_nm != 7:
+    with phase('', 'ppa_estimate'):
+      ppas = get_ppa_estimates(process, json_data['srams'], args)
+  else:
+    ppas = [None] * len(json_data['srams'])
+
+  # Skip every sram whose views were generated from exactly the same inputs
+  try:
+    cacti_id = cacti_identity(get_cacti_dir(args)) if process.tech_nm != 7 else 'none'
+  except OSError as e:
+    logger.error(f'can not read the cacti binary: {e}')
+    return 1
+  srams = []
+  with phase('', 'manifest'):
+    for sram_data, ppa in zip(json_data['srams'], ppas):
+      manifest = get_manifest(process, sram_data, cacti_id, {'ppa': ppa}, get_view_suffixes(process), args.compress)
+      if not args.force and is_up_to_date(get_results_dir(manifest['name'], args.output_dir), manifest):
+        logger.info(f'Up to date: {manifest["name"]} (use --force to regenerate)')
+        if events:
+          events.emit('up_to_date', name=manifest['name'])
+        continue
+      srams.append((sram_data, manifest, ppa))
 
   # Go through each sram and generate the lib, lef and v files
-  for sram_data in json_data['srams']:
-    memory = Memory(process, sram_data, args.output_dir, args.cacti_dir)
-    generate_lib(memory)
-    generate_lef(memory)
-    generate_verilog(memory, tmChkExpand=process.vlogTimingCheckSignalExpansion)
-    generate_verilog_bb(memory)
+  jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+  progress = Progress(len(srams), jobs, events, pool=jobs > 1)
+  if events:
+    events.emit('queued', total=len(srams), jobs=jobs)
+  if jobs == 1:
+    for sram_data, manifest, ppa in srams:
+      name = str(sram_data['name'])
+      progress.start(name)
+      ok, times = False, None
+      try:
+        times = generate_sram(process, sram_data, args, manifest, ppa)
+        ok = True
+      finally:
+        progress.finish(name, ok, times)
+
+  # Fan the srams out across a process pool. Every sram writes into its own
+  # results directory so the outputs do not depend on the order the workers
+  # finish in. Progress is reported as the srams finish and the failures in
+  # configuration order.
+  else:
+    failed = set()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+      futures = {executor.submit(generate_sram_worker, process, sram_data, args, manifest, ppa): str(sram_data['name']) for sram_data, manifest, ppa in srams}
+      for future in concurrent.futures.as_completed(futures):
+        log_path, ok, records, times = future.result()
+        profiler.add_records(records)
+        progress.finish(futures[future], ok, times, log_path)
+        if not ok:
+          failed.add(futures[future])
+
+    if failed:
+      failed = [str(sram_data['name']) for sram_data, _, _ in srams if str(sram_data['name']) in failed]
+      logger.error(f'{len(failed)} of {len(futures)} SRAMs failed: {", ".join(failed)}')
+      return 1
+
+  # Combine every sram into a single library and LEF
+  if args.merged:
+    with phase('', 'merge'):
+      return generate_merged_views(process, json_data['srams'], args)
+  return 0
 
 ### Entry point
 if __name__ == '__main__':
+  # Subcommands: run.py sweep <config> ... (see utils/sweep.py) and
+  # run.py serve ... (see utils/server.py)
+  if sys.argv[1:2] == ['sweep']:
+    import utils.sweep as sweep
+    sys.exit( sweep.main( sweep.get_args(sys.argv[2:]) ) )
+  if sys.argv[1:2] == ['serve']:
+    import utils.server as server
+    sys.exit( server.main( server.get_args(sys.argv[2:]) ) )
   args = get_args()
-  main( args )
+  sys.exit( main( args ) )
 
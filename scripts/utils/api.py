@@ -0,0 +1,100 @@
+import io
+import os
+import contextlib
+
+from utils.class_process import Process
+from utils.class_memory import Memory, MODEL_ATTRIBUTES, get_results_dir
+from utils.class_corner import get_corner_memories
+from utils.class_cacti_runner import CactiRunner, CactiError
+from utils.generate_lib import render_lib
+from utils.generate_lef import render_lef
+from utils.generate_verilog import render_verilog, render_verilog_bb
+from utils.validate import validate_sram
+from utils.atomic_file import write_atomic
+
+################################################################################
+# IN-MEMORY API
+#
+# Library entry point for flows that embed the generator in python. It models
+# one SRAM and returns its .lib, .lef, .v and .bb.v as strings (or bytes)
+# together with the modeled numbers, without creating the results directory or
+# writing anything into it. Writing the views out is a separate, optional step:
+#
+#   import sys; sys.path.append('<bsg_fakeram>/scripts')
+#   from utils.api import generate_views
+#
+#   views = generate_views(process_dict, {'name': 'sram_64x512', 'width': 64, 'depth': 512, 'banks': 1})
+#   views.views['.lib']      ;# liberty text
+#   views.numbers['area_um2']
+#   views.write('results')   ;# optional, writes results/sram_64x512/sram_64x512.{lib,lef,v,bb.v}
+#
+# The liberty file of every operating corner of the process is returned as
+# well, keyed on _<corner name>.lib.
+#
+# Cacti still runs in a private scratch directory (it is a separate program),
+# and its results can be reused across calls with a cacti cache.
+################################################################################
+
+# Numbers of the modeled memory (after the size is snapped to the grid)
+NUMBERS = MODEL_ATTRIBUTES + ['standby_leakage_mW', 'area_um2']
+
+class SramViews:
+
+  def __init__( self, name, views, ppa, numbers, log ):
+
+    self.name    = name
+    self.views   = views    ;# view text (or bytes) keyed on extension: .lib, .lef, .v, .bb.v, _<corner>.lib
+    self.ppa     = ppa      ;# modeled numbers before snapping, can be passed back in as ppa
+    self.numbers = numbers  ;# modeled numbers of the memory (see NUMBERS)
+    self.log     = log      ;# what the generator printed
+
+  # write: write every view into the results directory of the SRAM and return
+  # the path of each view
+  def write( self, output_dir = None ):
+    results_dir = get_results_dir(self.name, output_dir)
+    os.makedirs(results_dir, exist_ok=True)
+    paths = {}
+    for ext, view in self.views.items():
+      paths[ext] = os.sep.join([results_dir, self.name + ext])
+      write_atomic(paths[ext], view)
+    return paths
+
+# generate_views: model one SRAM and render its views. process is a Process or
+# the dict of process fields (the json configuration without "srams"). PPA
+# numbers from an earlier call (SramViews.ppa) skip the model. Raises a
+# ValueError for an invalid SRAM and a RuntimeError if the views can not be
+# generated (cacti failures included). With PPA numbers the corners derate
+# them instead of running cacti. With quiet the output of the generator is
+# captured into the log (this swaps sys.stdout, so threads that share a stdout
+# should pass False).
+def generate_views( process, sram_data, cacti_dir = None, cacti_cache = None, cacti_runner = None, ppa = None,
+                    as_bytes = False, quiet = True ):
+  if not isinstance(process, Process):
+    process = Process(process)
+  errors, _ = validate_sram(process, sram_data)
+  if errors:
+    raise ValueError(f'{sram_data.get("name", "sram")}: ' + '; '.join(errors))
+
+  log = io.StringIO()
+  with (contextlib.redirect_stdout(log) if quiet else contextlib.nullcontext()):
+    try:
+      if cacti_runner is None and ppa is None and process.tech_nm != 7: # asap7 is modeled without cacti
+        cacti_runner = CactiRunner(cacti_dir if cacti_dir else os.environ['CACTI_BUILD_DIR'])
+      memory = Memory(process, sram_data, None, cacti_dir, cacti_cache, cacti_runner, ppa, write_files=False)
+      views = {
+        '.lib'  : render_lib(memory),
+        '.lef'  : render_lef(memory),
+        '.v'    : render_verilog(memory, tmChkExpand=process.vlogTimingChecks),
+        '.bb.v' : render_verilog_bb(memory),
+      }
+      for corner, corner_memory in get_corner_memories(process, sram_data, memory, None, cacti_dir, cacti_cache,
+                                                       cacti_runner if ppa is None else None, write_files=False):
+        views[f'_{corner.name}.lib'] = render_lib(corner_memory)
+    except SystemExit: # Generators call sys.exit() on errors
+      raise RuntimeError(f'generating {sram_data["name"]} failed:\n{log.getvalue()}')
+    except CactiError as e:
+      raise RuntimeError(f'generating {sram_data["name"]} failed: {e}') from e
+
+  if as_bytes:
+    views = {ext: view.encode() for ext, view in views.items()}
+  return SramViews(memory.name, views, memory.ppa, {n: getattr(memory, n) for n in NUMBERS}, log.getvalue())
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import contextlib
+
+try:
+  import fcntl
+except ImportError:
+  fcntl = None
+
+################################################################################
+# ATOMIC FILES
+#
+# Every file under the results directory is written to a temporary file next
+# to it and renamed over the real name once it is complete, so another run,
+# a parallel worker or a downstream tool reading the results tree only ever
+# sees the old file or the whole new one, never a truncated one. A run that
+# fails part way through leaves the previous file in place and no temporary
+# file behind.
+#
+# Runs that share a results tree can also take a lock per macro (a lock file
+# in the results directory of the macro, held with flock) so only one of them
+# generates a given macro at a time. Locking needs fcntl (any POSIX system).
+################################################################################
+
+# atomic_open: open a file for writing that only appears under its name once
+# it is closed without an error. mode is 'w' or 'wb', kwargs go to open().
+@contextlib.contextmanager
+def atomic_open( path, mode = 'w', **kwargs ):
+  directory, base = os.path.split(os.path.abspath(path))
+  fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{base}.', suffix='.tmp')
+  try:
+    with os.fdopen(fd, mode, **kwargs) as fid:
+      yield fid
+    # mkstemp creates the file readable by the owner only, give it the
+    # permissions open() would have
+    os.chmod(tmp_path, 0o666 & ~UMASK)
+    os.replace(tmp_path, path)
+  except BaseException:
+    with contextlib.suppress(OSError):
+      os.remove(tmp_path)
+    raise
+
+# write_atomic: write the whole text (or bytes) of a file atomically
+def write_atomic( path, data ):
+  with atomic_open(path, 'wb' if isinstance(data, bytes) else 'w') as fid:
+    fid.write(data)
+
+# get_umask: the umask of the process (it can only be read by setting it)
+def get_umask():
+  umask = os.umask(0)
+  os.umask(umask)
+  return umask
+
+# Read once at import, setting the umask is not thread safe
+UMASK = get_umask()
+
+# lock_path: lock file of a macro
+def lock_path( results_dir, name ):
+  return os.sep.join([results_dir, name + '.lock'])
+
+# check_locking: error message if macros can not be locked
+def check_locking():
+  if fcntl is None:
+    return 'locking the macros needs fcntl, which this platform does not have'
+  return None
+
+# macro_lock: hold the lock of a macro (blocks while another run holds it).
+# Does nothing unless enabled.
+@contextlib.contextmanager
+def macro_lock( results_dir, name, enabled = True ):
+  if not enabled:
+    yield
+    return
+  os.makedirs(results_dir, exist_ok=True)
+  with open(lock_path(results_dir, name), 'a') as fid:
+    fcntl.flock(fid.fileno(), fcntl.LOCK_EX)
+    try:
+      yield
+    finally:
+      fcntl.flock(fid.fileno(), fcntl.LOCK_UN)
@@ -19,7 +19,7 @@ cacti_config = '''# cacti.cfg
 -exclusive write port {4}
 -technology (u) {5}
 -output/input bus width {6}
--UCA bank count 1
+-UCA bank count {7}
 -Array Power Gating - "false"
 -WL Power Gating - "false"
 -CL Power Gating - "false"
@@ -35,7 +35,7 @@ cacti_config = '''# cacti.cfg
 -Data array peripheral type - "itrs-hp"
 -Tag array cell type - "itrs-lop"
 -Tag array peripheral type - "itrs-hp"
--operating temperature (K) 300
+-operating temperature (K) {9}
 -cache type "{8}"
 -tag size (b) "default"
 -access mode (normal, sequential, fast) - "normal"
@@ -88,3 +88,15 @@ cacti_config = '''# cacti.cfg
 -DIMM model "ALL"
 -mirror_in_bob "F"
 '''
+
+# render_cacti_config: fill in the cacti configuration for a memory of the given
+# size (bytes), word width (bytes), port counts, technology (um), number of
+# banks, cache type and operating temperature (K, cacti only models 300 to 400
+# in steps of 10). Cacti splits the size evenly over the banks and models the
+# interconnect between them, its area and access time cover every bank while
+# the leakage it reports is that of a single bank.
+def render_cacti_config( total_size, width_in_bytes, rw_ports, r_ports, w_ports, tech_um, num_banks, cache_type, temperature_k = 300 ):
+  return cacti_config.format( total_size
+             , width_in_bytes, rw_ports, r_ports, w_ports
+             , tech_um, width_in_bytes*8, num_banks
+             , cache_type, temperature_k )
@@ -0,0 +1,137 @@
+import os
+import json
+import hashlib
+import functools
+import threading
+import collections
+from pathlib import Path
+
+from utils.atomic_file import atomic_open
+
+################################################################################
+# CACTI CACHE CLASS
+#
+# This class stores the results of previous cacti runs on disk so that they can
+# be reused across runs of the generator. Entries are keyed on a hash of the
+# rendered cacti configuration file and the identity of the cacti binary, which
+# means every memory that shares a geometry (no matter what it is named) maps
+# onto the same entry. Each entry holds the csv row that the memory class reads
+# out of cacti.cfg.out. The number of entries is capped and the least recently
+# used entries are evicted first.
+################################################################################
+
+class CactiCache:
+
+  def __init__( self, cache_dir, max_entries = 4096 ):
+
+    self.cache_dir   = str(Path(cache_dir).expanduser().resolve(strict=False))
+    self.max_entries = int(max_entries)
+    os.makedirs( self.cache_dir, exist_ok=True )
+
+  # get: return the cached csv row (list of strings) for the given cacti
+  # configuration, or None on a miss.
+  def get( self, cfg_text, cacti_id ):
+    path = self.__entry_path( cfg_text, cacti_id )
+    try:
+      with open(path, 'r') as fid:
+        entry = json.load(fid)
+    except (OSError, ValueError):
+      return None
+    # Bump the modification time, this is what the LRU eviction sorts on
+    try:
+      os.utime(path)
+    except OSError:
+      pass
+    return entry['row']
+
+  # put: store the csv row for the given cacti configuration. The entry is
+  # written atomically so that concurrent generators never see a partially
+  # written entry.
+  def put( self, cfg_text, cacti_id, row ):
+    path = self.__entry_path( cfg_text, cacti_id )
+    with atomic_open(path) as fid:
+      json.dump({'cacti': cacti_id, 'row': list(row)}, fid)
+    self.__evict()
+
+  def __entry_path( self, cfg_text, cacti_id ):
+    key = hashlib.sha256('\0'.join([cacti_id, cfg_text]).encode()).hexdigest()
+    return os.sep.join([self.cache_dir, key + '.json'])
+
+  # __evict: remove the least recently used entries until we are back under the
+  # size cap. Other generators may be evicting at the same time so entries that
+  # have already disappeared are ignored.
+  def __evict( self ):
+    entries = []
+    for entry in os.scandir(self.cache_dir):
+      if not entry.name.endswith('.json'):
+        continue
+      try:
+        entries.append((entry.stat().st_mtime, entry.path))
+      except FileNotFoundError:
+        pass
+    if len(entries) <= self.max_entries:
+      return
+    entries.sort()
+    for _, path in entries[:len(entries) - self.max_entries]:
+      try:
+        os.remove(path)
+      except FileNotFoundError:
+        pass
+
+# In-memory cache of cacti results for long running generators (see
+# utils/server.py), shared by every thread. The least recently used entries
+# are dropped past max_entries. Misses fall through to an optional on-disk
+# CactiCache and new results are written through to it.
+class CactiMemoryCache:
+
+  def __init__( self, max_entries = 4096, backing = None ):
+
+    self.max_entries = int(max_entries)
+    self.backing     = backing
+    self.entries     = collections.OrderedDict()
+    self.hits        = 0
+    self.misses      = 0
+    self.lock        = threading.Lock()
+
+  def get( self, cfg_text, cacti_id ):
+    key = (cacti_id, cfg_text)
+    with self.lock:
+      if key in self.entries:
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return list(self.entries[key])
+    row = self.backing.get(cfg_text, cacti_id) if self.backing else None
+    with self.lock:
+      if row is None:
+        self.misses += 1
+      else:
+        self.hits += 1
+        self.__store(key, row)
+    return row
+
+  def put( self, cfg_text, cacti_id, row ):
+    with self.lock:
+      self.__store((cacti_id, cfg_text), row)
+    if self.backing:
+      self.backing.put(cfg_text, cacti_id, row)
+
+  def clear( self ):
+    with self.lock:
+      self.entries.clear()
+
+  def __store( self, key, row ):
+    self.entries[key] = list(row)
+    self.entries.move_to_end(key)
+    while len(self.entries) > self.max_entries:
+      self.entries.popitem(last=False)
+
+# cacti_identity: a string that identifies the cacti binary in the given build
+# directory. Any rebuild of cacti (eg. a new patch) changes the identity and
+# therefore invalidates every cache entry made with the old binary.
+@functools.lru_cache(maxsize=None)
+def cacti_identity( cacti_dir ):
+  h = hashlib.sha256()
+  with open(os.sep.join([cacti_dir, 'cacti']), 'rb') as fid:
+    for chunk in iter(lambda: fid.read(1 << 20), b''):
+      h.update(chunk)
+  return 'cacti-' + h.hexdigest()
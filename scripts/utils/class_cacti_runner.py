@@ -0,0 +1,85 @@
+import os
+import tempfile
+import subprocess
+from utils.class_cacti_cache import cacti_identity
+
+################################################################################
+# CACTI RUNNER CLASS
+#
+# This class launches cacti for a rendered configuration file. Every run gets a
+# private scratch directory for its configuration and csv output and cacti is
+# started with its own working directory (it looks for its technology files
+# relative to it), so the generator never has to chdir and any number of runs
+# can happen side by side in one process. Runs are killed if they take longer
+# than the wall-clock timeout and are retried a configurable number of times.
+################################################################################
+
+class CactiError(Exception):
+  pass
+
+class CactiResult:
+
+  def __init__( self, row, csv_text, log_text ):
+    self.row      = row       ;# last csv row, the numbers the memory class reads
+    self.csv_text = csv_text  ;# full contents of cacti.cfg.out
+    self.log_text = log_text  ;# captured stdout/stderr of every attempt
+
+class CactiRunner:
+
+  def __init__( self, cacti_dir, timeout_s = None, retries = 0 ):
+
+    self.cacti_dir = os.path.abspath(str(cacti_dir))  ;# cacti also runs from it, so it must not be relative
+    self.timeout_s = float(timeout_s) if timeout_s else None
+    self.retries   = int(retries)
+
+  @property
+  def identity( self ):
+    return cacti_identity(self.cacti_dir)
+
+  # run: run cacti on the given configuration text and return a CactiResult.
+  # Raises CactiError if every attempt times out, fails, can not start cacti or
+  # produces no output.
+  def run( self, cfg_text ):
+    log = []
+    for attempt in range(1, self.retries + 2):
+      with tempfile.TemporaryDirectory(prefix='cacti_') as run_dir:
+        cfg_path = os.sep.join([run_dir, 'cacti.cfg'])
+        with open(cfg_path, 'w') as fid:
+          fid.write(cfg_text)
+        cmd = [os.sep.join([self.cacti_dir, 'cacti']), '-infile', cfg_path]
+        log.append(f'### attempt {attempt}: {" ".join(cmd)}\n')
+        try:
+          proc = subprocess.run(cmd, cwd=self.cacti_dir, timeout=self.timeout_s,
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                stdin=subprocess.DEVNULL, text=True, errors='replace')
+        except subprocess.TimeoutExpired as e:
+          log.append(self.__to_text(e.stdout))
+          log.append(f'### attempt {attempt}: timed out after {self.timeout_s}s\n')
+          continue
+        except OSError as e: # missing or not executable
+          log.append(f'### attempt {attempt}: could not start cacti: {e}\n')
+          continue
+        log.append(proc.stdout)
+        if proc.returncode != 0:
+          log.append(f'### attempt {attempt}: cacti exited with {proc.returncode}\n')
+          continue
+        try:
+          with open(cfg_path + '.out', 'r') as fid:
+            csv_text = fid.read()
+        except OSError:
+          log.append(f'### attempt {attempt}: cacti did not write {cfg_path}.out\n')
+          continue
+        lines = csv_text.splitlines(keepends=True)
+        if len(lines) < 2:
+          log.append(f'### attempt {attempt}: no results in {cfg_path}.out\n')
+          continue
+        return CactiResult(lines[-1].split(','), csv_text, ''.join(log))
+
+    log_text = ''.join(log)
+    raise CactiError(f'cacti failed after {self.retries + 1} attempt(s):\n{log_text[-4000:]}')
+
+  @staticmethod
+  def __to_text( output ):
+    if output is None:
+      return ''
+    return output.decode(errors='replace') if isinstance(output, bytes) else output
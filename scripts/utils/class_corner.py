@@ -0,0 +1,131 @@
+import math
+import concurrent.futures
+
+from utils.class_memory import Memory
+
+################################################################################
+# CORNER CLASS
+#
+# This class stores one of the operating corners listed in the "corners"
+# section of the json configuration file, eg.
+#
+#   "corners": [
+#     {"process": "ss", "voltage": 0.99, "temperature": 125},
+#     {"process": "tt", "voltage": 1.1,  "temperature": 25},
+#     {"process": "ff", "voltage": 1.21, "temperature": -40, "name": "ff_fast_cold"}
+#   ]
+#
+# Every corner gets its own liberty file (<sram>_<corner name>.lib). Cacti is
+# run at the temperature of the corner (cacti only models 300K to 400K in steps
+# of 10K, so temperatures are rounded and clamped to that, and corners that end
+# up at the same temperature share a cacti run). Cacti has no notion of
+# process corners or supply voltage, so those are applied on top of the cacti
+# numbers with a simple derating model: a fixed factor per process corner and
+# first order voltage scaling (delay ~ 1/V, dynamic power ~ V^2, leakage ~ V).
+################################################################################
+
+# Arbitrary derating of each process corner. Corners can override any of these
+# with "delay_derate", "dynamic_derate" or "leakage_derate".
+PROCESS_DERATE = {
+  'ss' : {'delay': 1.15, 'dynamic': 0.95, 'leakage': 0.5},
+  'tt' : {'delay': 1.00, 'dynamic': 1.00, 'leakage': 1.0},
+  'ff' : {'delay': 0.87, 'dynamic': 1.05, 'leakage': 2.5},
+}
+
+# Memory attributes scaled by each kind of derating
+DERATED_ATTRIBUTES = {
+  'delay'   : ['access_time_ns', 'cycle_time_ns', 'fo4_ps'],
+  'dynamic' : ['pin_dynamic_power_mW'],
+  'leakage' : ['standby_leakage_per_bank_mW'],
+}
+
+CACTI_MIN_TEMPERATURE_K = 300
+CACTI_MAX_TEMPERATURE_K = 400
+
+class Corner:
+
+  def __init__( self, corner_data, process ):
+
+    self.process_corner = str(corner_data.get('process', 'tt'))
+    self.voltage        = float(corner_data.get('voltage', process.voltage))
+    self.temperature_c  = float(corner_data.get('temperature', 25))
+    self.name           = str(corner_data['name']) if 'name' in corner_data else f'{self.process_corner}_{self.voltage}_{self.temperature_c}'
+
+    defaults = PROCESS_DERATE.get(self.process_corner, PROCESS_DERATE['tt'])
+    v_ratio = self.voltage / float(process.voltage)
+    self.derate = {
+      'delay'   : float(corner_data.get('delay_derate',   defaults['delay']))   / v_ratio,
+      'dynamic' : float(corner_data.get('dynamic_derate', defaults['dynamic'])) * v_ratio**2,
+      'leakage' : float(corner_data.get('leakage_derate', defaults['leakage'])) * v_ratio,
+    }
+
+    # Closest temperature cacti can model
+    kelvin = 10 * round((self.temperature_c + 273.15) / 10)
+    self.cacti_temperature_k = min(max(kelvin, CACTI_MIN_TEMPERATURE_K), CACTI_MAX_TEMPERATURE_K)
+
+  # apply: derate the modeled numbers of a memory for this corner
+  def apply( self, mem ):
+    for kind, attributes in DERATED_ATTRIBUTES.items():
+      for a in attributes:
+        setattr(mem, a, getattr(mem, a) * self.derate[kind])
+
+# get_corners: corner objects of every corner of the process
+def get_corners( process ):
+  return [Corner(c, process) for c in process.corners]
+
+# get_view_suffixes: suffixes of the views written on top of the .lib, .lef, .v
+# and .bb.v (the liberty file of every corner)
+def get_view_suffixes( process ):
+  return [f'_{corner.name}.lib' for corner in get_corners(process)]
+
+# get_corner_memories: (corner, memory) of every corner of the process, given
+# the nominal memory. Cacti runs once per corner temperature, in parallel
+# threads, and the nominal memory already covers 300K. Corners at the same
+# temperature share a run. Without a cacti runner (asap7 or estimated PPA)
+# every corner derates the nominal numbers. corner_ppa holds the PPA numbers of
+# the corner temperatures from an earlier run (see get_corner_ppa), these
+# temperatures do not run cacti again.
+def get_corner_memories( process, sram_data, nominal, output_dir = None, cacti_dir = None, cacti_cache = None,
+                         cacti_runner = None, write_files = True, corner_ppa = None ):
+  corners = get_corners(process)
+  ppas = {300: nominal.ppa}
+  ppas.update({int(t): ppa for t, ppa in (corner_ppa or {}).items()})
+  if cacti_runner:
+    temperatures = sorted(set(c.cacti_temperature_k for c in corners) - set(ppas))
+    first = {c.cacti_temperature_k: c for c in reversed(corners)}
+    def run_corner( temperature ):
+      return Memory(process, sram_data, output_dir, cacti_dir, cacti_cache, cacti_runner,
+                    write_files=write_files, corner=first[temperature]).ppa
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(temperatures))) as executor:
+      ppas.update(zip(temperatures, executor.map(run_corner, temperatures)))
+  return [(corner, Memory(process, sram_data, output_dir, ppa=ppas.get(corner.cacti_temperature_k, nominal.ppa),
+                          write_files=write_files, corner=corner))
+          for corner in corners]
+
+# get_corner_ppa: PPA numbers of the memories of get_corner_memories keyed on
+# their cacti temperature, as stored in the manifest
+def get_corner_ppa( corner_memories ):
+  return {str(corner.cacti_temperature_k): memory.ppa for corner, memory in corner_memories}
+
+# validate_corners: list of problems with the corners section of a process
+def validate_corners( process ):
+  errors = []
+  names = set()
+  for i, corner_data in enumerate(process.corners):
+    where = f'corners[{i}]'
+    if not isinstance(corner_data, dict):
+      errors.append(f'{where}: is not an object')
+      continue
+    if str(corner_data.get('process', 'tt')) not in PROCESS_DERATE and not all(f'{k}_derate' in corner_data for k in DERATED_ATTRIBUTES):
+      errors.append(f'{where}: process {corner_data["process"]!r} is not one of {", ".join(PROCESS_DERATE)} (or give delay_derate, dynamic_derate and leakage_derate)')
+    try:
+      corner = Corner(corner_data, process)
+    except (TypeError, ValueError, ZeroDivisionError) as e:
+      errors.append(f'{where}: {e}')
+      continue
+    if not corner.voltage > 0 or not all(math.isfinite(d) and d > 0 for d in corner.derate.values()):
+      errors.append(f'{where}: voltage and derating factors must be positive')
+    if corner.name in names:
+      errors.append(f'{where}: the corner name {corner.name} is used more than once')
+    names.add(corner.name)
+  return errors
@@ -3,8 +3,26 @@ import re
 import os
 import sys
 from pathlib import Path
-from utils.cacti_config import cacti_config
+from utils.cacti_config import render_cacti_config
+from utils.class_cacti_runner import CactiRunner
 from utils.area import get_macro_dimensions
+from utils.class_profiler import phase
+from utils.atomic_file import write_atomic
+from utils.log import logger
+
+# Attributes that come from the PPA model (cacti, a PPA surface or the asap7
+# constants). A dict of these can be passed as ppa to skip the model.
+MODEL_ATTRIBUTES = [
+  'tech_node_nm',
+  'access_time_ns',
+  'cycle_time_ns',
+  'pin_dynamic_power_mW',
+  'standby_leakage_per_bank_mW',
+  'fo4_ps',
+  'width_um',
+  'height_um',
+]
+
 ################################################################################
 # MEMORY CLASS
 #
@@ -16,9 +34,10 @@ from utils.area import get_macro_dimensions
 
 class Memory:
 
-  def __init__( self, process, sram_data , output_dir = None, cacti_dir = None):
+  def __init__( self, process, sram_data , output_dir = None, cacti_dir = None, cacti_cache = None, cacti_runner = None, ppa = None, write_files = True, corner = None):
 
     self.process        = process
+    self.corner         = corner ;# operating corner (see class_corner.py), None for the nominal memory
     self.name           = str(sram_data['name'])
     self.width_in_bits  = int(sram_data['width'])
     self.depth          = int(sram_data['depth'])
@@ -29,30 +48,7 @@ class Memory:
     self.port_config    = str(sram_data.get('ports', '1rw'))
     
     # Handle different port configurations
-    if self.port_config == '1rw1r':
-      self.rw_ports = 1
-      self.r_ports = 1
-      self.w_ports = 0
-    elif self.port_config == '1r1rw':
-      self.rw_ports = 1
-      self.r_ports = 1
-      self.w_ports = 0
-    elif self.port_config == '1r1w':
-      self.rw_ports = 0
-      self.r_ports = 1
-      self.w_ports = 1
-    elif self.port_config == '2r1w':
-      self.rw_ports = 0
-      self.r_ports = 2
-      self.w_ports = 1
-    elif self.port_config == '1rw1r':
-      self.rw_ports = 1
-      self.r_ports = 1
-      self.w_ports = 0
-    else: # 1rw
-      self.rw_ports = 1
-      self.r_ports = 0
-      self.w_ports = 0
+    self.rw_ports, self.r_ports, self.w_ports = get_port_counts(self.port_config)
     
     # Write granularity (default to bit-level if not specified)
     self.write_granularity = int(sram_data.get('write_granularity', 1))
@@ -61,21 +57,33 @@ class Memory:
     # Options: 'write_first' (write-through), 'read_first' (no-change), 'write_through' (combinational)
     self.write_mode    = str(sram_data.get('write_mode', 'write_first'))
 
+    # Storage model of the verilog view (defaults to the process wide setting)
+    # Options: 'dense' (verilog array), 'sparse' (associative array of the written words)
+    self.vlog_model    = str(sram_data.get('vlog_model', process.vlogModel))
+    self.vlog_preload  = bool(sram_data.get('vlog_preload', process.vlogPreload))
+
     # clk_ct array contains the amount of clks for rw, r, and w ports respectively
-    self.port_clks = [ list(map(int, re.findall(r'-?\d+', clk_grp))) for clk_grp in re.findall(r'\[[^\]]*\]|(?<=,)\s*(?=,|$)|^\s*(?=,|$)', 
-                        sram_data.get('port_clks', '[1], [0], [0]').strip())]
-    print(self.port_clks)
+    self.port_clks = get_port_clks(sram_data.get('port_clks', '[1], [0], [0]'))
     self.width_in_bytes = math.ceil(self.width_in_bits / 8.0)
     self.total_size     = self.width_in_bytes * self.depth
-    if output_dir: # Output dir was set by command line option
-      p = str(Path(output_dir).expanduser().resolve(strict=False))
-      self.results_dir = os.sep.join([p, self.name])
-    else:
-      self.results_dir = os.sep.join([os.getcwd(), 'results', self.name])
-    if not os.path.exists( self.results_dir ):
-      os.makedirs( self.results_dir )
+    self.results_dir = get_results_dir(self.name, output_dir)
+    self.write_files = write_files ;# false to keep the cacti files out of the results directory (and not create it)
+    if write_files:
+      os.makedirs( self.results_dir, exist_ok=True ) ;# another run may create it at the same time
   
-    if (process.tech_nm == 7):
+    if ppa:
+      # PPA numbers were estimated up front (eg. from an interpolated PPA
+      # surface) so there is no need to run cacti
+      self.tech_node_nm                = int(ppa['tech_node_nm'])
+      self.associativity               = 1
+      self.access_time_ns              = float(ppa['access_time_ns'])
+      self.cycle_time_ns               = float(ppa['cycle_time_ns'])
+      self.pin_dynamic_power_mW        = float(ppa['pin_dynamic_power_mW'])
+      self.standby_leakage_per_bank_mW = float(ppa['standby_leakage_per_bank_mW'])
+      self.fo4_ps                      = float(ppa['fo4_ps'])
+      self.width_um                    = float(ppa['width_um'])
+      self.height_um                   = float(ppa['height_um'])
+    elif (process.tech_nm == 7):
       self.tech_node_nm                = 7 
       self.associativity               = 1 
       self.access_time_ns = 0.2183
@@ -85,33 +93,43 @@ class Memory:
       self.height_um, self.width_um    = get_macro_dimensions(process, sram_data)
       self.pin_dynamic_power_mW = 0.0013449
     else: 
-      if cacti_dir:
-        self.cacti_dir = cacti_dir
+      if cacti_runner:
+        self.cacti_runner = cacti_runner
       else:
-        self.cacti_dir = os.environ['CACTI_BUILD_DIR']
-      self.__run_cacti()
-      with open( os.sep.join([self.results_dir, 'cacti.cfg.out']), 'r' ) as fid:
-        lines = [line for line in fid]
-      cacti_data = lines[-1].split(',')
-      self.tech_node_nm                = int(cacti_data[0])
-      self.capacity_bytes              = int(cacti_data[1])
-      self.associativity               = int(cacti_data[2])
-      self.access_time_ns              = float(cacti_data[4])
-      self.cycle_time_ns               = float(cacti_data[5])
-      self.pin_dynamic_power_mW        = float(cacti_data[8])
-      self.standby_leakage_per_bank_mW = float(cacti_data[9])
-      self.fo4_ps                      = float(cacti_data[11])
-      self.width_um                    = float(cacti_data[12])
-      self.height_um                   = float(cacti_data[13])
+        self.cacti_runner = CactiRunner(cacti_dir if cacti_dir else os.environ['CACTI_BUILD_DIR'])
+      self.cacti_cache = cacti_cache
+      # Corners get phases of their own (eg. cacti_400K)
+      suffix = f'_{self.corner.cacti_temperature_k}K' if self.corner else ''
+      with phase(self.name, 'cacti' + suffix):
+        cacti_data = self.__run_cacti()
+      with phase(self.name, 'csv_parse' + suffix):
+        self.tech_node_nm                = int(cacti_data[0])
+        self.capacity_bytes              = int(cacti_data[1])
+        self.associativity               = int(cacti_data[2])
+        self.access_time_ns              = float(cacti_data[4])
+        self.cycle_time_ns               = float(cacti_data[5])
+        self.pin_dynamic_power_mW        = float(cacti_data[8])
+        self.standby_leakage_per_bank_mW = float(cacti_data[9])
+        self.fo4_ps                      = float(cacti_data[11])
+        self.width_um                    = float(cacti_data[12])
+        self.height_um                   = float(cacti_data[13])
       
     
+    # Keep the modeled numbers (before snapping) so the memory can be rebuilt
+    # later without running cacti again
+    self.ppa = {a: getattr(self, a) for a in MODEL_ATTRIBUTES}
+
+    if self.corner:
+      self.corner.apply(self)
+
+    # Leakage of the whole memory, cacti reports it per bank
+    self.standby_leakage_mW = self.standby_leakage_per_bank_mW * self.num_banks
+
     self.cap_input_pf = 0.005
 
     self.tech_node_um = self.tech_node_nm / 1000.0
 
-    print(f'Original {self.name} size = {self.width_um} x {self.height_um}')
-    print(f'Port configuration: {self.port_config}')
-    print(f'Write granularity: {self.write_granularity} bits')
+    logger.debug(f'{self.name}: cacti size {self.width_um} x {self.height_um} um, ports {self.port_config}, port clocks {self.port_clks}, write granularity {self.write_granularity} bits')
     
     # Adjust to snap
     self.width_um = (math.ceil((self.width_um*1000.0)/self.process.snapWidth_nm)*self.process.snapWidth_nm)/1000.0
@@ -126,22 +144,64 @@ class Memory:
 
   # __run_cacti: shell out to cacti to generate a csv file with more data
   # regarding this memory based on the input parameters from the json
-  # configuration file.
+  # configuration file. Returns the csv row of cacti results (served from the
+  # cacti cache instead when one is given and it has already seen this exact
+  # configuration). The cacti output and log are copied into the results
+  # directory for reference.
   def __run_cacti( self ):
     # For different port configurations, configure CACTI appropriately
     rw_ports = self.rw_ports
     r_ports = self.r_ports if hasattr(self, 'r_ports') else 0
     w_ports = self.w_ports if hasattr(self, 'w_ports') else 0
     
-    fid = open(os.sep.join([self.results_dir,'cacti.cfg']), 'w')
-    fid.write( cacti_config.format( self.total_size
+    cfg_text = render_cacti_config( self.total_size
              , self.width_in_bytes, rw_ports, r_ports, w_ports
-             , self.process.tech_um, self.width_in_bytes*8, self.num_banks
-             , self.cache_type ))
-    fid.close()
-    odir = os.getcwd()
-    os.chdir(self.cacti_dir )
-    cmd = os.sep.join(['.','cacti -infile ']) + os.sep.join([self.results_dir,'cacti.cfg'])
-    os.system( cmd)
-    os.chdir(odir)
+             , self.process.tech_um, self.num_banks, self.cache_type
+             , self.corner.cacti_temperature_k if self.corner else 300 )
+    # Corners run cacti at their own temperature, keep their files apart
+    prefix = f'cacti_{self.corner.cacti_temperature_k}K' if self.corner else 'cacti'
+    if self.write_files:
+      write_atomic(os.sep.join([self.results_dir, prefix + '.cfg']), cfg_text)
+
+    if self.cacti_cache:
+      cacti_id = self.cacti_runner.identity
+      cacti_data = self.cacti_cache.get(cfg_text, cacti_id)
+      if cacti_data is not None:
+        logger.debug(f'Using cached cacti results for {self.name}')
+        return cacti_data
+
+    result = self.cacti_runner.run(cfg_text)
+    if self.write_files:
+      write_atomic(os.sep.join([self.results_dir, prefix + '.cfg.out']), result.csv_text)
+      write_atomic(os.sep.join([self.results_dir, prefix + '.log']), result.log_text)
+    cacti_data = result.row
+
+    if self.cacti_cache:
+      self.cacti_cache.put(cfg_text, cacti_id, cacti_data)
+    return cacti_data
+
+# get_port_counts: number of read-write, read and write ports for a port
+# configuration string (anything unknown is treated as 1rw).
+def get_port_counts( port_config ):
+  if port_config == '1rw1r' or port_config == '1r1rw':
+    return 1, 1, 0
+  elif port_config == '1r1w':
+    return 0, 1, 1
+  elif port_config == '2r1w':
+    return 0, 2, 1
+  else: # 1rw
+    return 1, 0, 0
+
+# get_port_clks: clocks of the rw, r and w ports (one list each) from a
+# port_clks string such as "[0], [1], []" (empty groups may be left out
+# entirely, eg. "[0],,").
+def get_port_clks( text ):
+  return [ list(map(int, re.findall(r'-?\d+', clk_grp))) for clk_grp in re.findall(r'\[[^\]]*\]|(?<=,)\s*(?=,|$)|^\s*(?=,|$)', text.strip())]
 
+# get_results_dir: directory that holds all of the generated views (and cacti
+# intermediate files) for the memory with the given name.
+def get_results_dir( name, output_dir = None ):
+  if output_dir: # Output dir was set by command line option
+    p = str(Path(output_dir).expanduser().resolve(strict=False))
+    return os.sep.join([p, name])
+  return os.sep.join([os.getcwd(), 'results', name])
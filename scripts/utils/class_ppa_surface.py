@@ -0,0 +1,183 @@
+import os
+import json
+import hashlib
+import concurrent.futures
+import numpy as np
+from utils.cacti_config import render_cacti_config
+from utils.class_memory import get_port_counts
+from utils.class_cacti_runner import CactiError
+from utils.atomic_file import atomic_open
+from utils.log import logger
+
+################################################################################
+# PPA SURFACE CLASS
+#
+# This class stores a grid of cacti results for one technology node, port
+# configuration, cache type and number of banks, indexed by log2 of the word width (in bytes)
+# and log2 of the depth. Estimates for any width/depth are interpolated
+# bilinearly in log space (cacti numbers scale roughly as power laws of the
+# memory size) for whole arrays of memories at a time, which is orders of
+# magnitude faster than running cacti for every memory. The error bound of
+# each metric is measured with a leave-one-out test on the grid itself.
+################################################################################
+
+# Memory attributes filled in from the surface and the cacti csv column of each
+PPA_METRICS = {
+  'access_time_ns'              : 4,
+  'cycle_time_ns'               : 5,
+  'pin_dynamic_power_mW'        : 8,
+  'standby_leakage_per_bank_mW' : 9,
+  'width_um'                    : 12,
+  'height_um'                   : 13,
+}
+
+# Default grid: 8 to 1024 bit words and 16 to 64K words
+DEFAULT_LOG2_WIDTH_BYTES = list(range(0, 8))
+DEFAULT_LOG2_DEPTH       = list(range(4, 17))
+
+class PpaSurface:
+
+  def __init__( self, tech_nm, port_config, cache_type, log2_width_bytes, log2_depth, metrics, tech_node_nm, fo4_ps, cacti_id, num_banks = 1 ):
+
+    self.tech_nm          = int(tech_nm)
+    self.port_config      = str(port_config)
+    self.cache_type       = str(cache_type)
+    self.log2_width_bytes = np.asarray(log2_width_bytes, dtype=float)
+    self.log2_depth       = np.asarray(log2_depth, dtype=float)
+    self.metrics          = {m: np.asarray(metrics[m], dtype=float) for m in PPA_METRICS}
+    self.tech_node_nm     = int(tech_node_nm)
+    self.fo4_ps           = float(fo4_ps)
+    self.cacti_id         = str(cacti_id)
+    self.num_banks        = int(num_banks)
+
+    # Interpolation happens on log2 of the values. Grid points where cacti
+    # failed are NaN and poison every estimate that touches them.
+    with np.errstate(divide='ignore', invalid='ignore'):
+      self.log2_metrics = {m: np.log2(v) for m, v in self.metrics.items()}
+    self.error = self.__leave_one_out_error()
+
+  # build: run cacti over the whole grid (in parallel threads) and create the
+  # surface. Results go through the cacti cache when one is given.
+  @classmethod
+  def build( cls, process, port_config, cache_type, cacti_runner, cacti_cache = None,
+             log2_width_bytes = DEFAULT_LOG2_WIDTH_BYTES, log2_depth = DEFAULT_LOG2_DEPTH, jobs = 8, num_banks = 1 ):
+
+    rw_ports, r_ports, w_ports = get_port_counts(port_config)
+    cacti_id = cacti_runner.identity
+
+    def run_point( point ):
+      width_in_bytes, depth = 2**point[0], 2**point[1]
+      cfg_text = render_cacti_config( width_in_bytes*depth, width_in_bytes, rw_ports, r_ports, w_ports
+                                    , process.tech_um, num_banks, cache_type )
+      row = cacti_cache.get(cfg_text, cacti_id) if cacti_cache else None
+      if row is None:
+        try:
+          row = cacti_runner.run(cfg_text).row
+        except CactiError:
+          logger.warning(f'cacti failed for {width_in_bytes*8}x{depth} {port_config}, leaving a hole in the surface')
+          return None
+        if cacti_cache:
+          cacti_cache.put(cfg_text, cacti_id, row)
+      return row
+
+    points = [(x, y) for x in log2_width_bytes for y in log2_depth]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+      rows = list(executor.map(run_point, points))
+
+    shape = (len(log2_width_bytes), len(log2_depth))
+    metrics = {m: np.full(shape, np.nan) for m in PPA_METRICS}
+    tech_node_nm, fo4_ps = [], []
+    for (ix, iy), row in zip(np.ndindex(*shape), rows):
+      if row is None:
+        continue
+      for m, col in PPA_METRICS.items():
+        metrics[m][ix, iy] = float(row[col])
+      tech_node_nm.append(int(row[0]))
+      fo4_ps.append(float(row[11]))
+    if not fo4_ps:
+      raise CactiError(f'cacti failed for every point of the {process.tech_nm}nm {port_config} PPA surface')
+
+    return cls( process.tech_nm, port_config, cache_type, log2_width_bytes, log2_depth, metrics
+              , tech_node_nm[0], np.mean(fo4_ps), cacti_id, num_banks )
+
+  @classmethod
+  def load( cls, path ):
+    with open(path, 'r') as fid:
+      data = json.load(fid)
+    return cls( data['tech_nm'], data['port_config'], data['cache_type'], data['log2_width_bytes']
+              , data['log2_depth'], data['metrics'], data['tech_node_nm'], data['fo4_ps'], data['cacti']
+              , data.get('num_banks', 1) )
+
+  def save( self, path ):
+    data = {
+      'tech_nm'          : self.tech_nm,
+      'port_config'      : self.port_config,
+      'cache_type'       : self.cache_type,
+      'log2_width_bytes' : self.log2_width_bytes.tolist(),
+      'log2_depth'       : self.log2_depth.tolist(),
+      'metrics'          : {m: v.tolist() for m, v in self.metrics.items()},
+      'tech_node_nm'     : self.tech_node_nm,
+      'fo4_ps'           : self.fo4_ps,
+      'cacti'            : self.cacti_id,
+      'num_banks'        : self.num_banks,
+      'error_pct'        : self.error,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with atomic_open(path) as fid:
+      json.dump(data, fid)
+
+  # identity: hash of the surface contents, changes whenever it is rebuilt
+  @property
+  def identity( self ):
+    h = hashlib.sha256(self.cacti_id.encode())
+    for m in PPA_METRICS:
+      h.update(self.metrics[m].tobytes())
+    return h.hexdigest()
+
+  # estimate: interpolate every metric for arrays of widths (bits) and depths.
+  # Returns a dict of arrays (one entry per memory) with the same attribute
+  # names as the memory class, plus an 'extrapolated' mask for memories that
+  # fall outside of the grid.
+  def estimate( self, width_in_bits, depth ):
+    x = np.log2(np.ceil(np.asarray(width_in_bits, dtype=float) / 8.0))
+    y = np.log2(np.asarray(depth, dtype=float))
+    ix, tx = self.__cell(self.log2_width_bytes, x)
+    iy, ty = self.__cell(self.log2_depth, y)
+
+    result = {}
+    for m, z in self.log2_metrics.items():
+      v = ( (1-tx)*(1-ty)*z[ix, iy]   + tx*(1-ty)*z[ix+1, iy]
+          + (1-tx)*ty    *z[ix, iy+1] + tx*ty    *z[ix+1, iy+1] )
+      result[m] = np.exp2(v)
+    result['extrapolated'] = ( (x < self.log2_width_bytes[0]) | (x > self.log2_width_bytes[-1])
+                             | (y < self.log2_depth[0])       | (y > self.log2_depth[-1]) )
+    return result
+
+  # __cell: index of the grid cell each value falls in and the fractional
+  # position inside it (outside of the grid the edge cells are extended).
+  @staticmethod
+  def __cell( axis, values ):
+    i = np.clip(np.searchsorted(axis, values, side='right') - 1, 0, len(axis) - 2)
+    t = (values - axis[i]) / (axis[i+1] - axis[i])
+    return i, t
+
+  # __leave_one_out_error: for every interior grid point, interpolate it from
+  # its neighbours with the point itself left out and compare against the real
+  # cacti result. The held out spacing is twice the real grid spacing so this
+  # is a conservative bound on the interpolation error. Returns the max and mean
+  # relative error (in percent) of each metric.
+  def __leave_one_out_error( self ):
+    error = {}
+    x, y = self.log2_width_bytes, self.log2_depth
+    if len(x) < 3 or len(y) < 3:
+      return {m: {'max': None, 'mean': None} for m in PPA_METRICS}
+    tx = ((x[1:-1] - x[:-2]) / (x[2:] - x[:-2]))[:, None]
+    ty = ((y[1:-1] - y[:-2]) / (y[2:] - y[:-2]))[None, :]
+    for m, z in self.log2_metrics.items():
+      v = ( (1-tx)*(1-ty)*z[:-2, :-2] + tx*(1-ty)*z[2:, :-2]
+          + (1-tx)*ty    *z[:-2, 2:]  + tx*ty    *z[2:, 2:] )
+      with np.errstate(invalid='ignore'):
+        rel = np.abs(np.exp2(v - z[1:-1, 1:-1]) - 1.0) * 100.0
+      rel = rel[np.isfinite(rel)]
+      error[m] = {'max': float(rel.max()), 'mean': float(rel.mean())} if rel.size else {'max': None, 'mean': None}
+    return error
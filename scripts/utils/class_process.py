@@ -32,6 +32,12 @@ class Process:
     self.flipPins       = str(json_data['flipPins']) if 'flipPins' in json_data else 'false'
     self.pinHeight_nm   = int(json_data['pinHeight_nm']) if 'pinHeight_nm' in json_data else (self.pinWidth_nm) # Default to square pins
     self.vlogTimingCheckSignalExpansion = bool(json_data['vlogTimingCheckSignalExpansion']) if 'vlogTimingCheckSignalExpansion' in json_data else False
+    self.vlogTimingChecks = str(json_data['vlogTimingChecks']) if 'vlogTimingChecks' in json_data else ('bit' if self.vlogTimingCheckSignalExpansion else 'signal')
+    self.vlogModel      = str(json_data['vlogModel']) if 'vlogModel' in json_data else 'dense'
+    self.vlogPreload    = bool(json_data['vlogPreload']) if 'vlogPreload' in json_data else False
+    self.corners        = list(json_data['corners']) if 'corners' in json_data else [] # See class_corner.py
+    self.nldmTableSize  = json_data['nldmTableSize'] if 'nldmTableSize' in json_data else None # See nldm.py
+    self.nldmScaling    = dict(json_data['nldmScaling']) if 'nldmScaling' in json_data else None
 
     # Converted values
     self.tech_um     = self.tech_nm / 1000.0
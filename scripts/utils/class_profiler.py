@@ -0,0 +1,133 @@
+import os
+import csv
+import json
+import time
+import cProfile
+import resource
+import threading
+import contextlib
+
+from utils.atomic_file import atomic_open
+
+################################################################################
+# PROFILER CLASS
+#
+# This class records the wall and cpu time of every phase of the generator
+# (config load, cacti, csv parse, lib, lef, v, bb.v, ...) for every macro. The
+# cpu time includes child processes so the time spent inside cacti is counted.
+# Each phase can optionally be run under cProfile with the stats dumped to
+# <cprofile_dir>/<macro>.<phase>.prof. Only one profiler can be active at a
+# time (python 3.12 refuses a second one), so cProfile only runs for phases on
+# the main thread that are not nested in another profiled phase. The other
+# phases are still timed.
+#
+# The generator code marks its phases with the module level phase() context
+# manager, which does nothing unless a profiler was started in this process
+# with start(). Worker processes start their own profiler and hand the records
+# back to the parent.
+################################################################################
+
+class Profiler:
+
+  def __init__( self, cprofile_dir = None ):
+
+    self.cprofile_dir = cprofile_dir
+    self.records      = []  ;# one dict per phase run: macro, phase, wall_s, cpu_s
+    self.profiling    = False ;# a phase is running under cProfile
+    if cprofile_dir:
+      os.makedirs(cprofile_dir, exist_ok=True)
+
+  # phase: time the body as the given phase of the given macro ('' for phases
+  # of the whole run such as loading the configuration)
+  @contextlib.contextmanager
+  def phase( self, macro, name ):
+    prof = None
+    if self.cprofile_dir and not self.profiling and threading.current_thread() is threading.main_thread():
+      prof = cProfile.Profile()
+    wall, cpu = time.perf_counter(), self.__cpu_time()
+    if prof:
+      self.profiling = True
+      prof.enable()
+    try:
+      yield
+    finally:
+      if prof:
+        prof.disable()
+        self.profiling = False
+        prof.dump_stats(os.sep.join([self.cprofile_dir, f'{macro if macro else "run"}.{name}.prof']))
+      self.records.append({
+        'macro'  : macro,
+        'phase'  : name,
+        'wall_s' : time.perf_counter() - wall,
+        'cpu_s'  : self.__cpu_time() - cpu,
+      })
+
+  # report: totals per phase, per macro and for the whole run, plus the
+  # slowest macros
+  def report( self, wall_s = None, slowest = 10 ):
+    phases, macros, run = {}, {}, {}
+    for r in self.records:
+      for totals in [phases.setdefault(r['phase'], {'wall_s': 0.0, 'cpu_s': 0.0, 'count': 0}),
+                     (macros.setdefault(r['macro'], {}) if r['macro'] else run).setdefault(r['phase'], {'wall_s': 0.0, 'cpu_s': 0.0, 'count': 0})]:
+        totals['wall_s'] += r['wall_s']
+        totals['cpu_s']  += r['cpu_s']
+        totals['count']  += 1
+    macro_totals = {m: {'wall_s': sum(p['wall_s'] for p in v.values()), 'cpu_s': sum(p['cpu_s'] for p in v.values())} for m, v in macros.items()}
+    return {
+      'wall_s'  : wall_s if wall_s is not None else sum(r['wall_s'] for r in self.records),
+      'phases'  : phases,
+      'run'     : run,
+      'macros'  : {m: dict(v, total=macro_totals[m]) for m, v in macros.items()},
+      'slowest' : [dict(macro=m, **t) for m, t in sorted(macro_totals.items(), key=lambda x: -x[1]['wall_s'])[:slowest]],
+    }
+
+  # write_report: write the report as json, or as csv (one row per macro and
+  # phase, macro '*' for the totals) if the path ends with .csv
+  def write_report( self, path, wall_s = None ):
+    report = self.report(wall_s)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with atomic_open(path, 'w', newline='') as fid:
+      if not path.endswith('.csv'):
+        json.dump(report, fid, indent=2)
+        return report
+      writer = csv.writer(fid)
+      writer.writerow(['macro', 'phase', 'wall_s', 'cpu_s', 'count'])
+      for m in [s['macro'] for s in self.report(wall_s, slowest=None)['slowest']]:
+        for p, t in report['macros'][m].items():
+          writer.writerow([m, p, '%.6f' % t['wall_s'], '%.6f' % t['cpu_s'], t.get('count', '')])
+      for p, t in report['run'].items():
+        writer.writerow(['', p, '%.6f' % t['wall_s'], '%.6f' % t['cpu_s'], t['count']])
+      for p, t in report['phases'].items():
+        writer.writerow(['*', p, '%.6f' % t['wall_s'], '%.6f' % t['cpu_s'], t['count']])
+      writer.writerow(['*', 'total', '%.6f' % report['wall_s'], '', ''])
+    return report
+
+  @staticmethod
+  def __cpu_time():
+    own      = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+# Profiler of this process (None when profiling is off)
+_profiler = None
+
+# start: start recording phases in this process
+def start( cprofile_dir = None ):
+  global _profiler
+  _profiler = Profiler(cprofile_dir)
+  return _profiler
+
+# stop: stop recording phases and return the profiler
+def stop():
+  global _profiler
+  profiler, _profiler = _profiler, None
+  return profiler
+
+# add_records: add the records of a profiler that ran in a worker process
+def add_records( records ):
+  if _profiler:
+    _profiler.records.extend(records)
+
+# phase: context manager that times a phase if a profiler was started
+def phase( macro, name ):
+  return _profiler.phase(macro, name) if _profiler else contextlib.nullcontext()
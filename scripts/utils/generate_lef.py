@@ -1,28 +1,49 @@
+import io
 import os
 import sys
 import math
+import numpy as np
+
+from utils.view_file import open_view
+from utils.log import logger
 
 ################################################################################
 # GENERATE LEF VIEW
 #
-# Generate a .lef file based on the given SRAM.
+# Generate a .lef file based on the given SRAM, or a single .lef file with a
+# macro for each of a list of SRAMs (generate_merged_lef). render_lef returns
+# the .lef of one SRAM as a string instead.
 ################################################################################
 
-def generate_lef( mem ):
+def generate_lef( mem, compress = None ):
+    generate_merged_lef( [mem], os.sep.join([mem.results_dir, mem.name + '.lef']), compress )
+
+def generate_merged_lef( mems, path, compress = None ):
+    with open_view(path, compress) as fid:
+        write_lef( fid, mems )
+
+def render_lef( mem ):
+    fid = io.StringIO()
+    write_lef( fid, [mem] )
+    return fid.getvalue()
+
+def write_lef( fid, mems ):
+    fid.write('VERSION 5.7 ;\n')
+    fid.write('BUSBITCHARS "[]" ;\n')
+    for mem in mems:
+        lef_add_macro( fid, mem )
+    fid.write('\n')
+    fid.write('END LIBRARY\n')
 
-    # File pointer
-    fid = open(os.sep.join([mem.results_dir, mem.name + '.lef']), 'w')
+#
+# Write the MACRO of one SRAM
+#
+def lef_add_macro( fid, mem ):
 
     # Memory parameters
     name        = mem.name
-    depth       = mem.depth
-    bits        = mem.width_in_bits
     w           = mem.width_um
     h           = mem.height_um
-    num_rwport  = mem.rw_ports
-    num_wport   = mem.w_ports
-    num_rport   = mem.r_ports
-    addr_width  = math.ceil(math.log2(mem.depth))
 
     # Process parameters
     min_pin_width   = mem.process.pinWidth_um
@@ -31,40 +52,17 @@ def generate_lef( mem ):
     metalPrefix     = mem.process.metalPrefix
     flip            = mem.process.flipPins.lower() == 'true'
 
-    rw_clks, r_clks, w_clks = mem.port_clks
-    unique_clks = list(set(x for sub in mem.port_clks for x in sub))
     # Offset from bottom edge to first pin
     x_offset = 10 * min_pin_pitch   ;# arbitrary offset (looks decent)
-    y_offset = 10 * min_pin_pitch   ;# arbitrary offset (looks decent)
-    #########################################
-    # Calculate the pin spacing (pitch)
-    #########################################
+    y_offset = get_pin_offset( mem.process )
 
-    number_of_pins = num_wport*2*bits + num_rwport*3*bits + num_rport*2*bits + (num_wport + num_rwport + num_rport) * (addr_width + 3)
-    number_of_tracks_available = math.floor((h - 2*y_offset) / min_pin_pitch)
-    number_of_spare_tracks = number_of_tracks_available - number_of_pins
-
-    print(f'Final {name} size = {w} x {h}')
-    print(f'num pins: {number_of_pins}, available tracks: {number_of_tracks_available}')
-    if number_of_spare_tracks < 0:
-        print("ERROR: not enough tracks!")
-        sys.exit(1)        
-
-    track_count = 1
-    while number_of_spare_tracks > 0:
-        track_count += 1
-        number_of_spare_tracks = number_of_tracks_available - number_of_pins*track_count
-    track_count -= 1
-
-    pin_pitch = min_pin_pitch * track_count
-    group_pitch = math.floor((number_of_tracks_available - number_of_pins*track_count) /  4)*mem.process.pinPitch_um 
+    # Pin names, directions and y coordinates, shared by the PIN and OBS sections
+    pins = get_pin_placement( mem, y_offset )
 
     #########################################
     # LEF HEADER
     #########################################
 
-    fid.write('VERSION 5.7 ;\n')
-    fid.write('BUSBITCHARS "[]" ;\n')
     fid.write('MACRO %s\n' % (name))
     fid.write('  FOREIGN %s 0 0 ;\n' % (name))
     fid.write('  SYMMETRY X Y R90 ;\n')
@@ -75,65 +73,10 @@ def generate_lef( mem ):
     # LEF SIGNAL PINS
     ########################################
 
-    y_step = y_offset
-    for ct in range(num_rwport) :
-        for i in range(int(bits)) :
-            y_step = lef_add_pin( fid, mem, f'w_mask_rw{ct+1}[{i}]', True, y_step, pin_pitch )
-        y_step += group_pitch-pin_pitch
-    
-    for ct in range(num_wport) :
-        for i in range(int(bits)) :
-            y_step = lef_add_pin( fid, mem, f'w_mask_w{ct+1}[{i}]', True, y_step, pin_pitch )
-        y_step += group_pitch-pin_pitch
-    
-    for ct in range(num_rwport) :
-        for i in range(int(bits)) :
-            y_step = lef_add_pin( fid, mem, f'rd_out_rw{ct+1}[{i}]', False, y_step, pin_pitch )
-        y_step += group_pitch-pin_pitch
-
-    for ct in range(num_rport):
-        for i in range(int(bits)) :
-            y_step = lef_add_pin( fid, mem, f'rd_out_r{ct+1}[{i}]', False, y_step, pin_pitch )
-        y_step += group_pitch-pin_pitch
-    
-    for ct in range(num_rwport) :
-        for i in range(int(bits)) :
-            y_step = lef_add_pin( fid, mem, f'wd_in_rw{ct+1}[{i}]', True, y_step, pin_pitch )
-        y_step += group_pitch-pin_pitch
-
-    for ct in range(num_wport) :
-        for i in range(int(bits)) :
-            y_step = lef_add_pin( fid, mem, f'wd_in_w{ct+1}[{i}]', True, y_step, pin_pitch )
-        y_step += group_pitch-pin_pitch
-
-    for ct in range(num_rwport) :
-        for i in range(int(addr_width)) :
-            y_step = lef_add_pin( fid, mem, f'addr_rw{ct+1}[{i}]', True, y_step, pin_pitch )
-        y_step += group_pitch-pin_pitch
-
-    for ct in range(num_wport) :
-        for i in range(int(addr_width)) :
-            y_step = lef_add_pin( fid, mem, f'addr_w{ct+1}[{i}]', True, y_step, pin_pitch )
-        y_step += group_pitch-pin_pitch
-
-    for ct in range(num_rport) :
-        for i in range(int(addr_width)) :
-            y_step = lef_add_pin( fid, mem, f'addr_r{ct+1}[{i}]', True, y_step, pin_pitch )
-        y_step += group_pitch-pin_pitch
-
-    for ct in range(num_rwport) :
-        y_step = lef_add_pin( fid, mem, f'we_in_rw{ct+1}', True, y_step, pin_pitch )
-    for ct in range(num_wport) :
-        y_step = lef_add_pin( fid, mem, f'we_in_w{ct+1}', True, y_step, pin_pitch )
-    for ct in range(num_rwport) :
-        y_step = lef_add_pin( fid, mem, f'ce_rw{ct+1}', True, y_step, pin_pitch)
-    for ct in range(num_wport):
-        y_step = lef_add_pin( fid, mem, f'ce_w{ct+1}', True, y_step, pin_pitch )
-    for ct in range(num_rport):
-        y_step = lef_add_pin( fid, mem, f'ce_r{ct+1}', True, y_step, pin_pitch )  
-    for i in unique_clks:
-        num = '' if (len(unique_clks) == 1) else i
-        y_step = lef_add_pin( fid, mem, f'clk{num}', True, y_step, pin_pitch )
+    layer = metalPrefix + ('3' if flip else '4')
+    hpw   = pins['half_width']
+    fid.writelines(LEF_PIN % (pin_name, 'INPUT' if is_input else 'OUTPUT', layer, 0, y-hpw, pin_height, y+hpw, pin_name)
+                   for pin_name, is_input, y in zip(pins['names'], pins['is_input'], pins['y'].tolist()))
 
     ########################################
     # Create VDD/VSS Strapes
@@ -218,48 +161,8 @@ def generate_lef( mem ):
         # Rect from top to bottom, just right of pins to right edge
         fid.write('    RECT %.3f 0 %.3f %.3f ;\n' % (pin_height,w,h))
 
-        # Walk through same calculation as pins and draw from bottom of the
-        # current pin to the top of last pin (start with bottom edge)
-        prev_y = 0
-        y_step = y_offset
-        for ct in range(num_rwport + num_wport): # w_mask_rw & w_mask_w
-            for i in range(int(bits)) :
-                fid.write('    RECT 0 %.3f %.3f %.3f ;\n' % (prev_y,pin_height,y_step-min_pin_width/2))
-                prev_y = y_step+min_pin_width/2
-                y_step += pin_pitch
-            y_step += group_pitch-pin_pitch
-        for ct in range(num_rwport + num_rport): # rd_out_rw & rd_out_r
-            for i in range(int(bits)) :
-                fid.write('    RECT 0 %.3f %.3f %.3f ;\n' % (prev_y,pin_height,y_step-min_pin_width/2))
-                prev_y = y_step+min_pin_width/2
-                y_step += pin_pitch
-            y_step += group_pitch-pin_pitch
-        for ct in range(num_rwport + num_wport): # wd_in_rw & wd_in_w
-            for i in range(int(bits)) :
-                fid.write('    RECT 0 %.3f %.3f %.3f ;\n' % (prev_y,pin_height,y_step-min_pin_width/2))
-                prev_y = y_step+min_pin_width/2
-                y_step += pin_pitch
-            y_step += group_pitch-pin_pitch
-        for ct in range(num_rwport + num_rport + num_wport): # addr_rw & addr_r & addr_w
-            for i in range(int(addr_width)) :
-                fid.write('    RECT 0 %.3f %.3f %.3f ;\n' % (prev_y,pin_height,y_step-min_pin_width/2))
-                prev_y = y_step+min_pin_width/2
-                y_step += pin_pitch
-            y_step += group_pitch-pin_pitch
-        for ct in range(num_rwport + num_wport): # we_in_rw & we_in_w
-            fid.write('    RECT 0 %.3f %.3f %.3f ;\n' % (prev_y,pin_height,y_step-min_pin_width/2))
-            prev_y = y_step+min_pin_width/2
-            y_step += pin_pitch
-        for ct in range(num_rwport + num_rport + num_wport): # ce_rw & ce_r & ce_w
-            fid.write('    RECT 0 %.3f %.3f %.3f ;\n' % (prev_y,pin_height,y_step-min_pin_width/2))
-            prev_y = y_step+min_pin_width/2
-            y_step += pin_pitch
-        for ct in range(len(unique_clks)): # Single clk by default but handling for multiple clk pins
-            fid.write('    RECT 0 %.3f %.3f %.3f ;\n' % (prev_y,pin_height,y_step-min_pin_width/2))
-            prev_y = y_step+min_pin_width/2
-            y_step += pin_pitch
-        # Final shapre from top of last pin to top edge
-        fid.write('    RECT 0 %.3f %.3f %.3f ;\n' % (prev_y,pin_height,h))
+        # Rects between the pins (from the bottom edge to the top edge)
+        fid.writelines(lef_pin_gaps( pins, pin_height, pin_height, h ))
 
     # Not flipped therefore no pins on M3 (Full rect)
     else:
@@ -312,78 +215,140 @@ def generate_lef( mem ):
         # Create a block from the top of the last strap to the top edge
         fid.write('    RECT %.3f %.3f %.3f %.3f ;\n' % (x_offset, prev_y, w-x_offset, h))
 
-        # Walk through same calculation as pins and draw from bottom of the
-        # current pin to the top of last pin (start with bottom edge)
-        prev_y = 0
-        y_step = y_offset
-        for ct in range(num_rwport + num_wport): # w_mask_rw & w_mask_w
-            for i in range(int(bits)) :
-                fid.write('    RECT 0 %.3f %.3f %.3f ;\n' % (prev_y,min_pin_width,y_step-min_pin_width/2))
-                prev_y = y_step+min_pin_width/2
-                y_step += pin_pitch
-            y_step += group_pitch-pin_pitch
-        for ct in range(num_rwport + num_rport): # rd_out_rw & rd_out_r
-            for i in range(int(bits)) :
-                fid.write('    RECT 0 %.3f %.3f %.3f ;\n' % (prev_y,min_pin_width,y_step-min_pin_width/2))
-                prev_y = y_step+min_pin_width/2
-                y_step += pin_pitch
-            y_step += group_pitch-pin_pitch
-        for ct in range(num_rwport + num_wport): # wd_in_rw & wd_in_w
-            for i in range(int(bits)) :
-                fid.write('    RECT 0 %.3f %.3f %.3f ;\n' % (prev_y,min_pin_width,y_step-min_pin_width/2))
-                prev_y = y_step+min_pin_width/2
-                y_step += pin_pitch
-            y_step += group_pitch-pin_pitch
-        for ct in range(num_rwport + num_rport + num_wport): # addr_rw & addr_r & addr_w
-            for i in range(int(addr_width)) :
-                fid.write('    RECT 0 %.3f %.3f %.3f ;\n' % (prev_y,min_pin_width,y_step-min_pin_width/2))
-                prev_y = y_step+min_pin_width/2
-                y_step += pin_pitch
-            y_step += group_pitch-pin_pitch
-        for ct in range(num_rwport + num_wport): # we_in_rw & we_in_w
-            fid.write('    RECT 0 %.3f %.3f %.3f ;\n' % (prev_y,pin_height,y_step-min_pin_width/2))
-            prev_y = y_step+min_pin_width/2
-            y_step += pin_pitch
-        for ct in range(num_rwport + num_rport + num_wport): # ce_rw & ce_r & ce_w
-            fid.write('    RECT 0 %.3f %.3f %.3f ;\n' % (prev_y,pin_height,y_step-min_pin_width/2))
-            prev_y = y_step+min_pin_width/2
-            y_step += pin_pitch
-        for ct in range(len(unique_clks)): # Single clk by default but handling for multiple clk pins
-            fid.write('    RECT 0 %.3f %.3f %.3f ;\n' % (prev_y,pin_height,y_step-min_pin_width/2))
-            prev_y = y_step+min_pin_width/2
-            y_step += pin_pitch
-        # Final shapre from top of last pin to top edge
-        fid.write('    RECT 0 %.3f %.3f %.3f ;\n' % (prev_y,min_pin_width,h))
+        # Rects between the pins (from the bottom edge to the top edge)
+        fid.writelines(lef_pin_gaps( pins, min_pin_width, pin_height, h ))
 
     # Overlap layer (full rect)
     if (mem.process.tech_nm != 7):
         fid.write('    LAYER OVERLAP ;\n')
         fid.write('    RECT 0 0 %.3f %.3f ;\n' % (w,h))
 
-    # Finish up LEF file
+    # Finish up the macro
     fid.write('  END\n')
     fid.write('END %s\n' % name)
-    fid.write('\n')
-    fid.write('END LIBRARY\n')
-    fid.close()
 
 #
-# Helper function that adds a signal pin
+# Pin placement shared by the PIN and OBS sections. Returns the name, direction
+# and y coordinate (numpy array) of every signal pin from the bottom edge up.
+#
+def get_pin_placement( mem, y_offset ):
+
+    name        = mem.name
+    bits        = int(mem.width_in_bits)
+    h           = mem.height_um
+    num_rwport  = mem.rw_ports
+    num_wport   = mem.w_ports
+    num_rport   = mem.r_ports
+    addr_width  = math.ceil(math.log2(mem.depth))
+    min_pin_pitch = mem.process.pinPitch_um
+
+    unique_clks = list(set(x for sub in mem.port_clks for x in sub))
+
+    #########################################
+    # Calculate the pin spacing (pitch)
+    #########################################
+
+    number_of_pins = count_pins( bits, mem.depth, num_rwport, num_rport, num_wport )
+    number_of_tracks_available = count_tracks( h, y_offset, min_pin_pitch )
+    number_of_spare_tracks = number_of_tracks_available - number_of_pins
+
+    logger.debug(f'{name}: final size {mem.width_um} x {h} um, {number_of_pins} pins on {number_of_tracks_available} tracks')
+    if number_of_spare_tracks < 0:
+        logger.error(f'{name}: not enough tracks ({number_of_pins} pins, {number_of_tracks_available} tracks)!')
+        sys.exit(1)
+
+    # Largest number of tracks per pin that still leaves spare tracks
+    track_count = -(-number_of_tracks_available // number_of_pins) - 1
+
+    pin_pitch = min_pin_pitch * track_count
+    group_pitch = math.floor((number_of_tracks_available - number_of_pins*track_count) /  4)*mem.process.pinPitch_um
+
+    #########################################
+    # Pin order
+    #########################################
+
+    # Busses (name, width, is_input) are each followed by group_pitch instead
+    # of pin_pitch, the single bit control pins and clocks go on top
+    busses = ( [(f'w_mask_rw{ct+1}', bits, True)        for ct in range(num_rwport)]
+             + [(f'w_mask_w{ct+1}', bits, True)         for ct in range(num_wport)]
+             + [(f'rd_out_rw{ct+1}', bits, False)       for ct in range(num_rwport)]
+             + [(f'rd_out_r{ct+1}', bits, False)        for ct in range(num_rport)]
+             + [(f'wd_in_rw{ct+1}', bits, True)         for ct in range(num_rwport)]
+             + [(f'wd_in_w{ct+1}', bits, True)          for ct in range(num_wport)]
+             + [(f'addr_rw{ct+1}', addr_width, True)    for ct in range(num_rwport)]
+             + [(f'addr_w{ct+1}', addr_width, True)     for ct in range(num_wport)]
+             + [(f'addr_r{ct+1}', addr_width, True)     for ct in range(num_rport)] )
+    singles = ( [f'we_in_rw{ct+1}' for ct in range(num_rwport)]
+              + [f'we_in_w{ct+1}'  for ct in range(num_wport)]
+              + [f'ce_rw{ct+1}'    for ct in range(num_rwport)]
+              + [f'ce_w{ct+1}'     for ct in range(num_wport)]
+              + [f'ce_r{ct+1}'     for ct in range(num_rport)]
+              + [f'clk{"" if len(unique_clks) == 1 else i}' for i in unique_clks] )
+
+    names       = [f'{bus}[{i}]' for bus, width, _ in busses for i in range(width)] + singles
+    is_input    = [is_in for _, width, is_in in busses for i in range(width)] + [True]*len(singles)
+    groups_done = np.repeat(np.arange(len(busses) + 1), [width for _, width, _ in busses] + [len(singles)])
+
+    #########################################
+    # Pin coordinates
+    #########################################
+
+    # The steps between pins are summed up in order (a cumulative sum, as the
+    # pins were once placed one at a time) rather than multiplied out, so the
+    # coordinates round the same way on every pin pitch. Step j + groups_done[j]
+    # leads to pin j, the extra step of each bus follows its last pin.
+    steps = np.insert(np.full(len(names), pin_pitch), np.cumsum([width for _, width, _ in busses]), group_pitch - pin_pitch)
+    y = np.cumsum(np.concatenate(([y_offset], steps)))[np.arange(len(names)) + groups_done]
+
+    return {
+      'names'      : names,
+      'is_input'   : is_input,
+      'is_bus'     : groups_done < len(busses),
+      'y'          : y,
+      'half_width' : mem.process.pinWidth_um/2.0,
+    }
+
+#
+# Offset from the bottom edge to the first pin
+#
+def get_pin_offset( process ):
+    return 10 * process.pinPitch_um   ;# arbitrary offset (looks decent)
+
+#
+# Number of signal pins of an SRAM and the number of pin tracks on its edge
 #
-def lef_add_pin( fid, mem, pin_name, is_input, y, pitch ):
-
-  layer = mem.process.metalPrefix + ('3' if mem.process.flipPins.lower() == 'true' else '4')
-  pw  = mem.process.pinWidth_um
-  hpw = (mem.process.pinWidth_um/2.0) # half pin width
-  ph = mem.process.pinHeight_um 
-  fid.write('  PIN %s\n' % pin_name)
-  fid.write('    DIRECTION %s ;\n' % ('INPUT' if is_input else 'OUTPUT'))
-  fid.write('    USE SIGNAL ;\n')
-  fid.write('    SHAPE ABUTMENT ;\n')
-  fid.write('    PORT\n')
-  fid.write('      LAYER %s ;\n' % layer)
-  fid.write('      RECT %.3f %.3f %.3f %.3f ;\n' % (0, y-hpw, ph, y+hpw))
-  fid.write('    END\n')
-  fid.write('  END %s\n' % pin_name)
-  
-  return y + pitch
\ No newline at end of file
+def count_pins( bits, depth, num_rwport, num_rport, num_wport ):
+    addr_width = math.ceil(math.log2(depth))
+    return num_wport*2*bits + num_rwport*3*bits + num_rport*2*bits + (num_wport + num_rwport + num_rport) * (addr_width + 3)
+
+def count_tracks( h, y_offset, min_pin_pitch ):
+    return math.floor((h - 2*y_offset) / min_pin_pitch)
+
+#
+# Obstruction rects (lines of LEF) that fill the space between the pins (from
+# the bottom edge to the top edge), rect_width wide beside busses and
+# ctrl_width wide beside the control pins and clocks.
+#
+def lef_pin_gaps( pins, rect_width, ctrl_width, h ):
+
+    hpw    = pins['half_width']
+    bottom = np.concatenate(([0.0], pins['y'] + hpw))
+    top    = np.append(pins['y'] - hpw, h)
+    right  = np.append(np.where(pins['is_bus'], rect_width, ctrl_width), rect_width)
+    return ('    RECT 0 %.3f %.3f %.3f ;\n' % r for r in zip(bottom.tolist(), right.tolist(), top.tolist()))
+
+################################################################################
+# LEF TEMPLATES
+################################################################################
+
+LEF_PIN = '''\
+  PIN %s
+    DIRECTION %s ;
+    USE SIGNAL ;
+    SHAPE ABUTMENT ;
+    PORT
+      LAYER %s ;
+      RECT %.3f %.3f %.3f %.3f ;
+    END
+  END %s
+'''
@@ -1,15 +1,126 @@
+import io
 import os
 import math
 import time
 import datetime
 
+from utils.nldm import get_nldm_model, get_nldm_tables
+from utils.view_file import open_view
+
 ################################################################################
 # GENERATE LIBERTY VIEW
 #
-# Generate a .lib file based on the given SRAM.
+# Generate a .lib file based on the given SRAM, or a single .lib file with a
+# cell for each of a list of SRAMs (generate_merged_lib).
+#
+# The liberty file is rendered from the block templates at the bottom of this
+# file. Groups that are identical for every pin of a memory (the setup/hold
+# constraint tables and the internal power tables) are rendered once and then
+# stitched into each pin/bus group, and the whole library is built up in memory
+# and written out a cell at a time. The lookup tables of every memory of a
+# library are computed together (see nldm.py).
 ################################################################################
 
-def generate_lib( mem ):
+def generate_lib( mem, compress = None ):
+    with open_view(os.sep.join([mem.results_dir, get_lib_name(mem) + '.lib']), compress) as LIB_file:
+        write_library(LIB_file, get_lib_name(mem), [mem])
+
+# get_lib_name: name of the library of a memory, the libraries of the
+# operating corners are called <name>_<corner>
+def get_lib_name( mem ):
+    return f'{mem.name}_{mem.corner.name}' if mem.corner else str(mem.name)
+
+# generate_merged_lib: write one library called lib_name with a cell for every
+# memory. The lookup table templates are shared by all of the cells.
+def generate_merged_lib( lib_name, mems, path, compress = None ):
+    with open_view(path, compress) as LIB_file:
+        write_library(LIB_file, lib_name, mems)
+
+def render_lib( mem ):
+    return render_library(get_lib_name(mem), [mem])
+
+def render_library( lib_name, mems ):
+    fid = io.StringIO()
+    write_library(fid, lib_name, mems)
+    return fid.getvalue()
+
+def write_library( fid, lib_name, mems ):
+
+    # Get the date
+    d = datetime.date.today()
+    date = d.isoformat()
+    current_time = time.strftime("%H:%M:%SZ", time.gmtime())
+
+    # Lookup tables of every memory. The default max transition covers the
+    # slowest cell.
+    limits = [get_table_limits(mem) for mem in mems]
+    max_slew = max(l[1] for l in limits)
+    slew_points, load_points, scaling = get_nldm_model(mems[0].process)
+    tables = get_nldm_tables(mems, limits, slew_points, load_points, scaling)
+
+    # Operating conditions (the corner of the memories, or the nominal one)
+    corner = mems[0].corner
+    header = {
+        'name'        : lib_name,
+        'templates'   : lib_name,
+        'date'        : date,
+        'time'        : current_time,
+        'voltage'     : corner.voltage if corner else float(mems[0].process.voltage),
+        'temperature' : corner.temperature_c if corner else 25.0,
+        'conditions'  : corner.name if corner else 'tt_1.0_25.0',
+        'max_slew'    : max_slew,
+        'slew_index'  : get_template_index(slew_points),
+        'load_index'  : get_template_index(load_points),
+    }
+
+    fid.write(LIB_HEADER % header)
+    for i, mem in enumerate(mems):
+        fid.write(render_lib_cell(mem, lib_name, {k: v[i] for k, v in tables.items()}))
+    fid.write(LIB_FOOTER)
+
+# get_table_limits: min/max slew and load of the NLDM tables of a memory
+def get_table_limits( mem ):
+
+    fo4               = float(mem.fo4_ps)/1e3
+    min_driver_in_cap = float(mem.cap_input_pf)
+
+    # Arbitrary range of the NLDM tables. This is used for Clk->Q arcs as well
+    # as setup/hold times. We only have a single value for these, by default
+    # every table entry is that value so all interpolated values are the same.
+    # A process can give the tables more points and a static variation of the
+    # single value with "nldmTableSize" and "nldmScaling" (see nldm.py), the
+    # variation values are process specific and the defaults are not derived
+    # from any real process.
+    #
+    # The table indicies are main min/max values for interpolation. The tools
+    # typically don't like extrapolation so a large range is nice, but makes the
+    # single value strategy described above even more unrealistic.
+    #
+    min_slew = 1   * fo4               ;# arbitrary (1x fo4, fear that 0 would cause issues)
+    max_slew = 25  * fo4               ;# arbitrary (25x fo4 as ~100x fanout ... i know that is not really how it works)
+    min_load = 1   * min_driver_in_cap ;# arbitrary (1x driver, fear that 0 would cause issues)
+    max_load = 100 * min_driver_in_cap ;# arbitrary (100x driver)
+
+    return min_slew, max_slew, min_load, max_load
+
+# get_template_index: placeholder index of a lookup table template with the
+# given number of points (the tables give their own indices)
+def get_template_index( points ):
+    return ', '.join(str(1000 + i) for i in range(points))
+
+# format_row: one row of a lookup table (or an index)
+def format_row( values ):
+    return ', '.join('%.3f' % v for v in values)
+
+# format_table: the rows of a 2d lookup table as the lines of a values group
+def format_table( table ):
+    rows = ['                  "%s"' % format_row(row) for row in table]
+    return ''.join(row + (', \\\n' if i < len(rows) - 1 else ' \\\n') for i, row in enumerate(rows))
+
+# render_lib_cell: the bus types and cell of a memory, using the lookup table
+# templates of the library called templates. tables are the lookup tables of
+# the memory (computed here if not given).
+def render_lib_cell( mem, templates, tables = None ):
 
     # Make sure the data types are correct
     name              = str(mem.name)
@@ -18,20 +129,15 @@ def generate_lib( mem ):
     area              = float(mem.area_um2)
     x                 = float(mem.width_um)
     y                 = float(mem.height_um)
-    leakage           = float(mem.standby_leakage_per_bank_mW)*1e3
-    tsetup            = float(mem.t_setup_ns)
-    thold             = float(mem.t_hold_ns)
-    tcq               = float(mem.access_time_ns)
+    leakage           = float(mem.standby_leakage_mW)*1e3
     clkpindynamic     = float(mem.pin_dynamic_power_mW)*1e3
     pindynamic        = float(mem.pin_dynamic_power_mW)*1e1
     min_driver_in_cap = float(mem.cap_input_pf)
-    voltage           = float(mem.process.voltage)
     min_period        = float(mem.cycle_time_ns)
-    fo4               = float(mem.fo4_ps)/1e3
 
     # Only support 1RW srams. At some point, expose these as well!
     unique_clks = list(set(x for sub in mem.port_clks for x in sub))
-    
+
     num_rwport                = int(mem.rw_ports)
     num_rport                 = int(mem.r_ports)
     num_wport                 = int(mem.w_ports)
@@ -43,1002 +149,346 @@ def generate_lib( mem ):
     addr_width        = math.ceil(math.log2(mem.depth))
     addr_width_m1     = addr_width-1
 
-    # Get the date
-    d = datetime.date.today()
-    date = d.isoformat()
-    current_time = time.strftime("%H:%M:%SZ", time.gmtime())
-
-    # TODO: Arbitrary indicies for the NLDM table. This is used for Clk->Q arcs
-    # as well as setup/hold times. We only have a single value for these, there
-    # are two options. 1. adding some sort of static variation of the single
-    # value for each table entry, 2. use the same value so all interpolated
-    # values are the same. The 1st is more realistic but depend on good variation
-    # values which is process sepcific and I don't have a strategy for
-    # determining decent variation values without breaking NDA so right now we
-    # have no variations.
-    #
-    # The table indicies are main min/max values for interpolation. The tools
-    # typically don't like extrapolation so a large range is nice, but makes the
-    # single value strategy described above even more unrealistic.
-    #
-    min_slew = 1   * fo4               ;# arbitrary (1x fo4, fear that 0 would cause issues)
-    max_slew = 25  * fo4               ;# arbitrary (25x fo4 as ~100x fanout ... i know that is not really how it works)
-    min_load = 1   * min_driver_in_cap ;# arbitrary (1x driver, fear that 0 would cause issues)
-    max_load = 100 * min_driver_in_cap ;# arbitrary (100x driver)
-
-    slew_indicies = '%.3f, %.3f' % (min_slew, max_slew) ;# input pin transisiton with between 1xfo4 and 100xfo4
-    load_indicies = '%.3f, %.3f' % (min_load, max_load) ;# output capacitance table between a 1x and 32x inverter
-
-    # Start generating the LIB file
-
-    LIB_file = open(os.sep.join([mem.results_dir, name + '.lib']), 'w')
-
-    LIB_file.write( 'library(%s) {\n' % name)
-    LIB_file.write( '    technology (cmos);\n')
-    LIB_file.write( '    delay_model : table_lookup;\n')
-    LIB_file.write( '    revision : 1.0;\n')
-    LIB_file.write( '    date : "%s %s";\n' % (date, current_time))
-    LIB_file.write( '    comment : "SRAM";\n')
-    LIB_file.write( '    time_unit : "1ns";\n')
-    LIB_file.write( '    voltage_unit : "1V";\n')
-    LIB_file.write( '    current_unit : "1uA";\n')
-    LIB_file.write( '    leakage_power_unit : "1uW";\n')
-    LIB_file.write( '    nom_process : 1;\n')
-    LIB_file.write( '    nom_temperature : 25.000;\n')
-    LIB_file.write( '    nom_voltage : %s;\n' % voltage)
-    LIB_file.write( '    capacitive_load_unit (1,pf);\n\n')
-    LIB_file.write( '    pulling_resistance_unit : "1kohm";\n\n')
-    LIB_file.write( '    operating_conditions(tt_1.0_25.0) {\n')
-    LIB_file.write( '        process : 1;\n')
-    LIB_file.write( '        temperature : 25.000;\n')
-    LIB_file.write( '        voltage : %s;\n' % voltage)
-    LIB_file.write( '        tree_type : balanced_tree;\n')
-    LIB_file.write( '    }\n')
-    LIB_file.write( '\n')
-
-    LIB_file.write( '    /* default attributes */\n')
-    LIB_file.write( '    default_cell_leakage_power : 0;\n')
-    LIB_file.write( '    default_fanout_load : 1;\n')
-    LIB_file.write( '    default_inout_pin_cap : 0.0;\n')
-    LIB_file.write( '    default_input_pin_cap : 0.0;\n')
-    LIB_file.write( '    default_output_pin_cap : 0.0;\n')
-    LIB_file.write( '    default_input_pin_cap : 0.0;\n')
-    LIB_file.write( '    default_max_transition : %.3f;\n\n' % max_slew)
-    LIB_file.write( '    default_operating_conditions : tt_1.0_25.0;\n')
-    LIB_file.write( '    default_leakage_power_density : 0.0;\n')
-    LIB_file.write( '\n')
-
-    LIB_file.write( '    /* additional header data */\n')
-    LIB_file.write( '    slew_derate_from_library : 1.000;\n')
-    LIB_file.write( '    slew_lower_threshold_pct_fall : 20.000;\n')
-    LIB_file.write( '    slew_upper_threshold_pct_fall : 80.000;\n')
-    LIB_file.write( '    slew_lower_threshold_pct_rise : 20.000;\n')
-    LIB_file.write( '    slew_upper_threshold_pct_rise : 80.000;\n')
-    LIB_file.write( '    input_threshold_pct_fall : 50.000;\n')
-    LIB_file.write( '    input_threshold_pct_rise : 50.000;\n')
-    LIB_file.write( '    output_threshold_pct_fall : 50.000;\n')
-    LIB_file.write( '    output_threshold_pct_rise : 50.000;\n\n')
-    LIB_file.write( '\n')
-
-
-    LIB_file.write( '    lu_table_template(%s_mem_out_delay_template) {\n' % name )
-    LIB_file.write( '        variable_1 : input_net_transition;\n')
-    LIB_file.write( '        variable_2 : total_output_net_capacitance;\n')
-    LIB_file.write( '            index_1 ("1000, 1001");\n')
-    LIB_file.write( '            index_2 ("1000, 1001");\n')
-    LIB_file.write( '    }\n')
-    LIB_file.write( '    lu_table_template(%s_mem_out_slew_template) {\n' % name )
-    LIB_file.write( '        variable_1 : total_output_net_capacitance;\n')
-    LIB_file.write( '            index_1 ("1000, 1001");\n')
-    LIB_file.write( '    }\n')
-    LIB_file.write( '    lu_table_template(%s_constraint_template) {\n' % name )
-    LIB_file.write( '        variable_1 : related_pin_transition;\n')
-    LIB_file.write( '        variable_2 : constrained_pin_transition;\n')
-    LIB_file.write( '            index_1 ("1000, 1001");\n')
-    LIB_file.write( '            index_2 ("1000, 1001");\n')
-    LIB_file.write( '    }\n')
-    LIB_file.write( '    power_lut_template(%s_energy_template_clkslew) {\n' % name )
-    LIB_file.write( '        variable_1 : input_transition_time;\n')
-    LIB_file.write( '            index_1 ("1000, 1001");\n')
-    LIB_file.write( '    }\n')
-    LIB_file.write( '    power_lut_template(%s_energy_template_sigslew) {\n' % name )
-    LIB_file.write( '        variable_1 : input_transition_time;\n')
-    LIB_file.write( '            index_1 ("1000, 1001");\n')
-    LIB_file.write( '    }\n')
-    LIB_file.write( '    library_features(report_delay_calculation);\n')
-    LIB_file.write( '    type (%s_DATA) {\n' % name )
-    LIB_file.write( '        base_type : array ;\n')
-    LIB_file.write( '        data_type : bit ;\n')
-    LIB_file.write( '        bit_width : %d;\n' % bits)
-    LIB_file.write( '        bit_from : %d;\n' % (int(bits)-1))
-    LIB_file.write( '        bit_to : 0 ;\n')
-    LIB_file.write( '        downto : true ;\n')
-    LIB_file.write( '    }\n')
-    LIB_file.write( '    type (%s_ADDRESS) {\n' % name)
-    LIB_file.write( '        base_type : array ;\n')
-    LIB_file.write( '        data_type : bit ;\n')
-    LIB_file.write( '        bit_width : %d;\n' % addr_width)
-    LIB_file.write( '        bit_from : %d;\n' % addr_width_m1)
-    LIB_file.write( '        bit_to : 0 ;\n')
-    LIB_file.write( '        downto : true ;\n')
-    LIB_file.write( '    }\n')
-    if byte_write: 
-        LIB_file.write( '    type (%s_WMASK) {\n' % name)
-        LIB_file.write( '        base_type : array ;\n')
-        LIB_file.write( '        data_type : bit ;\n')
-        LIB_file.write( '        bit_width : %d;\n' % (bits // 8))
-        LIB_file.write( '        bit_from : %d;\n' % ((bits // 8)-1))
-        LIB_file.write( '        bit_to : 0 ;\n')
-        LIB_file.write( '        downto : true ;\n')
-        LIB_file.write( '    }\n')
-
-    LIB_file.write( 'cell(%s) {\n' % name )
-    LIB_file.write( '    area : %.3f;\n' % area)
-    #LIB_file.write( '    dont_use : true;\n')
-    #LIB_file.write( '    dont_touch : true;\n')
-    LIB_file.write( '    interface_timing : true;\n')
-    LIB_file.write( '    memory() {\n')
-    LIB_file.write( '        type : ram;\n')
-    LIB_file.write( '        address_width : %d;\n' % addr_width)
-    LIB_file.write( '        word_width : %d;\n' % bits)
-    LIB_file.write( '    }\n')
+    min_slew, max_slew, min_load, max_load = get_table_limits(mem)
+    if tables is None:
+        tables = {k: v[0] for k, v in get_nldm_tables([mem], [(min_slew, max_slew, min_load, max_load)], *get_nldm_model(mem.process)).items()}
+
+    slew_indicies = format_row(tables['slew']) ;# input pin transisiton with between 1xfo4 and 100xfo4
+    load_indicies = format_row(tables['load']) ;# output capacitance table between a 1x and 32x inverter
+
+    # Clock pin each type of port is related to (only numbered when there is
+    # more than one clock)
+    def clk_of( clks, num_ports ):
+        return clks[min(num_ports, len(clks) - 1)] if len(unique_clks) != 1 else ''
+
+    #########################################
+    # Shared groups (rendered once)
+    #########################################
+
+    fields = {
+        'name'          : name,
+        'templates'     : templates,
+        'max_slew'      : max_slew,
+        'max_load'      : max_load,
+        'slew_indicies' : slew_indicies,
+        'load_indicies' : load_indicies,
+        'cap'           : min_driver_in_cap,
+        'clk_cap'       : min_driver_in_cap*5, # Clk pin is usually higher cap for fanout control, assuming an x5 driver.
+        'min_period'    : min_period,
+        'area'          : area,
+        'leakage'       : leakage,
+    }
+
+    setup_tables = LIB_CONSTRAINT_TABLES % dict(fields, values=format_table(tables['setup']))
+    hold_tables  = LIB_CONSTRAINT_TABLES % dict(fields, values=format_table(tables['hold']))
+    sig_power    = LIB_POWER_TABLES % dict(fields, template='energy_template_sigslew', values=format_row([pindynamic * p for p in tables['power']]))
+    clk_power    = LIB_POWER_TABLES % dict(fields, template='energy_template_clkslew', values=format_row([clkpindynamic * p for p in tables['power']]))
+    delay_tables = LIB_DELAY_TABLES % dict(fields, delays=format_table(tables['delay']), transitions=format_row(tables['transition']))
+
+    # Setup and hold timing groups of an input pin/bus. The data/mask busses
+    # pad the attribute names to line up, everything else does not.
+    def constraint_timing( clk, pad ):
+        return ( LIB_CONSTRAINT_TIMING % {'clk': clk, 'pad': pad, 'timing_type': 'setup_rising', 'tables': setup_tables, 'end': ' '}
+               + LIB_CONSTRAINT_TIMING % {'clk': clk, 'pad': pad, 'timing_type': 'hold_rising',  'tables': hold_tables,  'end': ''} )
+
+    #########################################
+    # Pin/bus group renderers
+    #########################################
+
+    # Read data output bus
+    def output_bus( pin, address, clk ):
+        return LIB_OUTPUT_BUS % dict(fields, pin=pin, address=address, clk=clk, tables=delay_tables)
+
+    # Control (we/ce) pins and address busses
+    def input_pin( group, pin, bus_type, clk ):
+        bus_type_attr = '        bus_type : %s_%s;\n' % (name, bus_type) if bus_type else ''
+        return ( LIB_INPUT_PIN % dict(fields, group=group, pin=pin, bus_type=bus_type_attr)
+               + constraint_timing(clk, '')
+               + LIB_INTERNAL_POWER % {'when': '', 'tables': sig_power}
+               + '    }\n' )
+
+    # Write data and write mask busses
+    def write_bus( pin, address, clocked_on, clk, we ):
+        return ( LIB_WRITE_BUS % dict(fields, pin=pin, address=address, clocked_on=clocked_on)
+               + constraint_timing(clk, '    ')
+               + LIB_INTERNAL_POWER % {'when': '            when : "(! (%s) )";\n' % we, 'tables': sig_power}
+               + LIB_INTERNAL_POWER % {'when': '            when : "(%s)";\n' % we, 'tables': sig_power}
+               + '    }\n' )
+
+    #########################################
+    # Library
+    #########################################
+
+    out = []
+    out.append(LIB_TYPE % dict(fields, type='DATA', width=bits, width_m1=bits-1))
+    out.append(LIB_TYPE % dict(fields, type='ADDRESS', width=addr_width, width_m1=addr_width_m1))
+    if byte_write:
+        out.append(LIB_TYPE % dict(fields, type='WMASK', width=bits // 8, width_m1=(bits // 8)-1))
+
+    out.append(LIB_CELL_HEADER % dict(fields, addr_width=addr_width, bits=bits))
 
     for i in unique_clks:
-      if (len(unique_clks) == 1) : 
-        LIB_file.write('    pin(clk)   {\n')
-      else:
-        LIB_file.write('    pin(clk%s)   {\n' % (i))
-      LIB_file.write('        direction : input;\n')
-      LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap*5)) ;# Clk pin is usually higher cap for fanout control, assuming an x5 driver.
-      LIB_file.write('        clock : true;\n')
-      #LIB_file.write('        max_transition : 0.01;\n') # Max rise/fall time
-      #LIB_file.write('        min_pulse_width_high : %.3f ;\n' % (min_period))
-      #LIB_file.write('        min_pulse_width_low  : %.3f ;\n' % (min_period))
-      LIB_file.write('        min_period           : %.3f ;\n' % (min_period))
-      #LIB_file.write('        minimum_period(){\n')
-      #LIB_file.write('            constraint : %.3f ;\n' % min_period)
-      #LIB_file.write('            when : "1";\n')
-      #LIB_file.write('            sdf_cond : "1";\n')
-      #LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            rise_power(%s_energy_template_clkslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (clkpindynamic, clkpindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_clkslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (clkpindynamic, clkpindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('    }\n')
-      LIB_file.write('\n')
-
-    for i in range(int(num_rwport)) :
-      LIB_file.write('    bus(rd_out_rw%s)   {\n' % (i + 1))
-      LIB_file.write('        bus_type : %s_DATA;\n' % name)
-      LIB_file.write('        direction : output;\n')
-      LIB_file.write('        max_capacitance : %.3f;\n' % max_load) ;# Based on 32x inverter being a common max (or near max) inverter
-      LIB_file.write('        memory_read() {\n')
-      LIB_file.write('            address : addr_rw;\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : "clk%s" ;\n' % (rw_clks[min(num_rwport, len(rw_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type : rising_edge;\n')
-      LIB_file.write('            timing_sense : non_unate;\n')
-      LIB_file.write('            cell_rise(%s_mem_out_delay_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % load_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tcq, tcq))
-      LIB_file.write('                  "%.3f, %.3f" \\\n' % (tcq, tcq))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            cell_fall(%s_mem_out_delay_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % load_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tcq, tcq))
-      LIB_file.write('                  "%.3f, %.3f" \\\n' % (tcq, tcq))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            rise_transition(%s_mem_out_slew_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % load_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (min_slew, max_slew))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_transition(%s_mem_out_slew_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % load_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (min_slew, max_slew))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('    }\n')
-    
-    for i in range(int(num_rport)) :
-      LIB_file.write('    bus(rd_out_r%s)   {\n' % (i + 1))
-      LIB_file.write('        bus_type : %s_DATA;\n' % name)
-      LIB_file.write('        direction : output;\n')
-      LIB_file.write('        max_capacitance : %.3f;\n' % max_load) ;# Based on 32x inverter being a common max (or near max) inverter
-      LIB_file.write('        memory_read() {\n')
-      LIB_file.write('            address : addr_r%s;\n' % (i + 1))
-      LIB_file.write('        }\n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : "clk%s" ;\n' % (r_clks[min(num_rport, len(r_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type : rising_edge;\n')
-      LIB_file.write('            timing_sense : non_unate;\n')
-      LIB_file.write('            cell_rise(%s_mem_out_delay_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % load_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tcq, tcq))
-      LIB_file.write('                  "%.3f, %.3f" \\\n' % (tcq, tcq))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            cell_fall(%s_mem_out_delay_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % load_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tcq, tcq))
-      LIB_file.write('                  "%.3f, %.3f" \\\n' % (tcq, tcq))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            rise_transition(%s_mem_out_slew_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % load_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (min_slew, max_slew))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_transition(%s_mem_out_slew_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % load_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (min_slew, max_slew))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('    }\n')
-    
-    for i in range(int(num_rwport)) :
-      LIB_file.write('    pin(we_in_rw%s)   {\n' % (i + 1))
-      LIB_file.write('        direction : input;\n')
-      LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk%s;\n' % (rw_clks[min(num_rwport, len(rw_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type : setup_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        } \n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk%s;\n' % (rw_clks[min(num_rwport, len(rw_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type : hold_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('    }\n')
-
-    for i in range(int(num_wport)) :
-      LIB_file.write('    pin(we_in_w%s)   {\n' % (i + 1))
-      LIB_file.write('        direction : input;\n')
-      LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk%s;\n'% (w_clks[min(num_wport, len(w_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type : setup_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        } \n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk%s;\n' % (w_clks[min(num_wport, len(w_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type : hold_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('    }\n')
-
-    for i in range(int(num_rwport)) :
-      LIB_file.write('    pin(ce_rw%s)   {\n' % (i + 1))
-      LIB_file.write('        direction : input;\n')
-      LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk%s;\n' % (rw_clks[min(num_rwport, len(rw_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type : setup_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        } \n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk%s;\n' % (rw_clks[min(num_rwport, len(rw_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type : hold_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('    }\n')
-
-    for i in range(int(num_rport)) :
-      LIB_file.write('    pin(ce_r%s)   {\n' % (i + 1))
-      LIB_file.write('        direction : input;\n')
-      LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk%s;\n' % (r_clks[min(num_rport, len(r_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type : setup_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        } \n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk%s;\n' % (r_clks[min(num_rport, len(r_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type : hold_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('    }\n')
-
-    for i in range(int(num_wport)) :
-      LIB_file.write('    pin(ce_w%s)   {\n' % (i + 1))
-      LIB_file.write('        direction : input;\n')
-      LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk%s;\n' % (w_clks[min(num_wport, len(w_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type : setup_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        } \n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk%s;\n' % (w_clks[min(num_wport, len(w_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type : hold_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('    }\n')
-
-    for i in range(int(num_rwport)) :
-      LIB_file.write('    bus(addr_rw%s)   {\n' % (i + 1))
-      LIB_file.write('        bus_type : %s_ADDRESS;\n' % name)
-      LIB_file.write('        direction : input;\n')
-      LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk%s;\n' % (rw_clks[min(num_rwport, len(rw_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type : setup_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        } \n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk%s;\n' % (rw_clks[min(num_rwport, len(rw_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type : hold_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('    }\n')
-
-    for i in range(int(num_rwport)) :
-      LIB_file.write('    bus(wd_in_rw%s)   {\n' % (i + 1))
-      LIB_file.write('        bus_type : %s_DATA;\n' % name)
-      LIB_file.write('        memory_write() {\n')
-      LIB_file.write('            address : addr_rw%s;\n' % (i + 1))
-      LIB_file.write('            clocked_on : "clk%s";\n' % (rw_clks[min(num_rwport, len(rw_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('        }\n')
-      LIB_file.write('        direction : input;\n')
-      LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin     : clk%s;\n' % (rw_clks[min(num_rwport, len(rw_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type     : setup_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        } \n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin     : clk%s;\n' % (rw_clks[min(num_rwport, len(rw_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type     : hold_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            when : "(! (we_in_rw%s) )";\n' % (i + 1))
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            when : "(we_in_rw%s)";\n' % (i + 1))
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('    }\n')
-
-    for i in range(int(num_wport)) :
-      LIB_file.write('    bus(wd_in_w%s)   {\n' % (i + 1))
-      LIB_file.write('        bus_type : %s_DATA;\n' % name)
-      LIB_file.write('        memory_write() {\n')
-      LIB_file.write('            address : addr_w%s;\n' % (i + 1))
-      LIB_file.write('            clocked_on : "clk";\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        direction : input;\n')
-      LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin     : clk%s;\n' % (w_clks[min(num_wport, len(w_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type     : setup_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        } \n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin     : clk%s;\n' % (w_clks[min(num_wport, len(w_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type     : hold_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            when : "(! (we_in_w%s) )";\n' % (i + 1))
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            when : "(we_in_w%s)";\n' % (i + 1))
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('    }\n')
-
-    for i in range(int(num_rwport)) :
-      LIB_file.write('    bus(w_mask_rw%s)   {\n' % (i + 1))
-      LIB_file.write('        bus_type : %s_DATA;\n' % name)
-      LIB_file.write('        memory_write() {\n')
-      LIB_file.write('            address : addr_rw%s;\n' % (i + 1))
-      LIB_file.write('            clocked_on : "clk";\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        direction : input;\n')
-      LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin     : clk%s;\n' % (rw_clks[min(num_rwport, len(rw_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type     : setup_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        } \n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin     : clk%s;\n' % (rw_clks[min(num_rwport, len(rw_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type     : hold_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            when : "(! (we_in_rw%s) )";\n' % (i + 1))
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            when : "(we_in_rw%s)";\n' % (i + 1))
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('    }\n')
-
-    for i in range(int(num_rport)) :
-      LIB_file.write('    bus(addr_r%s)   {\n' % (i + 1))
-      LIB_file.write('        bus_type : %s_ADDRESS;\n' % name)
-      LIB_file.write('        direction : input;\n')
-      LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk%s;\n' % (r_clks[min(num_rport, len(r_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type : setup_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        } \n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk%s;\n' % (r_clks[min(num_rport, len(r_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type : hold_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('    }\n')
-
-    for i in range(int(num_wport)) :
-      LIB_file.write('    bus(addr_w%s)   {\n' % (i + 1))
-      LIB_file.write('        bus_type : %s_ADDRESS;\n' % name)
-      LIB_file.write('        direction : input;\n')
-      LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk%s;\n' % (w_clks[min(num_wport, len(w_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type : setup_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        } \n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin : clk%s;\n' % (w_clks[min(num_wport, len(w_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type : hold_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('    }\n')
-
-    for i in range(int(num_wport)) :
-      LIB_file.write('    bus(w_mask_w%s)   {\n' % (i + 1))
-      LIB_file.write('        bus_type : %s_DATA;\n' % name)
-      LIB_file.write('        memory_write() {\n')
-      LIB_file.write('            address : addr_w%s;\n' % (i + 1))
-      LIB_file.write('            clocked_on : "clk";\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        direction : input;\n')
-      LIB_file.write('        capacitance : %.3f;\n' % (min_driver_in_cap))
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin     : clk%s;\n' % (w_clks[min(num_wport, len(w_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type     : setup_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (tsetup, tsetup))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (tsetup, tsetup))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        } \n')
-      LIB_file.write('        timing() {\n')
-      LIB_file.write('            related_pin     : clk%s;\n' % (w_clks[min(num_wport, len(w_clks) - 1)] if len(unique_clks) != 1 else ''))
-      LIB_file.write('            timing_type     : hold_rising ;\n')
-      LIB_file.write('            rise_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_constraint(%s_constraint_template) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                index_2 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ( \\\n')
-      LIB_file.write('                  "%.3f, %.3f", \\\n' % (thold, thold))
-      LIB_file.write('                  "%.3f, %.3f" \\\n'  % (thold, thold))
-      LIB_file.write('                )\n')
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            when : "(! (we_in_w%s) )";\n' % (i + 1))
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('        internal_power(){\n')
-      LIB_file.write('            when : "(we_in_w%s)";\n' % (i + 1))
-      LIB_file.write('            rise_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('            fall_power(%s_energy_template_sigslew) {\n' % name)
-      LIB_file.write('                index_1 ("%s");\n' % slew_indicies)
-      LIB_file.write('                values ("%.3f, %.3f")\n' % (pindynamic, pindynamic))
-      LIB_file.write('            }\n')
-      LIB_file.write('        }\n')
-      LIB_file.write('    }\n')
-
-    LIB_file.write('    cell_leakage_power : %.3f;\n' % (leakage))
-    LIB_file.write('}\n')
-
-    LIB_file.write('\n')
-    LIB_file.write('}\n')
-
-    LIB_file.close()
+        out.append(LIB_CLK_PIN % dict(fields, clk=('' if len(unique_clks) == 1 else i), tables=clk_power))
+
+    for i in range(num_rwport):
+        out.append(output_bus('rd_out_rw%s' % (i + 1), 'addr_rw', clk_of(rw_clks, num_rwport)))
+    for i in range(num_rport):
+        out.append(output_bus('rd_out_r%s' % (i + 1), 'addr_r%s' % (i + 1), clk_of(r_clks, num_rport)))
+
+    for i in range(num_rwport):
+        out.append(input_pin('pin', 'we_in_rw%s' % (i + 1), None, clk_of(rw_clks, num_rwport)))
+    for i in range(num_wport):
+        out.append(input_pin('pin', 'we_in_w%s' % (i + 1), None, clk_of(w_clks, num_wport)))
+    for i in range(num_rwport):
+        out.append(input_pin('pin', 'ce_rw%s' % (i + 1), None, clk_of(rw_clks, num_rwport)))
+    for i in range(num_rport):
+        out.append(input_pin('pin', 'ce_r%s' % (i + 1), None, clk_of(r_clks, num_rport)))
+    for i in range(num_wport):
+        out.append(input_pin('pin', 'ce_w%s' % (i + 1), None, clk_of(w_clks, num_wport)))
+
+    for i in range(num_rwport):
+        out.append(input_pin('bus', 'addr_rw%s' % (i + 1), 'ADDRESS', clk_of(rw_clks, num_rwport)))
+    for i in range(num_rwport):
+        out.append(write_bus('wd_in_rw%s' % (i + 1), 'addr_rw%s' % (i + 1), 'clk%s' % clk_of(rw_clks, num_rwport), clk_of(rw_clks, num_rwport), 'we_in_rw%s' % (i + 1)))
+    for i in range(num_wport):
+        out.append(write_bus('wd_in_w%s' % (i + 1), 'addr_w%s' % (i + 1), 'clk', clk_of(w_clks, num_wport), 'we_in_w%s' % (i + 1)))
+    for i in range(num_rwport):
+        out.append(write_bus('w_mask_rw%s' % (i + 1), 'addr_rw%s' % (i + 1), 'clk', clk_of(rw_clks, num_rwport), 'we_in_rw%s' % (i + 1)))
+    for i in range(num_rport):
+        out.append(input_pin('bus', 'addr_r%s' % (i + 1), 'ADDRESS', clk_of(r_clks, num_rport)))
+    for i in range(num_wport):
+        out.append(input_pin('bus', 'addr_w%s' % (i + 1), 'ADDRESS', clk_of(w_clks, num_wport)))
+    for i in range(num_wport):
+        out.append(write_bus('w_mask_w%s' % (i + 1), 'addr_w%s' % (i + 1), 'clk', clk_of(w_clks, num_wport), 'we_in_w%s' % (i + 1)))
+
+    out.append(LIB_CELL_FOOTER % fields)
+
+    return ''.join(out)
+
+################################################################################
+# LIBERTY BLOCK TEMPLATES
+################################################################################
 
+LIB_HEADER = '''\
+library(%(name)s) {
+    technology (cmos);
+    delay_model : table_lookup;
+    revision : 1.0;
+    date : "%(date)s %(time)s";
+    comment : "SRAM";
+    time_unit : "1ns";
+    voltage_unit : "1V";
+    current_unit : "1uA";
+    leakage_power_unit : "1uW";
+    nom_process : 1;
+    nom_temperature : %(temperature).3f;
+    nom_voltage : %(voltage)s;
+    capacitive_load_unit (1,pf);
+
+    pulling_resistance_unit : "1kohm";
+
+    operating_conditions(%(conditions)s) {
+        process : 1;
+        temperature : %(temperature).3f;
+        voltage : %(voltage)s;
+        tree_type : balanced_tree;
+    }
+
+    /* default attributes */
+    default_cell_leakage_power : 0;
+    default_fanout_load : 1;
+    default_inout_pin_cap : 0.0;
+    default_input_pin_cap : 0.0;
+    default_output_pin_cap : 0.0;
+    default_input_pin_cap : 0.0;
+    default_max_transition : %(max_slew).3f;
+
+    default_operating_conditions : %(conditions)s;
+    default_leakage_power_density : 0.0;
+
+    /* additional header data */
+    slew_derate_from_library : 1.000;
+    slew_lower_threshold_pct_fall : 20.000;
+    slew_upper_threshold_pct_fall : 80.000;
+    slew_lower_threshold_pct_rise : 20.000;
+    slew_upper_threshold_pct_rise : 80.000;
+    input_threshold_pct_fall : 50.000;
+    input_threshold_pct_rise : 50.000;
+    output_threshold_pct_fall : 50.000;
+    output_threshold_pct_rise : 50.000;
+
+
+    lu_table_template(%(templates)s_mem_out_delay_template) {
+        variable_1 : input_net_transition;
+        variable_2 : total_output_net_capacitance;
+            index_1 ("%(slew_index)s");
+            index_2 ("%(load_index)s");
+    }
+    lu_table_template(%(templates)s_mem_out_slew_template) {
+        variable_1 : total_output_net_capacitance;
+            index_1 ("%(load_index)s");
+    }
+    lu_table_template(%(templates)s_constraint_template) {
+        variable_1 : related_pin_transition;
+        variable_2 : constrained_pin_transition;
+            index_1 ("%(slew_index)s");
+            index_2 ("%(slew_index)s");
+    }
+    power_lut_template(%(templates)s_energy_template_clkslew) {
+        variable_1 : input_transition_time;
+            index_1 ("%(slew_index)s");
+    }
+    power_lut_template(%(templates)s_energy_template_sigslew) {
+        variable_1 : input_transition_time;
+            index_1 ("%(slew_index)s");
+    }
+    library_features(report_delay_calculation);
+'''
+
+LIB_TYPE = '''\
+    type (%(name)s_%(type)s) {
+        base_type : array ;
+        data_type : bit ;
+        bit_width : %(width)d;
+        bit_from : %(width_m1)d;
+        bit_to : 0 ;
+        downto : true ;
+    }
+'''
+
+LIB_CELL_HEADER = '''\
+cell(%(name)s) {
+    area : %(area).3f;
+    interface_timing : true;
+    memory() {
+        type : ram;
+        address_width : %(addr_width)d;
+        word_width : %(bits)d;
+    }
+'''
+
+LIB_CELL_FOOTER = '''\
+    cell_leakage_power : %(leakage).3f;
+}
+'''
+
+LIB_FOOTER = '''\
+
+}
+'''
+
+LIB_CLK_PIN = '''\
+    pin(clk%(clk)s)   {
+        direction : input;
+        capacitance : %(clk_cap).3f;
+        clock : true;
+        min_period           : %(min_period).3f ;
+        internal_power(){
+%(tables)s\
+        }
+    }
+
+'''
+
+LIB_OUTPUT_BUS = '''\
+    bus(%(pin)s)   {
+        bus_type : %(name)s_DATA;
+        direction : output;
+        max_capacitance : %(max_load).3f;
+        memory_read() {
+            address : %(address)s;
+        }
+        timing() {
+            related_pin : "clk%(clk)s" ;
+            timing_type : rising_edge;
+            timing_sense : non_unate;
+%(tables)s\
+        }
+    }
+'''
+
+LIB_INPUT_PIN = '''\
+    %(group)s(%(pin)s)   {
+%(bus_type)s\
+        direction : input;
+        capacitance : %(cap).3f;
+'''
+
+LIB_WRITE_BUS = '''\
+    bus(%(pin)s)   {
+        bus_type : %(name)s_DATA;
+        memory_write() {
+            address : %(address)s;
+            clocked_on : "%(clocked_on)s";
+        }
+        direction : input;
+        capacitance : %(cap).3f;
+'''
+
+LIB_CONSTRAINT_TIMING = '''\
+        timing() {
+            related_pin%(pad)s : clk%(clk)s;
+            timing_type%(pad)s : %(timing_type)s ;
+%(tables)s\
+        }%(end)s
+'''
+
+LIB_INTERNAL_POWER = '''\
+        internal_power(){
+%(when)s\
+%(tables)s\
+        }
+'''
+
+LIB_DELAY_TABLES = '''\
+            cell_rise(%(templates)s_mem_out_delay_template) {
+                index_1 ("%(slew_indicies)s");
+                index_2 ("%(load_indicies)s");
+                values ( \\
+%(delays)s\
+                )
+            }
+            cell_fall(%(templates)s_mem_out_delay_template) {
+                index_1 ("%(slew_indicies)s");
+                index_2 ("%(load_indicies)s");
+                values ( \\
+%(delays)s\
+                )
+            }
+            rise_transition(%(templates)s_mem_out_slew_template) {
+                index_1 ("%(load_indicies)s");
+                values ("%(transitions)s")
+            }
+            fall_transition(%(templates)s_mem_out_slew_template) {
+                index_1 ("%(load_indicies)s");
+                values ("%(transitions)s")
+            }
+'''
+
+LIB_CONSTRAINT_TABLES = '''\
+            rise_constraint(%(templates)s_constraint_template) {
+                index_1 ("%(slew_indicies)s");
+                index_2 ("%(slew_indicies)s");
+                values ( \\
+%(values)s\
+                )
+            }
+            fall_constraint(%(templates)s_constraint_template) {
+                index_1 ("%(slew_indicies)s");
+                index_2 ("%(slew_indicies)s");
+                values ( \\
+%(values)s\
+                )
+            }
+'''
+
+LIB_POWER_TABLES = '''\
+            rise_power(%(templates)s_%(template)s) {
+                index_1 ("%(slew_indicies)s");
+                values ("%(values)s")
+            }
+            fall_power(%(templates)s_%(template)s) {
+                index_1 ("%(slew_indicies)s");
+                values ("%(values)s")
+            }
+'''
@@ -1,12 +1,21 @@
+import io
 import os
 import math
 
+from utils.view_file import open_view
+from utils.log import logger
+
 ################################################################################
 # Generate a .v file based on the given SRAM matching the exact interface
 ################################################################################
 
-def generate_verilog(mem, tmChkExpand=False):
+def generate_verilog(mem, tmChkExpand=False, compress=None):
   '''Generate a verilog view for the RAM'''
+  with open_view(os.sep.join([mem.results_dir, mem.name + '.v']), compress) as f:
+    f.write(render_verilog(mem, tmChkExpand))
+
+def render_verilog(mem, tmChkExpand=False):
+  '''Render the verilog view for the RAM'''
   name  = str(mem.name)
   depth = int(mem.depth)
   bits  = int(mem.width_in_bits)
@@ -21,13 +30,20 @@ def generate_verilog(mem, tmChkExpand=False):
 
   byte_write               = 1 if mem.write_granularity == 8 else 0
   # Change masking based on wether byte write attribute exists or not
+
+  # Storage model of the memory array (see VLOG_MODELS)
+  model                    = str(mem.vlog_model)
+  if model not in VLOG_MODELS:
+     logger.error(f"Verilog model '{model}' doesn't exist (use one of: {', '.join(VLOG_MODELS)})!")
+     exit(1)
   
   #############################################
   ###   Generate 'setuphold' timing checks  ###
   #############################################
 
-  # Shortened per-bit and per-signal checks
-  setuphold_checks=''
+  # Signals checked against the clock of each port: (clock suffix, signal, width)
+  checked = []
+  clk_suff = ''
   # rw ports setuphold check
   clk_ctr = 0
   for ct in range(mem.rw_ports):
@@ -36,16 +52,8 @@ def generate_verilog(mem, tmChkExpand=False):
    elif clk_ctr < len(rw_clks): 
       clk_suff=rw_clks[clk_ctr]
       clk_ctr+=1
-   setuphold_checks += f'      $setuphold (posedge clk{clk_suff}, we_in_rw{ct+1}, 0, 0, notifier);\n'
-   setuphold_checks += f'      $setuphold (posedge clk{clk_suff}, ce_rw{ct+1}, 0, 0, notifier);\n'
-   if tmChkExpand: # per-bit
-      for i in range(addr_width): setuphold_checks += f'      $setuphold (posedge clk{clk_suff}, addr_rw{ct+1}{i}, 0, 0, notifier);\n'
-      for i in range(      bits): setuphold_checks += f'      $setuphold (posedge clk{clk_suff}, wd_in{ct+1}{i}, 0, 0, notifier);\n'
-      for i in range(      bits): setuphold_checks += f'      $setuphold (posedge clk{clk_suff}, w_mask_rw{ct+1}{i}, 0, 0, notifier);\n'
-   else:           # per-sig
-      setuphold_checks += f'      $setuphold (posedge clk{clk_suff}, addr_rw{ct+1}, 0, 0, notifier);\n'
-      setuphold_checks += f'      $setuphold (posedge clk{clk_suff}, wd_in{ct+1}, 0, 0, notifier);\n'
-      setuphold_checks += f'      $setuphold (posedge clk{clk_suff}, w_mask_rw{ct+1}, 0, 0, notifier);\n'
+   checked += [(clk_suff, f'we_in_rw{ct+1}', 1), (clk_suff, f'ce_rw{ct+1}', 1), (clk_suff, f'addr_rw{ct+1}', addr_width),
+               (clk_suff, f'wd_in_rw{ct+1}', bits), (clk_suff, f'w_mask_rw{ct+1}', bits)]
   # r ports setuphold check
   clk_ctr = 0
   for ct in range(mem.r_ports):
@@ -53,12 +61,7 @@ def generate_verilog(mem, tmChkExpand=False):
    elif clk_ctr < len(r_clks): 
       clk_suff=r_clks[clk_ctr]
       clk_ctr+=1
-   setuphold_checks += f'      $setuphold (posedge clk{clk_suff}, ce_r{ct+1}, 0, 0, notifier);\n'
-   if tmChkExpand: # per-bit
-      for i in range(addr_width): setuphold_checks += f'      $setuphold (posedge clk{clk_suff}, addr_r{ct+1}{i}, 0, 0, notifier);\n'
-   else:           # per-sig
-      setuphold_checks += f'      $setuphold (posedge clk{clk_suff}, addr_r{ct+1}, 0, 0, notifier);\n'
-  
+   checked += [(clk_suff, f'ce_r{ct+1}', 1), (clk_suff, f'addr_r{ct+1}', addr_width)]
   # w ports setuphold check
   clk_ctr = 0
   for ct in range(mem.w_ports):
@@ -66,61 +69,64 @@ def generate_verilog(mem, tmChkExpand=False):
    elif clk_ctr < len(w_clks): 
       clk_suff=w_clks[clk_ctr]
       clk_ctr+=1
-   setuphold_checks += f'      $setuphold (posedge clk{clk_suff}, ce_w{ct+1}, 0, 0, notifier);\n'
-   if tmChkExpand: # per-bit
-      for i in range(addr_width): setuphold_checks += f'      $setuphold (posedge clk{clk_suff}, addr_w{ct+1}{i}, 0, 0, notifier);\n'
-      for i in range(      bits): setuphold_checks += f'      $setuphold (posedge clk{clk_suff}, wd_in_w{ct+1}{i}, 0, 0, notifier);\n'
-      for i in range(      bits): setuphold_checks += f'      $setuphold (posedge clk{clk_suff}, w_mask_w{ct+1}{i}, 0, 0, notifier);\n'
-   else:           # per-sig
-      setuphold_checks += f'      $setuphold (posedge clk{clk_suff}, addr_w{ct+1}, 0, 0, notifier);\n'
-      setuphold_checks += f'      $setuphold (posedge clk{clk_suff}, wd_in_w{ct+1}, 0, 0, notifier);\n'
-      setuphold_checks += f'      $setuphold (posedge clk{clk_suff}, w_mask_w{ct+1}, 0, 0, notifier);\n'
+   checked += [(clk_suff, f'ce_w{ct+1}', 1), (clk_suff, f'addr_w{ct+1}', addr_width),
+               (clk_suff, f'wd_in_w{ct+1}', bits), (clk_suff, f'w_mask_w{ct+1}', bits)]
+  tm_chk_mode = get_timing_check_mode(tmChkExpand)
+  setuphold_checks, setuphold_loops = generate_setuphold_checks(name, checked, tm_chk_mode)
   #################################################
   ###   END Generate 'setuphold' timing checks  ###
   #################################################
-  fout = os.sep.join([mem.results_dir, name + '.v'])
-
-  with open(fout, 'w') as f:
-   TEMPLATE_MAPPING = {
-      "1r1w"  : VLOG_TEMPLATE_1r1w,
-      "2r1w"  : VLOG_TEMPLATE_2r1w,
-      "1rw1r" : VLOG_TEMPLATE_1rw1r,
-      "1rw"   : VLOG_TEMPLATE_1rw
-   } 
+  with io.StringIO() as f:
    MEM_CONFIG       = {
       "name": name,
       "data_width" : bits,
       "depth" : depth,
       "addr_width" : addr_width,
       "crpt_on_x" : crpt_on_x,
-      "setuphold_checks": setuphold_checks
+      "setuphold_checks": setuphold_checks,
+      "setuphold_loops": setuphold_loops,
+      "mem_decl" : VLOG_MEM_DECL[model] + (VLOG_PRELOAD[model].format(name=name) if mem.vlog_preload else ''),
+      "corrupt_mem" : VLOG_CORRUPT_MEM[model],
+      "corrupt_note" : VLOG_CORRUPT_NOTE[model],
+      "x_begin" : VLOG_X_BEGIN[model],
+      "x_else" : VLOG_X_ELSE[model],
+      "x_end" : VLOG_X_END[model],
+      "read_r1" : generate_mem_read("addr_r1", model)
    }
    # Memory Specific configs:
    if mem.port_config == "1r1w":
-      MEM_CONFIG["start_of_rw_p1"] = generate_start_mode_priority(write_mode, "rd_out_r1", "addr_r1", "ce_r1")
-      MEM_CONFIG["end_of_rw_p1"] = generate_end_mode_priority(write_mode, "rd_out_r1", "addr_r1", "ce_r1")
-      MEM_CONFIG["byte_write_logic"] = generate_byte_write_logic(byte_write, bits // 8, 'w1')
+      MEM_CONFIG["start_of_rw_p1"] = generate_start_mode_priority(write_mode, "rd_out_r1", "addr_r1", "ce_r1", model)
+      MEM_CONFIG["end_of_rw_p1"] = generate_end_mode_priority(write_mode, "rd_out_r1", "addr_r1", "ce_r1", model)
+      MEM_CONFIG["byte_write_logic"] = generate_byte_write_logic(byte_write, bits // 8, 'w1', model, bits)
    elif mem.port_config == "2r1w":
-      MEM_CONFIG["start_of_rw_p1"] = generate_start_mode_priority(write_mode, "rd_out_r1", "addr_r1", "ce_r1")
-      MEM_CONFIG["end_of_rw_p1"] = generate_end_mode_priority(write_mode, "rd_out_r1", "addr_r1", "ce_r1")
-      MEM_CONFIG["start_of_rw_p2"] = generate_start_mode_priority(write_mode, "rd_out_r2", "addr_r2", "ce_r2")
-      MEM_CONFIG["end_of_rw_p2"] = generate_end_mode_priority(write_mode, "rd_out_r2", "addr_r2", "ce_r2")
-      MEM_CONFIG["byte_write_logic"] = generate_byte_write_logic(byte_write, bits // 8, 'w1')
+      MEM_CONFIG["start_of_rw_p1"] = generate_start_mode_priority(write_mode, "rd_out_r1", "addr_r1", "ce_r1", model)
+      MEM_CONFIG["end_of_rw_p1"] = generate_end_mode_priority(write_mode, "rd_out_r1", "addr_r1", "ce_r1", model)
+      MEM_CONFIG["start_of_rw_p2"] = generate_start_mode_priority(write_mode, "rd_out_r2", "addr_r2", "ce_r2", model)
+      MEM_CONFIG["end_of_rw_p2"] = generate_end_mode_priority(write_mode, "rd_out_r2", "addr_r2", "ce_r2", model)
+      MEM_CONFIG["byte_write_logic"] = generate_byte_write_logic(byte_write, bits // 8, 'w1', model, bits)
    elif mem.port_config == "1rw1r" or mem.port_config == "1rw":
-      MEM_CONFIG["start_of_rw_p1"] = generate_start_mode_priority(write_mode, "rd_out_rw1", "addr_rw1")
-      MEM_CONFIG["end_of_rw_p1"] = generate_end_mode_priority(write_mode, "rd_out_rw1", "addr_rw1")
-      MEM_CONFIG["byte_write_logic"] = generate_byte_write_logic(byte_write, bits // 8, 'rw1')
+      MEM_CONFIG["start_of_rw_p1"] = generate_start_mode_priority(write_mode, "rd_out_rw1", "addr_rw1", None, model)
+      MEM_CONFIG["end_of_rw_p1"] = generate_end_mode_priority(write_mode, "rd_out_rw1", "addr_rw1", None, model)
+      MEM_CONFIG["byte_write_logic"] = generate_byte_write_logic(byte_write, bits // 8, 'rw1', model, bits)
    elif mem.port_config not in TEMPLATE_MAPPING:
-      print(f"Listed config '{mem.port_config}' doesn't exist!\nExiting...\n")
+      logger.error(f"Listed config '{mem.port_config}' doesn't exist!")
       exit(1)
    # Generate RW port logic based on write mode
    f.write(TEMPLATE_MAPPING[mem.port_config].format(**MEM_CONFIG))
+   if tm_chk_mode == 'generate':
+      f.write(VLOG_SETUPHOLD_CHECKER.format(name=name))
+   return f.getvalue()
 
    
 
 
-def generate_verilog_bb(mem):
+def generate_verilog_bb(mem, compress=None):
   '''Generate a verilog black-box view for the RAM'''
+  with open_view(os.sep.join([mem.results_dir, mem.name + '.bb.v']), compress) as f:
+    f.write(render_verilog_bb(mem))
+
+def render_verilog_bb(mem):
+  '''Render the verilog black-box view for the RAM'''
   name  = str(mem.name)
   depth = int(mem.depth)
   bits  = int(mem.width_in_bits)
@@ -128,15 +134,8 @@ def generate_verilog_bb(mem):
   has_rport = hasattr(mem, 'r_ports') and mem.r_ports > 0
   byte_write = hasattr(mem, 'write_granularity') and mem.write_granularity == 8
   crpt_on_x = 1
-  fout = os.sep.join([mem.results_dir, name + '.bb.v'])
-  with open(fout, 'w') as f:
+  with io.StringIO() as f:
       # Prepare byte-write parameters for black box
-      BB_TEMPLATE_MAPPING = {
-         "1r1w"  : VLOG_BB_TEMPLATE_1r1w,
-         "2r1w"  : VLOG_BB_TEMPLATE_2r1w,
-         "1rw1r" : VLOG_BB_TEMPLATE_1rw1r,
-         "1rw"   : VLOG_BB_TEMPLATE_1rw
-      } 
       # Configs that all fakeram memory will require 
       BB_MEM_CONFIG       = {
          "name": name,
@@ -147,40 +146,84 @@ def generate_verilog_bb(mem):
       }
 
       if mem.port_config not in BB_TEMPLATE_MAPPING:
-         print(f"Listed config '{mem.port_config}' doesn't exist!\n")
+         logger.error(f"Listed config '{mem.port_config}' doesn't exist!")
          exit(1)
 
       f.write(BB_TEMPLATE_MAPPING[mem.port_config].format(**BB_MEM_CONFIG))
+      return f.getvalue()
+
+def get_timing_check_mode(tmChkExpand):
+  '''Timing check mode (see TIMING_CHECK_MODES) of a tmChkExpand setting, which
+  is either a mode or a bool (true expands the checks per bit)'''
+  if isinstance(tmChkExpand, str):
+    return tmChkExpand
+  return 'bit' if tmChkExpand else 'signal'
+
+def generate_setuphold_checks(name, checked, mode='signal'):
+  '''Setup/hold checks of every (clock suffix, signal, width) for the specify
+  block, and the generate loops placed after it (generate mode only). The
+  per-bit checks of a bus are built with a single join, so their cost is
+  linear in the number of bits (the strings are only appended to once per
+  signal).'''
+  if mode not in TIMING_CHECK_MODES:
+    logger.error(f"Timing check mode '{mode}' doesn't exist (use one of: {', '.join(TIMING_CHECK_MODES)})!")
+    exit(1)
+  checks, loops = '', ''
+  for clk_suff, sig, width in checked:
+    if mode == 'signal' or width == 1:
+      checks += f'      $setuphold (posedge clk{clk_suff}, {sig}, 0, 0, notifier);\n'
+    elif mode == 'bit':
+      pre, post = f'      $setuphold (posedge clk{clk_suff}, {sig}[', '], 0, 0, notifier);\n'
+      checks += pre + (post + pre).join(map(str, range(width))) + post
+    else:
+      loops += VLOG_SETUPHOLD_LOOP.format(name=name, clk_suff=clk_suff, sig=sig, width=width)
+  if loops:
+    loops = '   genvar tc_i;\n' + loops
+  return checks, loops
+
+# Read of one word of the memory array for the given model
+def generate_mem_read(addrname, model='dense'):
+   if model not in VLOG_DIRECT_MODELS:
+      return f"mem_read({addrname})"
+   return f"mem[{addrname}]"
 
 # Dynamic write mode setup. Specialized check for ce read mode
-def generate_start_mode_priority(write_mode, regname, addrname, ce_r=None,):
+def generate_start_mode_priority(write_mode, regname, addrname, ce_r=None, model='dense'):
+   read = generate_mem_read(addrname, model)
    if write_mode == 'read_first':
       if (ce_r):
          return f'''      
          if ({ce_r})
-            {regname} <= mem[{addrname}];
+            {regname} <= {read};{VLOG_X_BEGIN[model]}
          else
-            {regname} <= 'x;'''
+            {regname} <= 'x;{VLOG_X_END[model]}'''
       else:
-         return f"{regname} <= mem[{addrname}];"
+         return f"{regname} <= {read};"
    else:
       return ''
 
-def generate_end_mode_priority(write_mode, regname, addrname, ce_r=None,):
+def generate_end_mode_priority(write_mode, regname, addrname, ce_r=None, model='dense'):
+   read = generate_mem_read(addrname, model)
    if write_mode == 'read_first':
       return ''
    else:
       if (ce_r):
          return f'''      
          if ({ce_r})
-            {regname} <= mem[{addrname}];
+            {regname} <= {read};{VLOG_X_BEGIN[model]}
          else
-            {regname} <= 'x;'''
+            {regname} <= 'x;{VLOG_X_END[model]}'''
       else:
-         return f"{regname} <= mem[{addrname}];"
+         return f"{regname} <= {read};"
 
-def generate_byte_write_logic(byte_write, num_bytes, portnum):
+def generate_byte_write_logic(byte_write, num_bytes, portnum, model='dense', bits=0):
   '''Generate the byte-write logic for memories that support it'''
+  if model not in VLOG_DIRECT_MODELS:
+    if not byte_write:
+      return f'mem_write(addr_{portnum}, wd_in_{portnum}, w_mask_{portnum});'
+    # Writes the same bits as the dense array, with the byte lane folded into the mask
+    lane_mask = (0xff << (num_bytes*8)) & ((1 << bits) - 1)
+    return f"mem_write(addr_{portnum}, wd_in_{portnum}, w_mask_{portnum} & {bits}'h{lane_mask:x});"
   if not byte_write:
     return f'mem[addr_{portnum}] <= (wd_in_{portnum} & w_mask_{portnum}) | (mem[addr_{portnum}] & ~w_mask_{portnum});'
   else:
@@ -215,7 +258,7 @@ module {name}
    input                    ce_r1;
    input                    ce_w1;
 
-   reg    [BITS-1:0]        mem [0:WORD_DEPTH-1];
+{mem_decl}
    integer j;
 
    always @(posedge clk)
@@ -223,13 +266,12 @@ module {name}
       // Write port
       {start_of_rw_p1}
       if (ce_w1)
-      begin
-         if (corrupt_mem_on_X_p && ((^we_in_w === 1'bx) || (^addr_w === 1'bx)))
+      begin{x_begin}
+         if (corrupt_mem_on_X_p && ((^we_in_w1 === 1'bx) || (^addr_w1 === 1'bx)))
          begin
-            for (j = 0; j < WORD_DEPTH; j = j + 1)
-               mem[j] <= 'x;
+{corrupt_mem}
          end
-         else if (we_in_w1)
+         else{x_else}if (we_in_w1)
          begin
             {byte_write_logic}
          end
@@ -245,7 +287,7 @@ module {name}
       $period    (posedge clk, 0, notifier);
 {setuphold_checks}
    endspecify
-   `endif
+{setuphold_loops}   `endif
 
 endmodule
 '''
@@ -284,7 +326,7 @@ module {name}
    input                    ce_r2;
    input                    ce_w1;
 
-   reg    [BITS-1:0]        mem [0:WORD_DEPTH-1];
+{mem_decl}
    integer j;
 
    always @(posedge clk)
@@ -293,19 +335,18 @@ module {name}
       {start_of_rw_p2}
       // Write port
       if (ce_w1)
-      begin
-         if (corrupt_mem_on_X_p && ((^we_in_w === 1'bx) || (^addr_w === 1'bx)))
+      begin{x_begin}
+         if (corrupt_mem_on_X_p && ((^we_in_w1 === 1'bx) || (^addr_w1 === 1'bx)))
          begin
-            for (j = 0; j < WORD_DEPTH; j = j + 1)
-               mem[j] <= 'x;
+{corrupt_mem}
          end
-         else if (we_in_w1)
+         else{x_else}if (we_in_w1)
          begin
             {byte_write_logic}
          end
       end
       {end_of_rw_p1}
-      {end_of_rw_p1}
+      {end_of_rw_p2}
    end
 
    `ifdef SRAM_TIMING
@@ -318,7 +359,7 @@ module {name}
       $period    (posedge clk, 0, notifier);
 {setuphold_checks}
    endspecify
-   `endif
+{setuphold_loops}   `endif
 endmodule '''
 
 VLOG_TEMPLATE_1rw1r = '''\
@@ -350,16 +391,16 @@ module {name} (
    input  [BITS-1:0]        w_mask_rw1;
    input  [ADDR_WIDTH-1:0]  addr_rw1;
    input  [BITS-1:0]        wd_in_rw1;
-   output [BITS-1:0]        rd_out_rw1;
+   output reg [BITS-1:0]    rd_out_rw1;
    
    // Port 1: R
    input                    clk1;
    input                    ce_r1;
    input  [ADDR_WIDTH-1:0]  addr_r1;
-   output [BITS-1:0]        rd_out_r1;
+   output reg [BITS-1:0]    rd_out_r1;
 
    // Memory array
-   reg    [BITS-1:0]        mem [0:WORD_DEPTH-1];
+{mem_decl}
 
    integer i;
 
@@ -378,7 +419,7 @@ module {name} (
    
    always @(posedge clk1) begin
       if (ce_r1) begin  // Active low chip select
-         rd_out_r1 <= mem[addr_r1];
+         rd_out_r1 <= {read_r1};
       end
    end
    
@@ -399,7 +440,7 @@ module {name} (
       $period    (posedge clk1,              0,    notifier);
 {setuphold_checks}
    endspecify
-   `endif
+{setuphold_loops}   `endif
 
 endmodule
 '''
@@ -428,7 +469,7 @@ module {name}
    input                    clk;
    input                    ce_rw1;
 
-   reg    [BITS-1:0]        mem [0:WORD_DEPTH-1];
+{mem_decl}
 
    integer j;
 
@@ -436,34 +477,33 @@ module {name}
    begin
       if (ce_rw1)
       begin
-         {start_of_rw_p1}
+         {start_of_rw_p1}{x_begin}
          if (corrupt_mem_on_X_p &&
              ((^we_in_rw1 === 1'bx) || (^addr_rw1 === 1'bx))
             )
          begin
-            // WEN or ADDR is unknown, so corrupt entire array (using unsynthesizeable for loop)
-            for (j = 0; j < WORD_DEPTH; j = j + 1)
-               mem[j] <= 'x;
+            // WEN or ADDR is unknown, so corrupt entire array ({corrupt_note})
+{corrupt_mem}
          end
-         else if (we_in_rw1)
+         else{x_else}if (we_in_rw1)
          begin
             {byte_write_logic}
          end
          // read
          {end_of_rw_p1}
-      end
+      end{x_begin}
       else
       begin
          // Make sure read fails if ce_in is low
-         rd_out <= 'x;
-      end
+         rd_out_rw1 <= 'x;
+      end{x_end}
    end
 
    // Timing check placeholders (will be replaced during SDF back-annotation)
    reg notifier;
    specify
       // Delay from clk to rd_out
-      (posedge clk *> rd_out_r1) = (0, 0);
+      (posedge clk *> rd_out_rw1) = (0, 0);
 
       // Timing checks
       $width     (posedge clk,               0, 0, notifier);
@@ -471,7 +511,7 @@ module {name}
       $period    (posedge clk,               0,    notifier);
 {setuphold_checks}
    endspecify
-
+{setuphold_loops}
 endmodule
 '''
 VLOG_BB_TEMPLATE_1r1w = '''\
@@ -603,4 +643,199 @@ module {name}
    input                    ce_rw1;
 
 endmodule
-'''
\ No newline at end of file
+'''
+
+# Verilog templates for each port configuration
+TEMPLATE_MAPPING = {
+   "1r1w"  : VLOG_TEMPLATE_1r1w,
+   "2r1w"  : VLOG_TEMPLATE_2r1w,
+   "1rw1r" : VLOG_TEMPLATE_1rw1r,
+   "1rw"   : VLOG_TEMPLATE_1rw
+}
+
+BB_TEMPLATE_MAPPING = {
+   "1r1w"  : VLOG_BB_TEMPLATE_1r1w,
+   "2r1w"  : VLOG_BB_TEMPLATE_2r1w,
+   "1rw1r" : VLOG_BB_TEMPLATE_1rw1r,
+   "1rw"   : VLOG_BB_TEMPLATE_1rw
+}
+
+# Storage models of the memory array. The dense model is a plain verilog array.
+# The sparse model is a SystemVerilog associative array that only allocates the
+# words that have been written, for deep memories where a test only touches a
+# small part of the address space. The epoch model is a dense array that
+# corrupts the whole array in constant time: every word is stamped with the
+# corruption epoch it was written in and words from an older epoch read as X.
+# The two_state model is the dense array for two-state simulators such as
+# verilator, see VLOG_TWO_STATE_MEM_DECL. The models other than dense and
+# two_state access the array through mem_read/mem_write.
+VLOG_MODELS = ["dense", "sparse", "epoch", "two_state"]
+VLOG_DIRECT_MODELS = ["dense", "two_state"]
+
+# Masked write, addresses outside of the array are ignored (like the dense array)
+VLOG_MEM_WRITE_TASK = '''\
+   task mem_write(input [ADDR_WIDTH-1:0] addr, input [BITS-1:0] data, input [BITS-1:0] mask);
+      if (addr < WORD_DEPTH)
+      begin
+         mem[addr] <= (data & mask) | (mem_read(addr) & ~mask);{stamp}
+      end
+   endtask'''
+
+VLOG_SPARSE_MEM_DECL = '''\
+   // Sparse storage, only the words that have been written are allocated
+   typedef logic [ADDR_WIDTH-1:0] addr_t;
+   reg    [BITS-1:0]        mem [addr_t];
+   reg                      mem_corrupt = 1'b0;
+
+   // Words that were never written (or were corrupted) read as X
+   function automatic [BITS-1:0] mem_read(input [ADDR_WIDTH-1:0] addr);
+      mem_read = mem.exists(addr) ? mem[addr] : {BITS{1'bx}};
+   endfunction
+
+   // Masked write, addresses outside of the array are ignored (like the dense array)
+''' + VLOG_MEM_WRITE_TASK.format(stamp='') + '''
+
+   // Corrupting the whole array drops every word once the nonblocking
+   // assignments of the time step are done (like the dense array)
+   always @(posedge mem_corrupt)
+   begin
+      mem.delete();
+      mem_corrupt <= 1'b0;
+   end'''
+
+VLOG_EPOCH_MEM_DECL = '''\
+   // Dense storage, every word is stamped with the corruption epoch it was
+   // last written in. Words are never written at start up, which reads as X
+   // just like the uninitialized dense array.
+   reg    [BITS-1:0]        mem [0:WORD_DEPTH-1];
+   integer                  mem_stamp [0:WORD_DEPTH-1];
+   integer                  mem_epoch = 0;
+
+   // Words written before the last corruption read as X
+   function automatic [BITS-1:0] mem_read(input [ADDR_WIDTH-1:0] addr);
+      mem_read = (mem_stamp[addr] === mem_epoch) ? mem[addr] : {BITS{1'bx}};
+   endfunction
+
+   // Masked write, addresses outside of the array are ignored (like the dense array)
+''' + VLOG_MEM_WRITE_TASK.format(stamp='\n         mem_stamp[addr] <= mem_epoch;')
+
+# Defining SRAM_TWO_STATE leaves out every X path of the two_state model (the
+# X checks of the write enable and address, the corruption loop over the whole
+# array and the X reads of disabled ports), none of which a two-state
+# simulator can model and all of which it compiles into slow code. The array
+# is a plain unpacked array of packed words, which verilator stores as one
+# contiguous C++ array of native words, and it is public so a C++ testbench
+# can read and write it directly instead of going through the ports.
+VLOG_TWO_STATE_MEM_DECL = '''\
+   // Two-state storage, build with +define+SRAM_TWO_STATE to leave out the X paths
+   reg    [BITS-1:0]        mem [0:WORD_DEPTH-1] /*verilator public_flat_rw*/;'''
+
+VLOG_MEM_DECL = {
+   "dense"  : "   reg    [BITS-1:0]        mem [0:WORD_DEPTH-1];",
+   "two_state" : VLOG_TWO_STATE_MEM_DECL,
+   "sparse" : VLOG_SPARSE_MEM_DECL,
+   "epoch"  : VLOG_EPOCH_MEM_DECL
+}
+
+# Preload and backdoor access, added after the memory declaration when the
+# preload option is on. None of it touches the ports.
+VLOG_PRELOAD_TEMPLATE = '''
+
+   // Preload and backdoor access (the ports behave exactly the same). At time
+   // zero every instance loads the file given with +{{name}}_preload=<file>
+   // ($readmemh) or +{{name}}_preload_bin=<file> ($readmemb). Each instance
+   // can also load a file and read or write single words directly, eg.
+   // tb.dut.ram.backdoor_write(addr, data). Backdoor accesses take effect
+   // immediately, before the port writes of the same time step.
+   reg    [8*1024-1:0]      preload_file;
+   initial
+   begin{preload_wait}
+      if ($value$plusargs("{{name}}_preload=%s", preload_file))
+         backdoor_load(preload_file, 1'b0);
+      else if ($value$plusargs("{{name}}_preload_bin=%s", preload_file))
+         backdoor_load(preload_file, 1'b1);
+   end
+
+   task backdoor_load(input [8*1024-1:0] file, input binary);{load_vars}
+      begin{load_prepare}
+         if (binary) $readmemb(file, mem);
+         else        $readmemh(file, mem);{load_finish}
+      end
+   endtask
+
+   task backdoor_write(input [ADDR_WIDTH-1:0] addr, input [BITS-1:0] data);
+      begin
+         mem[addr] = data;{write_stamp}
+      end
+   endtask
+
+   function [BITS-1:0] backdoor_read(input [ADDR_WIDTH-1:0] addr);
+      backdoor_read = {read};
+   endfunction'''
+
+VLOG_PRELOAD = {
+   "dense"  : VLOG_PRELOAD_TEMPLATE.format(preload_wait='', load_vars='', load_prepare='', load_finish='', write_stamp='', read='mem[addr]'),
+   "sparse" : VLOG_PRELOAD_TEMPLATE.format(preload_wait='', load_vars='', load_prepare='', load_finish='', write_stamp='', read='mem_read(addr)'),
+   # Words missing from the file keep reading as X, then every word joins the
+   # current epoch (so the load waits for mem_epoch to be initialized)
+   "epoch"  : VLOG_PRELOAD_TEMPLATE.format(
+      preload_wait="\n      #0;",
+      load_vars="\n      integer k;",
+      load_prepare="\n         for (k = 0; k < WORD_DEPTH; k = k + 1)"
+                   "\n            if (mem_stamp[k] !== mem_epoch) mem[k] = {{BITS{{1'bx}}}};",
+      load_finish="\n         for (k = 0; k < WORD_DEPTH; k = k + 1)"
+                  "\n            mem_stamp[k] = mem_epoch;",
+      write_stamp="\n         mem_stamp[addr] = mem_epoch;",
+      read='mem_read(addr)'),
+   "two_state" : VLOG_PRELOAD_TEMPLATE.format(preload_wait='', load_vars='', load_prepare='', load_finish='', write_stamp='', read='mem[addr]')
+}
+
+VLOG_CORRUPT_MEM = {
+   "dense"  : "            for (j = 0; j < WORD_DEPTH; j = j + 1)\n               mem[j] <= 'x;",
+   "sparse" : "            mem_corrupt <= 1'b1;",
+   "epoch"  : "            mem_epoch <= mem_epoch + 1;",
+   "two_state" : "            for (j = 0; j < WORD_DEPTH; j = j + 1)\n               mem[j] <= 'x;"
+}
+
+VLOG_CORRUPT_NOTE = {
+   "dense"  : "using unsynthesizeable for loop",
+   "sparse" : "by dropping every stored word",
+   "epoch"  : "by starting a new epoch",
+   "two_state" : "using unsynthesizeable for loop"
+}
+
+# Start and end of the X paths of each model, and the else before the write
+# that follows the X check
+VLOG_X_BEGIN = {model: "" for model in VLOG_MODELS}
+VLOG_X_END   = {model: "" for model in VLOG_MODELS}
+VLOG_X_ELSE  = {model: " " for model in VLOG_MODELS}
+VLOG_X_BEGIN["two_state"] = "\n   `ifndef SRAM_TWO_STATE"
+VLOG_X_END["two_state"]   = "\n   `endif"
+VLOG_X_ELSE["two_state"]  = "\n   `endif\n         "
+
+# Timing check modes: one check per signal (the simulator checks every bit of
+# a vector), one check per bit unrolled in the specify block, or one check per
+# bit from generate loops over a single bit checker module (the specify block
+# of the checker holds the only $setuphold, so the per bit coverage does not
+# grow the source).
+TIMING_CHECK_MODES = ["signal", "bit", "generate"]
+
+VLOG_SETUPHOLD_LOOP = '''\
+   generate
+      for (tc_i = 0; tc_i < {width}; tc_i = tc_i + 1) begin : {sig}_setuphold
+         {name}_setuphold_check check (.clk(clk{clk_suff}), .d({sig}[tc_i]));
+      end
+   endgenerate
+'''
+
+VLOG_SETUPHOLD_CHECKER = '''
+// Setup/hold check of a single bit, one instance for every bit of a bus of {name}
+module {name}_setuphold_check (clk, d);
+   input clk;
+   input d;
+   reg notifier;
+   specify
+      $setuphold (posedge clk, d, 0, 0, notifier);
+   endspecify
+endmodule
+'''
@@ -0,0 +1,45 @@
+import sys
+import logging
+
+################################################################################
+# LOGGING
+#
+# Messages of the generator go through the "fakeram" logger. They are written
+# to whatever sys.stdout is at the time (so the output of a single SRAM can
+# still be captured with redirect_stdout, or sent to its log file by the --jobs
+# workers), info messages as they are and the other levels behind their level
+# name, eg. "WARNING: ...". The details of every SRAM (sizes, pin counts) are
+# debug messages. run.py shows them with --verbose, and --quiet only leaves the
+# warnings and errors. A handler can also be added to forward every message
+# somewhere else, such as the event stream (see progress.py).
+################################################################################
+
+LOG_LEVELS = {
+  'debug'   : logging.DEBUG,
+  'info'    : logging.INFO,
+  'warning' : logging.WARNING,
+  'error'   : logging.ERROR,
+}
+
+class StdoutHandler( logging.Handler ):
+
+  def emit( self, record ):
+    try:
+      prefix = '' if record.levelno == logging.INFO else record.levelname + ': '
+      sys.stdout.write(prefix + record.getMessage() + '\n')
+    except Exception:
+      self.handleError(record)
+
+logger = logging.getLogger('fakeram')
+logger.addHandler(StdoutHandler())
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+# set_level: show the messages of this level ('debug', 'info', 'warning' or
+# 'error') and above
+def set_level( level ):
+  logger.setLevel(LOG_LEVELS[level])
+
+# get_level: name of the level currently shown
+def get_level():
+  return logging.getLevelName(logger.level).lower()
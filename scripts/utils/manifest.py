@@ -0,0 +1,92 @@
+import os
+import json
+import glob
+import hashlib
+import functools
+
+from utils.view_file import view_suffix
+from utils.atomic_file import atomic_open
+
+################################################################################
+# MACRO MANIFESTS
+#
+# A manifest records everything that went into the views of one SRAM: the
+# process fields, the SRAM's entry in the json configuration file, the version
+# of the generator code, the identity of the cacti binary and any command line
+# options that change the generated views. It is written next to the views
+# once they have all been generated, and a later run whose manifest matches can
+# skip the SRAM entirely.
+################################################################################
+
+# Views that must exist (on top of a matching manifest) to skip an SRAM
+VIEW_EXTENSIONS = ['.lib', '.lef', '.v', '.bb.v']
+
+# generator_version: hash of the generator source code (run.py and utils/)
+@functools.lru_cache(maxsize=None)
+def generator_version():
+  scripts_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+  sources = [os.sep.join([scripts_dir, 'run.py'])] + sorted(glob.glob(os.sep.join([scripts_dir, 'utils', '*.py'])))
+  h = hashlib.sha256()
+  for source in sources:
+    with open(source, 'rb') as fid:
+      h.update(os.path.basename(source).encode())
+      h.update(fid.read())
+  return h.hexdigest()
+
+def _hash_json( data ):
+  return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode()).hexdigest()
+
+# get_manifest: build the manifest for an SRAM. views lists the suffixes of
+# any views written on top of VIEW_EXTENSIONS (eg. the corner libraries) and
+# compress the compression of the view files (see view_file.py).
+def get_manifest( process, sram_data, cacti_id, options = None, views = None, compress = None ):
+  manifest = {
+    'name'      : str(sram_data['name']),
+    'process'   : _hash_json(vars(process)),
+    'sram'      : _hash_json(sram_data),
+    'generator' : generator_version(),
+    'cacti'     : str(cacti_id),
+    'options'   : _hash_json(options if options else {}),
+  }
+  if views:
+    manifest['views'] = list(views)
+  if compress:
+    manifest['compression'] = str(compress)
+  manifest['digest'] = _hash_json(manifest)
+  return manifest
+
+def manifest_path( results_dir, name ):
+  return os.sep.join([results_dir, name + '.manifest.json'])
+
+# read_manifest: the manifest on disk for an SRAM (None if there is none)
+def read_manifest( results_dir, name ):
+  try:
+    with open(manifest_path(results_dir, name), 'r') as fid:
+      return json.load(fid)
+  except (OSError, ValueError):
+    return None
+
+# is_up_to_date: true if the manifest on disk matches and every view exists
+def is_up_to_date( results_dir, manifest ):
+  name = manifest['name']
+  old_manifest = read_manifest(results_dir, name)
+  if old_manifest is None or old_manifest.get('digest') != manifest['digest']:
+    return False
+  suffix = view_suffix(manifest.get('compression'))
+  return all(os.path.exists(os.sep.join([results_dir, name + ext + suffix])) for ext in VIEW_EXTENSIONS + manifest.get('views', []))
+
+# write_manifest: record the manifest once all of the views have been written.
+# Written atomically so a crash can never leave behind a manifest that looks
+# valid. Extra fields that are not part of the digest (such as the modeled PPA
+# numbers) can be stored alongside it.
+def write_manifest( results_dir, manifest ):
+  with atomic_open(manifest_path(results_dir, manifest['name'])) as fid:
+    json.dump(manifest, fid, indent=2, sort_keys=True)
+
+# remove_manifest: drop the manifest before regenerating an SRAM so a run that
+# fails part way through is never mistaken for an up to date one.
+def remove_manifest( results_dir, name ):
+  try:
+    os.remove(manifest_path(results_dir, name))
+  except FileNotFoundError:
+    pass
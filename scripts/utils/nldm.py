@@ -0,0 +1,131 @@
+import numpy as np
+
+################################################################################
+# NLDM TABLES
+#
+# Computes the lookup tables of the liberty views. The axes span the same range
+# as always (1x to 25x fo4 of input transition, 1x to 100x the minimum driver of
+# output load) and the CACTI numbers (clk->q, setup and hold) are the values at
+# the fastest slew and lightest load. The rest of each surface comes from a
+# first order scaling model:
+#
+#   clk->q     = tcq    + delay_slew * clk slew + delay_load * fo4 * load / min load
+#   setup      = tsetup + setup_data * data slew - setup_clk * clk slew
+#   hold       = thold  - hold_data  * data slew + hold_clk  * clk slew
+#   power      = power  * (1 + power_slew * slew / fo4)
+#   transition = 1x fo4 at the lightest load rising linearly to 25x fo4
+#
+# (slews and loads measured from the first point of their axis). The
+# coefficients can be set per process with "nldmScaling", and "nldmTableSize"
+# sets the number of points of the slew and load axes, eg. 7 or [7, 5].
+#
+# Without either key the tables are the original 2x2 tables where every entry
+# is the single CACTI value, these are built directly without numpy. Otherwise
+# the tables of every memory of a library are computed together, as arrays of
+# shape (memories, slew points, load points).
+################################################################################
+
+# Defaults of the scaling model (used once either key is given)
+NLDM_SCALING = {
+  'delay_slew' : 0.15,  # ns of clk->q per ns of clock transition
+  'delay_load' : 0.10,  # fo4 of clk->q per minimum driver of load
+  'setup_data' : 0.50,  # ns of setup per ns of data transition
+  'setup_clk'  : 0.25,  # ns of setup per ns of clock transition
+  'hold_data'  : 0.25,  # ns of hold per ns of data transition
+  'hold_clk'   : 0.50,  # ns of hold per ns of clock transition
+  'power_slew' : 0.01,  # relative internal power per fo4 of input transition
+}
+
+# Single value tables of the original views
+FLAT_SCALING = {k: 0.0 for k in NLDM_SCALING}
+
+DEFAULT_TABLE_SIZE = 2
+
+# get_nldm_model: number of slew points, number of load points and the scaling
+# coefficients of a process
+def get_nldm_model( process ):
+  size = process.nldmTableSize
+  if size is None:
+    slew_points = load_points = DEFAULT_TABLE_SIZE
+  elif isinstance(size, (list, tuple)):
+    slew_points, load_points = [int(n) for n in size]
+  else:
+    slew_points = load_points = int(size)
+  if process.nldmTableSize is None and process.nldmScaling is None:
+    scaling = FLAT_SCALING
+  else:
+    scaling = dict(NLDM_SCALING, **(process.nldmScaling or {}))
+  return slew_points, load_points, scaling
+
+# validate_nldm_model: list of problems with the nldm keys of a process
+def validate_nldm_model( process ):
+  try:
+    slew_points, load_points, scaling = get_nldm_model(process)
+  except (TypeError, ValueError) as e:
+    return [f'nldmTableSize {process.nldmTableSize!r} is not a number of points or a [slew points, load points] pair ({e})']
+  errors = []
+  if min(slew_points, load_points) < 2:
+    errors.append(f'nldmTableSize {process.nldmTableSize!r} needs at least 2 points on each axis')
+  unknown = [k for k in scaling if k not in NLDM_SCALING]
+  if unknown:
+    errors.append(f'nldmScaling has unknown coefficients {", ".join(unknown)} (use: {", ".join(NLDM_SCALING)})')
+  for k, v in scaling.items():
+    if not isinstance(v, (int, float)) or isinstance(v, bool):
+      errors.append(f'nldmScaling {k} {v!r} is not a number')
+  return errors
+
+# get_axis: points of an axis, spaced geometrically (finer where the values are
+# small). Linear spacing is used instead when the geometric points would not be
+# distinct once printed with 3 decimals. lo and hi are arrays, one per memory.
+def get_axis( lo, hi, points ):
+  axis = np.geomspace(lo, hi, points, axis=-1)
+  if (np.diff(np.round(axis, 3), axis=-1) <= 0).any():
+    axis = np.linspace(lo, hi, points, axis=-1)
+  return axis
+
+# get_nldm_tables: the axes and tables of every memory. limits is the
+# (min slew, max slew, min load, max load) of each memory. Returns a dict of
+# arrays whose first dimension is the memory.
+def get_nldm_tables( mems, limits, slew_points, load_points, scaling ):
+  if scaling is FLAT_SCALING and slew_points == load_points == 2:
+    return get_flat_tables(mems, limits)
+  min_slew, max_slew, min_load, max_load = [np.array(l, dtype=float) for l in zip(*limits)]
+  fo4    = np.array([float(mem.fo4_ps)/1e3 for mem in mems])
+  tcq    = np.array([float(mem.access_time_ns) for mem in mems])
+  tsetup = np.array([float(mem.t_setup_ns) for mem in mems])
+  thold  = np.array([float(mem.t_hold_ns) for mem in mems])
+
+  slew = get_axis(min_slew, max_slew, slew_points)  ;# (memories, slew points)
+  load = get_axis(min_load, max_load, load_points)  ;# (memories, load points)
+
+  # Distance from the first point of each axis, as (memories, rows, columns)
+  slew_row = (slew - min_slew[:, None])[:, :, None]
+  slew_col = (slew - min_slew[:, None])[:, None, :]
+  fanout   = (load / min_load[:, None] - 1)[:, None, :]
+  t        = (load - min_load[:, None]) / (max_load - min_load)[:, None]
+
+  s = scaling
+  return {
+    'slew'       : slew,
+    'load'       : load,
+    'delay'      : tcq[:, None, None]    + s['delay_slew'] * slew_row + s['delay_load'] * fo4[:, None, None] * fanout,
+    'setup'      : tsetup[:, None, None] - s['setup_clk']  * slew_row + s['setup_data'] * slew_col,
+    'hold'       : thold[:, None, None]  + s['hold_clk']   * slew_row - s['hold_data']  * slew_col,
+    'power'      : 1 + s['power_slew'] * (slew - min_slew[:, None]) / fo4[:, None],
+    'transition' : min_slew[:, None] * (1 - t) + max_slew[:, None] * t,
+  }
+
+# get_flat_tables: the original 2x2 tables of every memory (the same values as
+# get_nldm_tables with FLAT_SCALING), as lists whose first item is the memory
+def get_flat_tables( mems, limits ):
+  tables = {k: [] for k in ['slew', 'load', 'delay', 'setup', 'hold', 'power', 'transition']}
+  for mem, (min_slew, max_slew, min_load, max_load) in zip(mems, limits):
+    tcq, tsetup, thold = float(mem.access_time_ns), float(mem.t_setup_ns), float(mem.t_hold_ns)
+    tables['slew'].append((min_slew, max_slew))
+    tables['load'].append((min_load, max_load))
+    tables['delay'].append(((tcq, tcq), (tcq, tcq)))
+    tables['setup'].append(((tsetup, tsetup), (tsetup, tsetup)))
+    tables['hold'].append(((thold, thold), (thold, thold)))
+    tables['power'].append((1.0, 1.0))
+    tables['transition'].append((min_slew, max_slew))
+  return tables
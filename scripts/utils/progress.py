@@ -0,0 +1,126 @@
+import os
+import json
+import time
+import logging
+import threading
+
+from utils.log import logger
+
+################################################################################
+# PROGRESS AND EVENTS
+#
+# Tracks the SRAMs of a run as queued, running and done, and reports a line
+# for every SRAM that finishes with the counts and an estimate of the time
+# left. The estimate comes from the measured cacti and view times of the SRAMs
+# done so far (the mean time of an SRAM times the SRAMs left, spread over the
+# parallel jobs), so it settles once a few SRAMs are done.
+#
+# The run can also be written as a stream of json events, one object per line
+# and flushed as it happens, for dashboards that tail the file during the run.
+# Every event has "event" and "time" (unix seconds):
+#
+#   run_start   config
+#   up_to_date  name
+#   queued      total, jobs           (the SRAMs that are not up to date)
+#   sram_start  name                  (only without --jobs, the pool does not
+#                                      say when a worker picks an SRAM up)
+#   sram_done   name, ok, cacti_s, views_s, wall_s, log, done, running,
+#               queued, failed, eta_s
+#   log         level, message        (warnings and errors)
+#   run_end     ok, wall_s
+################################################################################
+
+class EventStream:
+
+  def __init__( self, path ):
+
+    self.path = str(path)
+    os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+    self.fid  = open(self.path, 'w')
+    self.lock = threading.Lock()
+
+  # emit: write one event
+  def emit( self, event, **fields ):
+    line = json.dumps(dict(event=event, time=round(time.time(), 3), **fields), sort_keys=True)
+    with self.lock:
+      self.fid.write(line + '\n')
+      self.fid.flush()
+
+  def close( self ):
+    self.fid.close()
+
+# Logging handler that forwards the warnings and errors to an event stream
+class EventLogHandler( logging.Handler ):
+
+  def __init__( self, events ):
+    super().__init__(logging.WARNING)
+    self.events = events
+
+  def emit( self, record ):
+    self.events.emit('log', level=record.levelname.lower(), message=record.getMessage())
+
+class Progress:
+
+  def __init__( self, total, jobs = 1, events = None, pool = False ):
+
+    self.total    = int(total)
+    self.jobs     = max(1, int(jobs))
+    self.events   = events
+    self.pool     = pool  ;# srams run on a pool of jobs workers, see num_running
+    self.running  = set()
+    self.done     = 0
+    self.failed   = 0
+    self.times_s  = []  ;# measured cacti + view time of every SRAM done
+    self.lock     = threading.Lock()
+
+  # num_running: SRAMs running. The pool does not say when a worker picks an
+  # SRAM up, but it keeps every worker busy while there are SRAMs left.
+  @property
+  def num_running( self ):
+    return min(self.jobs, self.total - self.done) if self.pool else len(self.running)
+
+  @property
+  def queued( self ):
+    return self.total - self.done - self.num_running
+
+  # start: an SRAM started running (not used with a pool)
+  def start( self, name ):
+    with self.lock:
+      self.running.add(name)
+    if self.events:
+      self.events.emit('sram_start', name=name)
+
+  # finish: an SRAM is done, times holds its measured cacti_s and views_s
+  def finish( self, name, ok, times = None, log = None ):
+    times = times or {}
+    with self.lock:
+      self.running.discard(name)
+      self.done += 1
+      self.failed += 0 if ok else 1
+      if ok and times:
+        self.times_s.append(times.get('cacti_s', 0.0) + times.get('views_s', 0.0))
+      eta_s = self.eta()
+      status = {'done': self.done, 'running': self.num_running, 'queued': self.queued, 'failed': self.failed, 'eta_s': eta_s}
+    logger.info(f'[{self.done}/{self.total}] {"Done" if ok else "FAILED"}: {name}' + (f' (log: {log})' if log else '') +
+                f', {status["running"]} running, {status["queued"]} queued, ETA {format_eta(eta_s)}')
+    if self.events:
+      self.events.emit('sram_done', name=name, ok=ok, log=log,
+                       cacti_s=round(times.get('cacti_s', 0.0), 3), views_s=round(times.get('views_s', 0.0), 3),
+                       wall_s=round(times.get('wall_s', 0.0), 3), **status)
+
+  # eta: seconds until every SRAM is done, None until one has been measured
+  def eta( self ):
+    left = self.total - self.done
+    if not left:
+      return 0.0
+    if not self.times_s:
+      return None
+    mean_s = sum(self.times_s) / len(self.times_s)
+    return round(left * mean_s / min(self.jobs, left), 1)
+
+# format_eta: seconds as h:mm:ss, '?' if unknown
+def format_eta( eta_s ):
+  if eta_s is None:
+    return '?'
+  m, s = divmod(int(round(eta_s)), 60)
+  return f'{m // 60}:{m % 60:02d}:{s:02d}'
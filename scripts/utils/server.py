@@ -0,0 +1,320 @@
+import io
+import os
+import sys
+import json
+import socket
+import argparse
+import hashlib
+import threading
+import traceback
+import contextlib
+import socketserver
+import concurrent.futures
+
+from utils.class_process import Process
+from utils.class_memory import Memory, get_results_dir
+from utils.class_corner import get_corner_memories, get_corner_ppa, get_view_suffixes
+from utils.class_cacti_cache import CactiCache, CactiMemoryCache, cacti_identity
+from utils.class_cacti_runner import CactiRunner
+from utils.generate_lib import generate_lib
+from utils.generate_lef import generate_lef
+from utils.generate_verilog import generate_verilog, generate_verilog_bb
+from utils.manifest import VIEW_EXTENSIONS, get_manifest, is_up_to_date, read_manifest, write_manifest, remove_manifest
+from utils.validate import validate_config
+from utils.api import generate_views
+from utils.atomic_file import check_locking, macro_lock
+from utils.log import logger
+
+################################################################################
+# GENERATOR SERVER
+#
+# Long running generator that serves requests over a local unix socket, so
+# flows that generate one-off macros many times an hour do not pay for python
+# start up, configuration parsing and a cold cacti run every time. The server
+# keeps the process objects, an in-memory cache of cacti results (in front of
+# the on-disk --cacti_cache, if given) and the loaded generator templates
+# around between requests, and generates srams on a bounded pool of threads.
+#
+# The protocol is one json object per line in each direction. A request is
+#
+#   {"op": "generate", "config": <config>, "output_dir": <dir>, "contents": false, "force": false, "write": true}
+#
+# where <config> is a configuration in the same format as the json
+# configuration file (the process keys plus a "srams" list) or the path of a
+# configuration file. Everything but "config" is optional. The response is
+#
+#   {"ok": true, "errors": [], "srams": [{"name": ..., "ok": true, "views": {".lib": <path>, ...},
+#                                         "contents": {".lib": <text>, ...}, "ppa": {...},
+#                                         "up_to_date": false, "log": <output>, "error": null}, ...]}
+#
+# srams whose manifest shows they are up to date are not generated again
+# (unless "force" is set). "contents" also returns the text of every view.
+# With "write" false the views are only returned as contents, nothing is
+# written to disk (and there is no manifest to check, so nothing is skipped).
+# {"op": "stats"} returns counters and {"op": "shutdown"} stops the server.
+# Requests can carry an "id" which is copied into the response.
+################################################################################
+
+class GeneratorServer:
+
+  def __init__( self, socket_path, output_dir = None, cacti_dir = None, cacti_timeout = 1800, cacti_retries = 1,
+                cacti_cache = None, cacti_cache_size = 4096, jobs = 0, lock_files = False ):
+
+    self.socket_path   = str(socket_path)
+    self.output_dir    = output_dir
+    self.cacti_dir     = cacti_dir if cacti_dir else os.environ.get('CACTI_BUILD_DIR')
+    self.cacti_timeout = cacti_timeout
+    self.cacti_retries = cacti_retries
+    self.cacti_cache   = CactiMemoryCache(cacti_cache_size, CactiCache(cacti_cache, cacti_cache_size) if cacti_cache else None)
+    self.pool          = concurrent.futures.ThreadPoolExecutor(max_workers=jobs if jobs > 0 else os.cpu_count())
+    self.processes     = {}    ;# process objects keyed on a hash of the process fields
+    self.macro_locks   = {}    ;# one lock per results directory
+    self.lock_files    = bool(lock_files) ;# also take the lock file of each macro (shared with other runs)
+    self.cacti_mtime   = None
+    self.lock          = threading.Lock()
+    self.stats         = {'requests': 0, 'generated': 0, 'up_to_date': 0, 'failed': 0}
+    self.server        = None
+
+  # serve: accept connections until a shutdown request (or ctrl-c)
+  def serve( self ):
+    self.__remove_stale_socket()
+    outer = self
+    class Handler( socketserver.StreamRequestHandler ):
+      def handle( self ):
+        for line in self.rfile:
+          if not line.strip():
+            continue
+          response = outer.handle_line(line)
+          self.wfile.write((json.dumps(response) + '\n').encode())
+          self.wfile.flush()
+    class Server( socketserver.ThreadingUnixStreamServer ):
+      daemon_threads = True
+    self.server = Server(self.socket_path, Handler)
+    os.chmod(self.socket_path, 0o600)
+    logger.info(f'Serving on {self.socket_path}')
+    try:
+      with _capture_thread_output():
+        self.server.serve_forever()
+    finally:
+      self.server.server_close()
+      self.pool.shutdown()
+      os.remove(self.socket_path)
+
+  def handle_line( self, line ):
+    try:
+      req = json.loads(line)
+      op = req.get('op', 'generate')
+      if op == 'generate':
+        response = self.generate(req)
+      elif op == 'stats':
+        with self.lock:
+          response = dict(self.stats, ok=True, processes=len(self.processes),
+                          cacti_hits=self.cacti_cache.hits, cacti_misses=self.cacti_cache.misses)
+      elif op == 'shutdown':
+        threading.Thread(target=self.server.shutdown).start()
+        response = {'ok': True}
+      else:
+        response = {'ok': False, 'errors': [f'unknown op {op!r}']}
+      if 'id' in req:
+        response['id'] = req['id']
+      return response
+    except Exception as e:
+      return {'ok': False, 'errors': [f'{type(e).__name__}: {e}']}
+
+  # generate: model and write the views of every sram of the request
+  def generate( self, req ):
+    with self.lock:
+      self.stats['requests'] += 1
+    config = req['config']
+    if isinstance(config, str):
+      with open(config, 'r') as fid:
+        raw = [line.strip() for line in fid if not line.strip().startswith('#')]
+      config = json.loads('\n'.join(raw))
+    process = self.get_process(config)
+    srams = config.get('srams', [])
+
+    errors, warnings = validate_config(process, srams)
+    if errors:
+      return {'ok': False, 'errors': errors, 'warnings': warnings, 'srams': []}
+
+    output_dir = req.get('output_dir', self.output_dir)
+    write = bool(req.get('write', True))
+    futures = [self.pool.submit(self.generate_sram, process, sram_data, output_dir, bool(req.get('contents')), bool(req.get('force')), write)
+               for sram_data in srams]
+    results = [f.result() for f in futures]
+    return {'ok': all(r['ok'] for r in results), 'errors': [], 'warnings': warnings, 'srams': results}
+
+  # get_process: the process object of a configuration, kept around for every
+  # later request with the same process fields
+  def get_process( self, config ):
+    fields = {k: v for k, v in config.items() if k != 'srams'}
+    key = hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+    with self.lock:
+      if key not in self.processes:
+        self.processes[key] = Process(fields)
+      return self.processes[key]
+
+  # generate_sram: pool entry point, the server version of run.generate_sram
+  def generate_sram( self, process, sram_data, output_dir, contents, force, write = True ):
+    name = str(sram_data['name'])
+    results_dir = get_results_dir(name, output_dir)
+    result = {'name': name, 'ok': True, 'views': {}, 'ppa': None, 'up_to_date': False, 'error': None}
+    with _thread_output() as log, self.__macro_lock(results_dir), macro_lock(results_dir, name, self.lock_files and write):
+      try:
+        cacti_runner = None
+        cacti_id = 'none'
+        if process.tech_nm != 7: # asap7 is modeled without cacti
+          cacti_runner = CactiRunner(self.cacti_dir, self.cacti_timeout, self.cacti_retries)
+          cacti_id = self.__cacti_id()
+        manifest = get_manifest(process, sram_data, cacti_id, {'ppa': None}, get_view_suffixes(process))
+        if not write:
+          views = generate_views(process, sram_data, self.cacti_dir, self.cacti_cache, cacti_runner, quiet=False)
+          result['ppa'] = views.ppa
+          result['contents'] = views.views
+        elif not force and is_up_to_date(results_dir, manifest):
+          result['up_to_date'] = True
+          result['ppa'] = read_manifest(results_dir, name).get('ppa')
+        else:
+          remove_manifest(results_dir, name)
+          memory = Memory(process, sram_data, output_dir, self.cacti_dir, self.cacti_cache, cacti_runner)
+          generate_lib(memory)
+          generate_lef(memory)
+          generate_verilog(memory, tmChkExpand=process.vlogTimingChecks)
+          generate_verilog_bb(memory)
+          corners = get_corner_memories(process, sram_data, memory, output_dir, self.cacti_dir, self.cacti_cache, cacti_runner)
+          for corner, corner_memory in corners:
+            generate_lib(corner_memory)
+          if corners:
+            manifest = dict(manifest, corner_ppa=get_corner_ppa(corners))
+          write_manifest(results_dir, dict(manifest, ppa=memory.ppa))
+          result['ppa'] = memory.ppa
+        if write:
+          result['views'] = {ext: os.sep.join([results_dir, name + ext]) for ext in VIEW_EXTENSIONS + get_view_suffixes(process)}
+          if contents:
+            result['contents'] = {}
+            for ext, path in result['views'].items():
+              with open(path, 'r') as fid:
+                result['contents'][ext] = fid.read()
+      except BaseException as e: # Generators call sys.exit() on errors
+        traceback.print_exc()
+        result['ok'] = False
+        result['error'] = str(e) if str(e) else type(e).__name__
+    result['log'] = log.getvalue()
+    with self.lock:
+      self.stats['failed' if not result['ok'] else 'up_to_date' if result['up_to_date'] else 'generated'] += 1
+    return result
+
+  # __cacti_id: identity of the cacti binary, recomputed (and the cached cacti
+  # results dropped) whenever the binary is rebuilt while the server is up
+  def __cacti_id( self ):
+    mtime = os.stat(os.sep.join([self.cacti_dir, 'cacti'])).st_mtime_ns
+    with self.lock:
+      if mtime != self.cacti_mtime:
+        cacti_identity.cache_clear()
+        self.cacti_cache.clear()
+        self.cacti_mtime = mtime
+    return cacti_identity(self.cacti_dir)
+
+  # __macro_lock: serialize the requests that write the same results directory
+  def __macro_lock( self, results_dir ):
+    with self.lock:
+      return self.macro_locks.setdefault(results_dir, threading.Lock())
+
+  # __remove_stale_socket: remove the socket of a server that is gone, refuse
+  # to start if a server is still listening on it
+  def __remove_stale_socket( self ):
+    if not os.path.exists(self.socket_path):
+      return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+      try:
+        s.connect(self.socket_path)
+      except (ConnectionRefusedError, FileNotFoundError):
+        os.remove(self.socket_path)
+        return
+    raise RuntimeError(f'a server is already listening on {self.socket_path}')
+
+# Output of the server threads. Every thread that is generating an sram writes
+# into its own buffer (returned with the response), everything else goes to the
+# real stdout.
+class _ThreadOutput( io.TextIOBase ):
+
+  def __init__( self, stream ):
+    self.stream = stream
+    self.local  = threading.local()
+
+  def write( self, text ):
+    buf = getattr(self.local, 'buf', None)
+    return (buf if buf else self.stream).write(text)
+
+  def flush( self ):
+    self.stream.flush()
+
+_output = None
+
+@contextlib.contextmanager
+def _capture_thread_output():
+  global _output
+  _output = _ThreadOutput(sys.stdout)
+  with contextlib.redirect_stdout(_output):
+    try:
+      yield
+    finally:
+      _output = None
+
+@contextlib.contextmanager
+def _thread_output():
+  buf = io.StringIO()
+  if _output is None:
+    with contextlib.redirect_stdout(buf):
+      yield buf
+    return
+  _output.local.buf = buf
+  try:
+    yield buf
+  finally:
+    _output.local.buf = None
+
+# request: send one request to a server and return its response
+def request( socket_path, req ):
+  with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+    s.connect(str(socket_path))
+    s.sendall((json.dumps(req) + '\n').encode())
+    data = b''
+    while not data.endswith(b'\n'):
+      chunk = s.recv(1 << 16)
+      if not chunk:
+        break
+      data += chunk
+  return json.loads(data)
+
+def get_args( argv = None ) -> argparse.Namespace:
+    """
+    Get command line arguments of the serve subcommand
+    """
+    parser = argparse.ArgumentParser(prog="run.py serve", description="Serve generation requests over a local unix socket")
+    parser.add_argument("--socket", action="store", help="Path of the unix socket (default: ./fakeram.sock)", default="fakeram.sock")
+    parser.add_argument("--output_dir", action="store", help="Default output directory of the requests", default=None)
+    parser.add_argument("--cacti_dir", action="store", help="CACTI installation directory", default=None)
+    parser.add_argument("--cacti_timeout", action="store", type=float, help="Wall-clock limit in seconds for a single CACTI run, 0 for no limit (default: 1800)", default=1800)
+    parser.add_argument("--cacti_retries", action="store", type=int, help="Number of times a failed or timed out CACTI run is retried (default: 1)", default=1)
+    parser.add_argument("--cacti_cache", action="store", help="Directory of a persistent cache of CACTI results behind the in-memory one (disabled if not given)", default=None)
+    parser.add_argument("--cacti_cache_size", action="store", type=int, help="Maximum number of entries kept in each CACTI cache (default: 4096)", default=4096)
+    parser.add_argument("-j", "--jobs", action="store", type=int, help="Number of SRAMs generated at the same time, 0 uses every core (default: 0)", default=0)
+    parser.add_argument("--lock", action="store_true", help="Also lock every SRAM with its lock file, so other servers or run.py --lock can share the output directories", default=False)
+    return parser.parse_args(argv)
+
+def main( args : argparse.Namespace ):
+  problem = check_locking() if args.lock else None
+  if problem:
+    logger.error(problem)
+    return 1
+  server = GeneratorServer( args.socket, args.output_dir, args.cacti_dir, args.cacti_timeout, args.cacti_retries
+                          , args.cacti_cache, args.cacti_cache_size, args.jobs, args.lock )
+  try:
+    server.serve()
+  except KeyboardInterrupt:
+    pass
+  except RuntimeError as e:
+    logger.error(str(e))
+    return 1
+  return 0
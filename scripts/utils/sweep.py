@@ -0,0 +1,218 @@
+import io
+import os
+import csv
+import json
+import argparse
+import itertools
+import traceback
+import contextlib
+import concurrent.futures
+import numpy as np
+
+from utils.class_process import Process
+from utils.class_memory import Memory, get_results_dir
+from utils.class_cacti_cache import CactiCache
+from utils.class_cacti_runner import CactiRunner
+from utils.generate_lib import generate_lib
+from utils.generate_lef import generate_lef
+from utils.generate_verilog import generate_verilog, generate_verilog_bb
+from utils.log import logger
+from utils.atomic_file import atomic_open, write_atomic
+
+################################################################################
+# DESIGN SPACE SWEEP
+#
+# Models every combination of the given widths, depths, bank counts, port
+# configurations and cache types for the process of a configuration file (its
+# srams are ignored), --jobs points at a time. The area, access time, cycle
+# time, dynamic power and leakage of every point are written to a table, and
+# the points that no other point of the same capacity beats on every one of
+# those metrics are marked as pareto optimal. Views can optionally be generated for the pareto
+# points (or every point).
+#
+#   ./scripts/run.py sweep <config> --capacity 65536 --width 8:256 --banks 1,2,4 --ports 1rw,1r1w
+################################################################################
+
+# Table columns compared for pareto optimality (all of them lower is better)
+PARETO_METRICS = ['area_um2', 'access_time_ns', 'cycle_time_ns', 'pin_dynamic_power_mW', 'standby_leakage_mW']
+
+COLUMNS = ['name', 'width', 'depth', 'banks', 'ports', 'type', 'capacity_bits', 'width_um', 'height_um'] + PARETO_METRICS + ['pareto', 'error']
+
+def get_args( argv = None ) -> argparse.Namespace:
+    """
+    Get command line arguments of the sweep subcommand
+    """
+    parser = argparse.ArgumentParser(prog="run.py sweep", description="Sweep the SRAM design space and report the pareto optimal points")
+    parser.add_argument("config", help="JSON configuration file that supplies the process")
+    parser.add_argument("--width", action="store", help="Word widths in bits: a list (8,16,32) or a range of powers of two (8:256)", default=None)
+    parser.add_argument("--depth", action="store", help="Depths in words: a list or a range of powers of two (default: capacity / width)", default=None)
+    parser.add_argument("--capacity", action="store", type=int, help="Only keep the points with this capacity in bits", default=None)
+    parser.add_argument("--banks", action="store", help="Bank counts: a list or a range of powers of two (default: 1)", default="1")
+    parser.add_argument("--ports", action="store", help="Port configurations: a list (default: 1rw)", default="1rw")
+    parser.add_argument("--type", action="store", help="Cacti cache types: a list (default: cache)", default="cache")
+    parser.add_argument("--name", action="store", help="Name of the sweep, the points go to <output_dir>/<name>/ and the table to <output_dir>/<name>/<name>.csv (default: sweep)", default="sweep")
+    parser.add_argument("--generate", action="store", choices=['none', 'pareto', 'all'], help="Also generate the lib, lef, v and bb.v views of these points (default: none)", default='none')
+    parser.add_argument("--output_dir", action="store", help="Output directory", default=None)
+    parser.add_argument("--cacti_dir", action="store", help="CACTI installation directory", default=None)
+    parser.add_argument("--cacti_timeout", action="store", type=float, help="Wall-clock limit in seconds for a single CACTI run, 0 for no limit (default: 1800)", default=1800)
+    parser.add_argument("--cacti_retries", action="store", type=int, help="Number of times a failed or timed out CACTI run is retried (default: 1)", default=1)
+    parser.add_argument("--cacti_cache", action="store", help="Directory of a persistent cache of CACTI results (disabled if not given)", default=None)
+    parser.add_argument("--cacti_cache_size", action="store", type=int, help="Maximum number of entries kept in the CACTI cache (default: 4096)", default=4096)
+    parser.add_argument("-j", "--jobs", action="store", type=int, help="Number of points modeled in parallel, 0 uses every core (default: 1)", default=1)
+    return parser.parse_args(argv)
+
+# parse_range: list of ints from a comma separated list where every item is a
+# value or a lo:hi range of powers of two (lo, 2*lo, ... up to hi)
+def parse_range( text ):
+  values = []
+  for item in text.split(','):
+    if ':' in item:
+      lo, hi = [int(v) for v in item.split(':')]
+      while lo <= hi:
+        values.append(lo)
+        lo *= 2
+    else:
+      values.append(int(item))
+  return values
+
+# get_points: sram entries of every point of the sweep
+def get_points( args ):
+  if args.width is None or (args.depth is None and args.capacity is None):
+    raise ValueError('the sweep needs --width and either --depth or --capacity')
+  widths = parse_range(args.width)
+  banks  = parse_range(args.banks)
+  points = []
+  for width, num_banks, ports, cache_type in itertools.product(widths, banks, args.ports.split(','), args.type.split(',')):
+    if args.depth is not None:
+      depths = parse_range(args.depth)
+    elif args.capacity % width == 0:
+      depths = [args.capacity // width]
+    else:
+      depths = []
+    for depth in depths:
+      if args.capacity is not None and width * depth != args.capacity:
+        continue
+      points.append({
+        'name'  : f'{args.name}_{width}x{depth}_{ports}_{num_banks}b_{cache_type}',
+        'width' : width,
+        'depth' : depth,
+        'banks' : num_banks,
+        'ports' : ports,
+        'type'  : cache_type,
+      })
+  return points
+
+def model_point( process, sram_data, args, sweep_dir ):
+  """
+  Process pool entry point. Models one point and returns its row of the table
+  and its PPA numbers (None if the point can not be modeled).
+  """
+  row = {c: sram_data[c] for c in ['name', 'width', 'depth', 'banks', 'ports', 'type']}
+  row['capacity_bits'] = sram_data['width'] * sram_data['depth']
+  log = io.StringIO()
+  try:
+    with contextlib.redirect_stdout(log):
+      cacti_cache = CactiCache(args.cacti_cache, args.cacti_cache_size) if args.cacti_cache else None
+      cacti_runner = None
+      if process.tech_nm != 7: # asap7 is modeled without cacti
+        cacti_runner = CactiRunner(args.cacti_dir if args.cacti_dir else os.environ['CACTI_BUILD_DIR'], args.cacti_timeout, args.cacti_retries)
+      memory = Memory(process, sram_data, sweep_dir, args.cacti_dir, cacti_cache, cacti_runner)
+  except BaseException as e: # sys.exit() on errors
+    traceback.print_exc(file=log)
+    log_path = os.sep.join([sweep_dir, sram_data['name'] + '.log'])
+    write_atomic(log_path, log.getvalue())
+    row['error'] = f'{str(e) if str(e) else type(e).__name__} (log: {log_path})'
+    return row, None
+  row['width_um']  = memory.width_um
+  row['height_um'] = memory.height_um
+  for m in PARETO_METRICS:
+    row[m] = getattr(memory, m)
+  return row, memory.ppa
+
+# mark_pareto: set the pareto column of every row, a row is pareto optimal if
+# no other row of the same capacity is at least as good on every metric and
+# better on one of them
+def mark_pareto( rows ):
+  groups = {}
+  for row in rows:
+    row['pareto'] = False
+    if not row.get('error'):
+      groups.setdefault(row['capacity_bits'], []).append(row)
+  for group in groups.values():
+    v = np.array([[row[m] for m in PARETO_METRICS] for row in group], dtype=float)
+    no_worse  = (v[None, :, :] <= v[:, None, :]).all(axis=2)  ;# [i, j]: j is no worse than i
+    better    = (v[None, :, :] <  v[:, None, :]).any(axis=2)  ;# [i, j]: j is better than i somewhere
+    dominated = (no_worse & better).any(axis=1)
+    for row, d in zip(group, dominated):
+      row['pareto'] = not d
+
+def write_table( rows, path ):
+  with atomic_open(path, 'w', newline='') as fid:
+    writer = csv.DictWriter(fid, fieldnames=COLUMNS, restval='')
+    writer.writeheader()
+    for row in rows:
+      writer.writerow(dict(row, pareto=int(row['pareto'])))
+
+def print_table( rows ):
+  print(f'  {"name":40s} {"area_um2":>12s} {"access_ns":>10s} {"cycle_ns":>10s} {"dyn_mW":>10s} {"leak_mW":>10s}')
+  for row in rows:
+    mark = '*' if row['pareto'] else ' '
+    if row.get('error'):
+      print(f'{mark} {row["name"]:40s} FAILED: {row["error"]}')
+      continue
+    print(f'{mark} {row["name"]:40s} {row["area_um2"]:12.1f} {row["access_time_ns"]:10.4f} {row["cycle_time_ns"]:10.4f}'
+          f' {row["pin_dynamic_power_mW"]:10.4f} {row["standby_leakage_mW"]:10.4f}')
+
+# generate_views: write the views of the given points from their PPA numbers
+# (cacti is not run again). Returns the names of the points that failed.
+def generate_views( process, points, sweep_dir ):
+  failed = []
+  for sram_data, ppa in points:
+    try:
+      with contextlib.redirect_stdout(io.StringIO()):
+        memory = Memory(process, sram_data, sweep_dir, ppa=ppa)
+        generate_lib(memory)
+        generate_lef(memory)
+        generate_verilog(memory, tmChkExpand=process.vlogTimingChecks)
+        generate_verilog_bb(memory)
+      logger.info(f'Generated views of {memory.name} in {memory.results_dir}')
+    except BaseException: # Generators call sys.exit() on errors
+      logger.error(f'generating the views of {sram_data["name"]} failed')
+      failed.append(sram_data['name'])
+  return failed
+
+def main( args : argparse.Namespace ):
+
+  with open(args.config, 'r') as fid:
+    raw = [line.strip() for line in fid if not line.strip().startswith('#')]
+  process = Process(json.loads('\n'.join(raw)))
+
+  try:
+    points = get_points(args)
+  except ValueError as e:
+    logger.error(str(e))
+    return 1
+  if not points:
+    logger.error('the sweep has no points')
+    return 1
+
+  sweep_dir = get_results_dir(args.name, args.output_dir)
+  os.makedirs(sweep_dir, exist_ok=True)
+  logger.info(f'Sweeping {len(points)} points into {sweep_dir}')
+
+  jobs = args.jobs if args.jobs > 0 else os.cpu_count()
+  with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+    results = list(executor.map(model_point, *zip(*[(process, p, args, sweep_dir) for p in points])))
+  rows = [row for row, _ in results]
+  mark_pareto(rows)
+
+  path = os.sep.join([sweep_dir, args.name + '.csv'])
+  write_table(rows, path)
+  print_table(rows)
+  logger.info(f'{sum(r["pareto"] for r in rows)} pareto optimal (*) of {len(rows)} points, table written to {path}')
+
+  failed = [row['name'] for row in rows if row.get('error')]
+  if args.generate != 'none':
+    chosen = [(p, ppa) for p, (row, ppa) in zip(points, results) if ppa is not None and (args.generate == 'all' or row['pareto'])]
+    failed += generate_views(process, chosen, sweep_dir)
+  return 1 if failed else 0
@@ -0,0 +1,125 @@
+import math
+from utils.area import get_macro_dimensions
+from utils.class_memory import get_port_counts, get_port_clks
+from utils.class_corner import validate_corners
+from utils.nldm import validate_nldm_model
+from utils.generate_lef import get_pin_offset, count_pins, count_tracks
+from utils.generate_verilog import TEMPLATE_MAPPING, VLOG_MODELS, TIMING_CHECK_MODES
+
+################################################################################
+# CONFIGURATION VALIDATION
+#
+# Checks every sram entry (and the corners and nldm tables) of the json
+# configuration file up front, so that problems that would otherwise only show
+# up halfway through a run (after cacti has already run for the srams before
+# it) are all reported together before any expensive work starts. Returns a
+# list of errors and a list of warnings (strings).
+#
+# The pin check needs the height of the macro. For asap7 the height comes from
+# the same area model the memory class uses, so a shortage of pin tracks is an
+# error. For the other nodes cacti picks the height, the check uses a rough
+# estimate from the bitcell area instead and only warns.
+################################################################################
+
+WRITE_MODES       = ['write_first', 'read_first', 'write_through']
+WRITE_GRANULARITY = [1, 8]
+CACHE_TYPES       = ['cache', 'ram', 'main memory']
+
+# Rough area of one bitcell in F^2 (6T sram cell, grows with every extra port)
+# and the fraction of the macro taken by the bitcells
+BITCELL_AREA_F2  = 146
+ARRAY_EFFICIENCY = 0.5
+
+def validate_config( process, srams ):
+  errors, warnings = validate_corners(process) + validate_nldm_model(process), []
+  if process.vlogTimingChecks not in TIMING_CHECK_MODES:
+    errors.append(f'vlogTimingChecks {process.vlogTimingChecks!r} is not supported (use one of: {", ".join(TIMING_CHECK_MODES)})')
+  names = {}
+  for i, sram_data in enumerate(srams):
+    where = f'srams[{i}]' + (f' ({sram_data["name"]})' if 'name' in sram_data else '')
+    e, w = validate_sram( process, sram_data )
+    errors   += [f'{where}: {m}' for m in e]
+    warnings += [f'{where}: {m}' for m in w]
+    if 'name' in sram_data:
+      names.setdefault(str(sram_data['name']), []).append(i)
+  for name, indices in names.items():
+    if len(indices) > 1:
+      errors.append(f'srams{indices}: the name {name} is used more than once (they would share a results directory)')
+  return errors, warnings
+
+def validate_sram( process, sram_data ):
+  errors, warnings = [], []
+
+  # Size
+  missing = [k for k in ['name', 'width', 'depth', 'banks'] if k not in sram_data]
+  if missing:
+    return [f'missing {", ".join(missing)}'], []
+  size = {}
+  for k, minimum in [('width', 1), ('depth', 2), ('banks', 1)]:
+    try:
+      size[k] = int(sram_data[k])
+    except (TypeError, ValueError):
+      errors.append(f'{k} {sram_data[k]!r} is not an integer')
+      continue
+    if size[k] < minimum:
+      errors.append(f'{k} {size[k]} is smaller than {minimum}')
+      del size[k]
+
+  # Banks
+  if 'banks' in size:
+    if process.tech_nm == 7 and size['banks'] not in [1, 2, 4]:
+      errors.append(f'banks {size["banks"]} is not supported by the asap7 area model (use 1, 2 or 4)')
+    elif size['banks'] & (size['banks'] - 1):
+      errors.append(f'banks {size["banks"]} is not a power of two')
+    elif process.tech_nm != 7 and 'depth' in size and size['depth'] % size['banks']:
+      errors.append(f'depth {size["depth"]} can not be split evenly over {size["banks"]} cacti banks')
+
+  # Ports and their clocks
+  port_config = str(sram_data.get('ports', '1rw'))
+  if port_config not in TEMPLATE_MAPPING:
+    errors.append(f'ports {port_config!r} is not supported (use one of: {", ".join(TEMPLATE_MAPPING)})')
+  port_counts = get_port_counts(port_config)
+  port_clks = get_port_clks(str(sram_data.get('port_clks', '[1], [0], [0]')))
+  if len(port_clks) != 3:
+    errors.append(f'port_clks {sram_data.get("port_clks")!r} does not have three groups of clocks ([rw], [r], [w])')
+  elif len(set(c for clks in port_clks for c in clks)) > 1:
+    for kind, num_ports, clks in zip(['rw', 'r', 'w'], port_counts, port_clks):
+      if num_ports and not clks:
+        errors.append(f'port_clks {sram_data.get("port_clks")!r} has more than one clock but no clock for the {kind} ports')
+
+  # Write options
+  try:
+    if int(sram_data.get('write_granularity', 1)) not in WRITE_GRANULARITY:
+      errors.append(f'write_granularity {sram_data["write_granularity"]} is not supported (use 1 or 8)')
+  except (TypeError, ValueError):
+    errors.append(f'write_granularity {sram_data["write_granularity"]!r} is not an integer')
+  if str(sram_data.get('write_mode', 'write_first')) not in WRITE_MODES:
+    errors.append(f'write_mode {sram_data["write_mode"]!r} is not supported (use one of: {", ".join(WRITE_MODES)})')
+  if str(sram_data.get('vlog_model', process.vlogModel)) not in VLOG_MODELS:
+    errors.append(f'vlog_model {sram_data.get("vlog_model", process.vlogModel)!r} is not supported (use one of: {", ".join(VLOG_MODELS)})')
+  if process.tech_nm != 7 and str(sram_data.get('type', 'cache')) not in CACHE_TYPES:
+    errors.append(f'type {sram_data["type"]!r} is not a cacti cache type (use one of: {", ".join(CACHE_TYPES)})')
+
+  # Pins along the edge of the macro
+  if len(size) == 3:
+    pins = count_pins(size['width'], size['depth'], *port_counts)
+    height_um, exact = estimate_height(process, sram_data, sum(port_counts))
+    tracks = count_tracks(height_um, get_pin_offset(process), process.pinPitch_um)
+    if pins > tracks:
+      problem = f'{pins} pins do not fit the {tracks} pin tracks of a{"" if exact else "n estimated"} {height_um:.3f}um high macro'
+      if exact:
+        errors.append(problem)
+      else:
+        warnings.append(problem + ' (cacti may still make it tall enough)')
+  return errors, warnings
+
+# estimate_height: height of the macro in um (snapped like the memory class
+# does) and whether it is the real height or a rough estimate
+def estimate_height( process, sram_data, num_ports ):
+  if process.tech_nm == 7:
+    height_um, exact = get_macro_dimensions(process, sram_data)[0], True
+  else:
+    bitcell_um2 = BITCELL_AREA_F2 * process.tech_um**2 * num_ports
+    height_um, exact = math.sqrt(int(sram_data['width']) * int(sram_data['depth']) * bitcell_um2 / ARRAY_EFFICIENCY), False
+  height_um = (math.ceil((height_um*1000.0)/process.snapHeight_nm)*process.snapHeight_nm)/1000.0
+  return height_um, exact
@@ -0,0 +1,71 @@
+import io
+import os
+import gzip
+import contextlib
+
+from utils.atomic_file import atomic_open
+
+################################################################################
+# VIEW FILES
+#
+# Opens the files the views are written to. With compression the text is
+# streamed through gzip or zstd as it is written, so no uncompressed copy of a
+# view ever reaches the disk, and the file gets a .gz or .zst suffix (OpenROAD
+# and most simulators read these directly). zstd needs python 3.14 or the
+# zstandard package. Views are written atomically (see atomic_file), a view
+# only shows up under its name once all of it has been written.
+################################################################################
+
+# Suffix added to the views of each kind of compression
+COMPRESSION_SUFFIX = {'gzip': '.gz', 'zstd': '.zst'}
+
+# gzip level of the views, the higher levels are much slower for little gain
+GZIP_LEVEL = 6
+
+# view_suffix: suffix added to a view with the given compression (None for none)
+def view_suffix( compress = None ):
+  return COMPRESSION_SUFFIX[compress] if compress else ''
+
+# zstd_module: the zstd module to use, None if there is none
+def zstd_module():
+  try:
+    from compression import zstd
+    return zstd
+  except ImportError:
+    pass
+  try:
+    import zstandard
+    return zstandard
+  except ImportError:
+    return None
+
+# check_compression: error message if the compression can not be used
+def check_compression( compress ):
+  if compress and compress not in COMPRESSION_SUFFIX:
+    return f'compression {compress!r} is not supported (use one of: {", ".join(COMPRESSION_SUFFIX)})'
+  if compress == 'zstd' and zstd_module() is None:
+    return 'zstd compression needs python 3.14 or the zstandard package (pip install zstandard)'
+  return None
+
+# open_view: open the file of a view for writing text (use it in a with
+# statement), path is the name of the uncompressed view. Copies of the view with
+# another (or no) compression left behind by earlier runs are removed so tools
+# can not pick up a stale one.
+@contextlib.contextmanager
+def open_view( path, compress = None ):
+  for suffix in [''] + list(COMPRESSION_SUFFIX.values()):
+    if suffix != view_suffix(compress):
+      with contextlib.suppress(FileNotFoundError):
+        os.remove(path + suffix)
+  path += view_suffix(compress)
+  with atomic_open(path, 'wb' if compress else 'w') as fid:
+    if not compress:
+      yield fid
+    elif compress == 'gzip':
+      # mtime 0 keeps the compressed views reproducible, the header records the
+      # name of the view rather than the temporary file
+      with io.TextIOWrapper(gzip.GzipFile(path, 'wb', compresslevel=GZIP_LEVEL, fileobj=fid, mtime=0)) as f:
+        yield f
+    else:
+      with zstd_module().open(fid, 'wt') as f:
+        yield f